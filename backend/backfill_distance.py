@@ -0,0 +1,21 @@
+"""
+Script para preencher distance_meters, search_terms e is_active nas propriedades já cadastradas
+
+Uso: python backfill_distance.py [tamanho_do_lote]
+"""
+
+import asyncio
+import sys
+
+from config.settings import settings
+
+if __name__ == "__main__":
+    if settings.DATA_BACKEND == "firestore":
+        from config.firebase_config import initialize_firebase
+        initialize_firebase()
+
+    from services.property_service import PropertyService
+
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    total = asyncio.run(PropertyService().backfill_derived_fields(batch_size))
+    print(f"Backfill finalizado: {total} propriedades atualizadas")
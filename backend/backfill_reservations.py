@@ -0,0 +1,23 @@
+"""
+Script para converter as datas das reservas já cadastradas (texto ISO) em
+timestamps nativos, preencher start_day/end_day (dia ordinal) e gravar os campos
+de exibição denormalizados (snapshots) das reservas anteriores a eles
+
+Uso: python backfill_reservations.py [tamanho_do_lote]
+"""
+
+import asyncio
+import sys
+
+from config.settings import settings
+
+if __name__ == "__main__":
+    if settings.DATA_BACKEND == "firestore":
+        from config.firebase_config import initialize_firebase
+        initialize_firebase()
+
+    from services.reservation_service import ReservationService
+
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    total = asyncio.run(ReservationService().backfill_derived_fields(batch_size))
+    print(f"Backfill finalizado: {total} reservas atualizadas")
@@ -3,7 +3,7 @@ Configuração do Firebase Firestore
 """
 
 import firebase_admin
-from firebase_admin import credentials, firestore, storage # 1. Adicionar 'storage'
+from firebase_admin import credentials, firestore, firestore_async, storage # 1. Adicionar 'storage'
 from config.settings import settings
 import json
 import os
@@ -68,6 +68,16 @@ def get_firestore_client():
         print(f"Erro ao obter cliente Firestore: {e}")
         return None
 
+#Retorna o cliente assíncrono do Firestore (AsyncClient), usado pelos serviços
+def get_async_firestore_client():
+    try:
+        if not firebase_admin._apps:
+            initialize_firebase()
+        return firestore_async.client()
+    except Exception as e:
+        print(f"Erro ao obter cliente Firestore assíncrono: {e}")
+        return None
+
 #Adicionar uma funçao para obter o bucket do storage
 def get_storage_bucket():
     """Retorna a instância do bucket do Firebase Storage."""
@@ -89,3 +99,12 @@ def get_db():
         db = get_firestore_client()
     return db
 
+# Instancia global do cliente assíncrono do Firestore
+async_db = None
+
+#Retorna a instancia assíncrona do banco de dados
+def get_async_db():
+    global async_db
+    if async_db is None:
+        async_db = get_async_firestore_client()
+    return async_db
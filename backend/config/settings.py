@@ -18,6 +18,39 @@ class Settings(BaseSettings):
     FIREBASE_TOKEN_URI: str = "https://oauth2.googleapis.com/token"
     FIREBASE_CLIENT_X509_CERT_URL: str = ""
 
+    # Backend de dados dos serviços: "firestore" (produção), "memory" ou "sqlite" (testes de carga locais)
+    DATA_BACKEND: str = "firestore"
+    SQLITE_PATH: str = "unireservas.sqlite3"
+
+    # Catálogo de propriedades em memória por worker para listagem/busca (ver services/property_catalog.py)
+    PROPERTY_CATALOG_ENABLED: bool = False
+
+    # Tentativas da transação de reserva quando outra reserva da mesma propriedade concorre
+    BOOKING_MAX_ATTEMPTS: int = 5
+
+    # Expiração de reservas pendentes sem resposta (services/reservation_sweeper.py); intervalo 0 desativa
+    RESERVATION_SWEEP_INTERVAL: int = 3600
+    PENDING_RESERVATION_MAX_AGE_HOURS: int = 168
+
+    # Cache compartilhado entre os workers: "memory" (LRU por processo) ou "redis" (ver utils/cache_backend.py)
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    # TTL máximo (segundos) com CACHE_BACKEND=memory: uma escrita só invalida o worker que a
+    # recebeu, então as cópias dos outros workers precisam expirar logo; 0 desativa o cache
+    CACHE_MEMORY_TTL: int = 5
+    # TTL máximo (segundos) da cópia local de cada worker quando CACHE_BACKEND=redis
+    CACHE_LOCAL_TTL: int = 30
+
+    # TTL (segundos) do cache de respostas das listagens/buscas anônimas; 0 desativa
+    RESPONSE_CACHE_TTL: int = 30
+
+    # Autenticação: "firebase" (ID tokens do Firebase) ou "local" (tokens HS256 assinados com
+    # SECRET_KEY, emitidos por seed_load_test_users.py; apenas para testes de carga)
+    AUTH_MODE: str = "firebase"
+
+    # Verificar revogação do ID token a cada requisição (desativa o cache de tokens verificados)
+    FIREBASE_CHECK_REVOKED: bool = False
+
     # CORS
     ALLOWED_ORIGINS: str = ""
 
@@ -0,0 +1,148 @@
+"""
+Script para gerar firestore.indexes.json a partir das consultas que a API faz no Firestore
+
+Cada consulta vira a sua forma de índice: campos de igualdade (na ordem dos filtros),
+depois a ordenação e os campos com desigualdade (em ordem alfabética, como em
+PropertyService._build_order_by). As contagens recebem a mesma ordenação da página
+(count(filters, order_by)) e usam o mesmo índice. Formas com um único campo são
+atendidas pelos índices automáticos e as só de igualdade pela junção de índices
+(index merging), então não entram no arquivo.
+
+Uso: python generate_firestore_indexes.py [--check]
+  --check  não grava; sai com erro se o arquivo estiver desatualizado
+"""
+
+import json
+import sys
+from datetime import date
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from services.property_service import ACTIVE_FILTER, PROXIMITY_SORTS, SORT_ORDERS
+from utils.reservation_utils import day_filters
+
+INDEXES_PATH = Path(__file__).with_name("firestore.indexes.json")
+
+# (campo, modo): "CONTAINS" para array_contains, "ASCENDING"/"DESCENDING" para os demais
+IndexField = Tuple[str, str]
+
+# Listagem pública (GET /api/properties sem o catálogo): filtros de FilterState.
+# O Firestore aceita um único array_contains por consulta: comodidades e termos de
+# busca não são combinados no servidor
+PROPERTY_EQUALITY_FIELDS = ("type",)
+PROPERTY_ARRAY_FIELDS = ("amenities", "search_terms")
+PROPERTY_RANGE_FIELDS = ("distance_meters", "location", "price")
+# Recorte das propriedades ativas (ACTIVE_FILTER), presente em todas as consultas ao banco
+ACTIVE_FIELD: IndexField = (ACTIVE_FILTER[0], "ASCENDING")
+# Listagem do anunciante (GET /api/properties/my): só o dono, na ordenação padrão
+OWNER_FIELD = "owner_id"
+
+# Reservas: donos com feed (/api/reservations/my) e donos com snapshots propagados
+FEED_OWNER_FIELDS = ("student_id", "advertiser_id")
+SNAPSHOT_OWNER_FIELDS = ("property_id", "student_id", "advertiser_id")
+
+
+def _order_field(field: str, direction: str) -> IndexField:
+    return (field, "DESCENDING" if direction == "desc" else "ASCENDING")
+
+
+def _shape(equalities: Sequence[IndexField], orders: Sequence[IndexField]) -> List[IndexField]:
+    """Campos do índice composto da consulta; vazio quando o Firestore não precisa de um."""
+    fields = list(equalities)
+    used = {field for field, _ in fields}
+    ordered = []
+    for field, mode in orders:
+        if field not in used:
+            used.add(field)
+            ordered.append((field, mode))
+    # Um campo só: índice automático; sem ordenação nem desigualdade: junção de índices
+    if not ordered or len(fields) + len(ordered) < 2:
+        return []
+    return fields + ordered
+
+
+def _subsets(values: Sequence) -> List[Tuple]:
+    return [subset for size in range(len(values) + 1) for subset in combinations(values, size)]
+
+
+def _query_shape(equalities: Sequence[IndexField], sort: Sequence[IndexField], range_fields: Sequence[str]) -> List[IndexField]:
+    return _shape(equalities, list(sort) + [(field, "ASCENDING") for field in sorted(range_fields)])
+
+
+def property_shapes() -> List[List[IndexField]]:
+    shapes = []
+    array_options = [()] + [((field, "CONTAINS"),) for field in PROPERTY_ARRAY_FIELDS]
+    equality_options = [tuple((field, "ASCENDING") for field in subset) for subset in _subsets(PROPERTY_EQUALITY_FIELDS)]
+    for sort_by, orders in SORT_ORDERS.items():
+        sort = [_order_field(field, direction) for field, direction in orders]
+        for array_filter in array_options:
+            for equalities in equality_options:
+                for range_fields in _subsets(PROPERTY_RANGE_FIELDS):
+                    # Ordenações por proximidade sempre filtram distance_meters != None
+                    if sort_by in PROXIMITY_SORTS:
+                        range_fields = set(range_fields) | {"distance_meters"}
+                    shapes.append(_query_shape(array_filter + equalities + (ACTIVE_FIELD,), sort, range_fields))
+    default_sort = [_order_field(field, direction) for field, direction in SORT_ORDERS["relevancia"]]
+    shapes.append(_query_shape([(OWNER_FIELD, "ASCENDING"), ACTIVE_FIELD], default_sort, ()))
+    return shapes
+
+
+def reservation_shapes() -> List[List[IndexField]]:
+    status = ("status", "ASCENDING")
+    today = date.today()
+    shapes = []
+    # Varredura de pendentes (status == pending): por idade e por início já passado
+    shapes.append(_shape([status], [("created_at", "ASCENDING")]))
+    for field, _, _ in day_filters("start", "<", today):
+        shapes.append(_shape([status], [(field, "ASCENDING")]))
+    # Fallback de ocupação (início <= fim pedido) e índice em memória (fim >= hoje)
+    for prefix, op in (("start", "<="), ("end", ">=")):
+        for field, _, _ in day_filters(prefix, op, today):
+            shapes.append(_shape([status], [(field, "ASCENDING")]))
+    # Propagação dos snapshots: reservas ativas não terminadas do dono, por end_day
+    for owner in SNAPSHOT_OWNER_FIELDS:
+        shapes.append(_shape([(owner, "ASCENDING"), status], [("end_day", "ASCENDING")]))
+    # Feed do usuário: mais recentes primeiro, filtros opcionais de status e de início (start_day)
+    for owner in FEED_OWNER_FIELDS:
+        for statuses in ((), (status,)):
+            equalities = [(owner, "ASCENDING"), *statuses]
+            for range_fields in ((), ("start_day",)):
+                shapes.append(_query_shape(equalities, [("created_at", "DESCENDING")], range_fields))
+    return shapes
+
+
+def build_indexes() -> Dict[str, list]:
+    indexes = []
+    seen = set()
+    for collection, shapes in (("properties", property_shapes()), ("reservations", reservation_shapes())):
+        for fields in shapes:
+            key = (collection, tuple(fields))
+            if not fields or key in seen:
+                continue
+            seen.add(key)
+            indexes.append({
+                "collectionGroup": collection,
+                "queryScope": "COLLECTION",
+                "fields": [
+                    {"fieldPath": field, "arrayConfig": mode} if mode == "CONTAINS" else {"fieldPath": field, "order": mode}
+                    for field, mode in fields
+                ],
+            })
+    return {"indexes": indexes, "fieldOverrides": []}
+
+
+def render_indexes() -> str:
+    return json.dumps(build_indexes(), indent=2, ensure_ascii=False) + "\n"
+
+
+if __name__ == "__main__":
+    content = render_indexes()
+    if "--check" in sys.argv[1:]:
+        if INDEXES_PATH.read_text(encoding="utf-8") != content:
+            print(f"{INDEXES_PATH.name} desatualizado: rode python generate_firestore_indexes.py")
+            sys.exit(1)
+        print(f"{INDEXES_PATH.name} em dia")
+    else:
+        INDEXES_PATH.write_text(content, encoding="utf-8")
+        print(f"{INDEXES_PATH.name} gerado: {content.count('collectionGroup')} índices")
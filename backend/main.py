@@ -9,17 +9,47 @@ from config.firebase_config import initialize_firebase
 from config.settings import settings
 
 
-# Inicializar Firebase na importação
+# Inicializar Firebase na importação (os backends locais de dados não precisam do Firestore)
 print("Iniciando Backend...")
-initialize_firebase()
+print(f"Backend de dados: {settings.DATA_BACKEND}")
+if settings.DATA_BACKEND == "firestore":
+    initialize_firebase()
+if settings.AUTH_MODE == "local":
+    if not settings.SECRET_KEY:
+        raise RuntimeError("AUTH_MODE=local exige SECRET_KEY")
+    print("[WARNING] AUTH_MODE=local: tokens emitidos localmente são aceitos (apenas testes de carga)")
 
 # Importar rotas após inicialização do Firebase
 from routers import properties, listings, profiles, auth, auth_firebase, rentals, reservations, chat
+from repositories.factory import get_repository
+from services.property_catalog import property_catalog
+from services.reservation_index import reservation_index
+from services.reservation_sweeper import reservation_sweeper
+from utils.cache_backend import cache_backend
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    print(f"Backend de cache: {settings.CACHE_BACKEND}")
+    await cache_backend.start()
+    if settings.PROPERTY_CATALOG_ENABLED:
+        try:
+            await property_catalog.start(get_repository("properties"))
+        except Exception as e:
+            # Sem catálogo as listagens continuam consultando o banco
+            print(f"[WARNING] Catálogo de propriedades indisponível: {e}")
+    # Independente do catálogo: o filtro de datas da listagem usa o índice nos dois caminhos
+    try:
+        await reservation_index.start(get_repository("reservations"))
+    except Exception as e:
+        # Sem o índice o filtro de datas consulta as reservas ativas no banco
+        print(f"[WARNING] Índice de reservas indisponível: {e}")
+    reservation_sweeper.start()
     print("Backend inicializado com sucesso!")
     yield
+    await reservation_sweeper.stop()
+    property_catalog.stop()
+    reservation_index.stop()
+    await cache_backend.stop()
 
 
 app = FastAPI(
@@ -89,6 +119,13 @@ async def debug_firebase():
         return {"error": str(e), "status": "error"}
 
 
+@app.get("/debug/transactions")
+async def debug_transactions():
+    # Contenção das transações de reserva neste worker
+    from repositories.base import transaction_stats
+    return transaction_stats.snapshot()
+
+
 if __name__ == "__main__":
     uvicorn.run(
         app,
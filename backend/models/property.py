@@ -1,7 +1,7 @@
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
-from datetime import datetime
+from typing import Dict, List, Optional, Literal
+from datetime import date, datetime
 
 
 class PropertyType(str):
@@ -21,6 +21,7 @@ class Property(BaseModel):
     location: str = Field(..., min_length=1, max_length=200)
     university: str = Field(..., min_length=1, max_length=200)
     distance: str = Field(..., min_length=1, max_length=50)
+    distance_meters: Optional[int] = None
     images: List[str] = Field(default=[])
     rating: float = Field(default=0.0, ge=0, le=5)
     amenities: List[str] = Field(default=[])
@@ -83,9 +84,13 @@ class FilterState(BaseModel):
     price_range: Optional[str] = None
     max_price: Optional[float] = Field(None, gt=0)
     location: Optional[str] = None
-    sort_by: Optional[Literal["relevancia", "menor-preco", "maior-preco", "mais-recente", "melhor-avaliado"]] = "relevancia"
+    max_distance: Optional[int] = Field(None, gt=0)  # metros
+    sort_by: Optional[Literal["relevancia", "menor-preco", "maior-preco", "mais-recente", "melhor-avaliado", "mais-proximo", "distance"]] = "relevancia"
     search_term: Optional[str] = None
     amenities: List[str] = Field(default=[])
+    # Período desejado (inclusivo): só propriedades sem reserva ativa que cruze as datas
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
 
 
 class PropertyResponse(Property):
@@ -93,10 +98,22 @@ class PropertyResponse(Property):
     pass
 
 
+class PropertyFacets(BaseModel):
+    #Contagens sobre todo o resultado filtrado (não só a página atual)
+    types: Dict[str, int] = Field(default={})
+    price_ranges: Dict[str, int] = Field(default={})
+    universities: Dict[str, int] = Field(default={})
+    amenities: Dict[str, int] = Field(default={})
+
+
 class PropertiesListResponse(BaseModel):
     #Resposta com lista de propriedades
     properties: List[Property]
     total: int
     page: int
     per_page: int
-    total_pages: int
\ No newline at end of file
+    total_pages: int
+    # Token opaco para buscar a próxima página (parâmetro "cursor"); None na última
+    next_cursor: Optional[str] = None
+    # Facetas do resultado filtrado; None sem o catálogo (PROPERTY_CATALOG_ENABLED)
+    facets: Optional[PropertyFacets] = None
\ No newline at end of file
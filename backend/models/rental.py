@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime, date
 
     #Modelo para criar uma reserva
@@ -19,6 +19,11 @@ class ReservationUpdate(BaseModel):
     message: Optional[str] = Field(None, max_length=500)
     status: Optional[str] = Field(None, pattern="^(pending|confirmed|cancelled|rejected)$")
 
+    #Confirmar/rejeitar várias reservas pendentes de uma vez (anunciante)
+class ReservationBulkStatusUpdate(BaseModel):
+    reservation_ids: List[str] = Field(..., min_length=1, max_length=300, description="IDs das reservas")
+    status: str = Field(..., pattern="^(confirmed|rejected)$")
+
     #Resposta completa de uma reserva
 class ReservationResponse(BaseModel):
     id: str
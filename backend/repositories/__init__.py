@@ -0,0 +1 @@
+# Arquivo vazio para tornar repositories um pacote Python
\ No newline at end of file
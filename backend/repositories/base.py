@@ -0,0 +1,422 @@
+"""
+Contrato comum dos repositórios de documentos usados pelos serviços.
+
+Cada repositório representa uma coleção (``properties``, ``users``,
+``reservations``...) e expõe apenas as operações que os serviços usam.
+As implementações (Firestore, memória e SQLite) são intercambiáveis via
+``settings.DATA_BACKEND``.
+"""
+
+import asyncio
+import random
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Filtro no formato (campo, operador, valor) — mesmos operadores do FieldFilter
+QueryFilter = Tuple[str, str, Any]
+# Ordenação no formato (campo, "asc" | "desc")
+QueryOrder = Tuple[str, str]
+# Operação de escrita em lote: ("set" | "update" | "delete", doc_id, dados)
+WriteOperation = Tuple[str, str, Optional[Dict[str, Any]]]
+# Escrita em qualquer coleção do mesmo backend: (repositório, "set" | "update" | "delete", doc_id, dados)
+CollectionWrite = Tuple["BaseRepository", str, str, Optional[Dict[str, Any]]]
+# Mudança entregue a quem assina a coleção: (doc_id, documento atual ou None se removido)
+DocumentChange = Tuple[str, Optional[Dict[str, Any]]]
+ChangeListener = Callable[[List[DocumentChange]], None]
+
+SUPPORTED_OPERATORS = ("==", "!=", "<", "<=", ">", ">=", "in", "array_contains", "array_contains_any", "array_contains_all")
+# Operadores de igualdade/pertinência: não exigem ordenação pelo campo no Firestore
+EQUALITY_OPERATORS = ("==", "in", "array_contains", "array_contains_any", "array_contains_all")
+
+
+class DocumentNotFoundError(Exception):
+    """Levantada por ``update`` quando o documento não existe."""
+
+
+class TransactionConflictError(Exception):
+    """Um documento lido pela transação mudou antes do commit (a transação é repetida)."""
+
+
+class TransactionAbortedError(Exception):
+    """A transação não conseguiu fazer commit dentro do número máximo de tentativas."""
+
+
+class TransactionStats:
+    """Métricas de contenção das transações deste worker."""
+
+    def __init__(self):
+        self.committed = 0
+        self.retries = 0
+        self.aborted = 0
+        self.max_attempts_seen = 0
+
+    def record(self, attempts: int, committed: bool) -> None:
+        self.retries += attempts - 1
+        self.max_attempts_seen = max(self.max_attempts_seen, attempts)
+        if committed:
+            self.committed += 1
+        else:
+            self.aborted += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        finished = self.committed + self.aborted
+        return {
+            "committed": self.committed,
+            "aborted": self.aborted,
+            "retries": self.retries,
+            "retries_per_transaction": round(self.retries / finished, 4) if finished else 0.0,
+            "max_attempts_seen": self.max_attempts_seen,
+        }
+
+
+transaction_stats = TransactionStats()
+
+# Espera base (segundos) entre tentativas; dobra a cada conflito, com jitter
+TRANSACTION_BACKOFF = 0.005
+
+
+class ArrayUnion:
+    """Sentinela para adicionar itens a um campo lista sem duplicar (equivale a firestore.ArrayUnion)."""
+
+    def __init__(self, values: Iterable[Any]):
+        self.values = list(values)
+
+
+class ArrayRemove:
+    """Sentinela para remover itens de um campo lista (equivale a firestore.ArrayRemove)."""
+
+    def __init__(self, values: Iterable[Any]):
+        self.values = list(values)
+
+
+class Increment:
+    """Sentinela para somar a um campo numérico sem ler o documento (equivale a firestore.Increment)."""
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class Transaction:
+    """Transação otimista dos backends locais: registra o que foi lido e acumula as
+    escritas; no commit, se algum documento lido mudou, nada é gravado.
+
+    As leituras precisam vir antes das escritas (mesma regra do Firestore).
+    """
+
+    def __init__(self):
+        # (repositório, doc_id, documento lido ou None)
+        self.reads: List[Tuple["BaseRepository", str, Optional[Dict[str, Any]]]] = []
+        # (repositório, "set" | "update" | "delete", doc_id, dados)
+        self.writes: List[CollectionWrite] = []
+
+    async def get(self, repository: "BaseRepository", doc_id: str) -> Optional[Dict[str, Any]]:
+        document = await repository.get(doc_id)
+        self.reads.append((repository, doc_id, document))
+        return document
+
+    async def get_many(self, repository: "BaseRepository", doc_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        documents = await repository.get_many(doc_ids)
+        for doc_id in dict.fromkeys(doc_ids):
+            self.reads.append((repository, doc_id, documents.get(doc_id)))
+        return documents
+
+    def set(self, repository: "BaseRepository", doc_id: str, data: Dict[str, Any]) -> None:
+        self.writes.append((repository, "set", doc_id, data))
+
+    def update(self, repository: "BaseRepository", doc_id: str, data: Dict[str, Any]) -> None:
+        self.writes.append((repository, "update", doc_id, data))
+
+    def delete(self, repository: "BaseRepository", doc_id: str) -> None:
+        self.writes.append((repository, "delete", doc_id, None))
+
+
+class BaseRepository(ABC):
+    def __init__(self, collection: str):
+        self.collection = collection
+        self._listeners: List[ChangeListener] = []
+
+    def watch(self, listener: ChangeListener, filters: Optional[List[QueryFilter]] = None) -> Callable[[], None]:
+        """Assina as mudanças da coleção e retorna a função que cancela a assinatura.
+
+        Com ``filters``, só os documentos que atendem aos filtros são entregues; um
+        documento que deixa de atendê-los chega como removido (``None``).
+
+        Nos backends locais só as escritas feitas pelo próprio processo são
+        notificadas; o Firestore sobrescreve com um listener ``on_snapshot``.
+        """
+        if filters:
+            listener = scoped_listener(listener, filters)
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener) if listener in self._listeners else None
+
+    def _notify(self, changes: List[DocumentChange]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(changes)
+            except Exception as e:
+                print(f"[Repository] Erro em listener de {self.collection}: {e}")
+
+    @abstractmethod
+    async def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Busca um documento pelo ID."""
+
+    @abstractmethod
+    async def get_many(self, doc_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Busca vários documentos em uma única ida ao banco; ignora IDs inexistentes."""
+
+    @abstractmethod
+    async def set(self, doc_id: str, data: Dict[str, Any]) -> None:
+        """Cria ou sobrescreve um documento."""
+
+    @abstractmethod
+    async def update(self, doc_id: str, data: Dict[str, Any]) -> None:
+        """Atualiza campos de um documento existente."""
+
+    @abstractmethod
+    async def delete(self, doc_id: str) -> None:
+        """Remove um documento."""
+
+    @abstractmethod
+    async def query(
+        self,
+        filters: Optional[List[QueryFilter]] = None,
+        order_by: Optional[List[QueryOrder]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        start_after: Optional[List[Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Executa uma consulta com filtros, ordenação e paginação.
+
+        ``start_after`` é um cursor de keyset: os valores de cada campo de
+        ``order_by`` seguidos do ID do documento, que é sempre o desempate final
+        (na mesma direção da última ordenação).
+        """
+
+    @abstractmethod
+    async def count(self, filters: Optional[List[QueryFilter]] = None, order_by: Optional[List[QueryOrder]] = None) -> int:
+        """Conta os documentos que atendem aos filtros sem carregá-los.
+
+        ``order_by`` é a ordenação da consulta paginada correspondente: no Firestore
+        a contagem usa o mesmo índice composto e, como a consulta, omite documentos
+        sem os campos ordenados.
+        """
+
+    @abstractmethod
+    async def batch_write(self, operations: List[WriteOperation]) -> None:
+        """Aplica várias escritas de forma atômica (em blocos, quando o backend exige)."""
+
+    async def write_batch(self, writes: List[CollectionWrite]) -> None:
+        """Grava atomicamente escritas em várias coleções do mesmo backend, em um único commit.
+
+        Sem leituras não há conflito nem repetição (e nada entra em ``transaction_stats``).
+        """
+        for _, action, _, _ in writes:
+            if action not in ("set", "update", "delete"):
+                raise ValueError(f"Operação de escrita inválida: {action}")
+        transaction = Transaction()
+        transaction.writes.extend(writes)
+        self._commit_transaction(transaction)
+
+    async def run_transaction(
+        self, callback: Callable[[Transaction], Awaitable[Any]], max_attempts: int = 5, record_stats: bool = True
+    ) -> Any:
+        """Executa ``callback(transaction)`` e grava suas escritas atomicamente, podendo
+        envolver outras coleções do mesmo backend.
+
+        Em caso de conflito o callback roda de novo (até ``max_attempts`` vezes, com
+        backoff exponencial); exceções do próprio callback cancelam a transação.
+        Com ``record_stats=False`` a transação fica fora de ``transaction_stats``
+        (tarefas internas, que não devem aparecer na contenção das requisições).
+        """
+        for attempt in range(1, max_attempts + 1):
+            transaction = Transaction()
+            result = await callback(transaction)
+            try:
+                self._commit_transaction(transaction)
+            except TransactionConflictError:
+                if attempt == max_attempts:
+                    if record_stats:
+                        transaction_stats.record(attempt, committed=False)
+                    raise TransactionAbortedError(f"Transação abortada após {attempt} tentativas")
+                await asyncio.sleep(random.uniform(0, TRANSACTION_BACKOFF * 2 ** attempt))
+                continue
+            if record_stats:
+                transaction_stats.record(attempt, committed=True)
+            return result
+
+    def _commit_transaction(self, transaction: Transaction) -> None:
+        """Confere as leituras e aplica as escritas sem ceder o event loop; lança
+        TransactionConflictError se algum documento lido mudou."""
+        raise NotImplementedError(f"{type(self).__name__} não suporta transações")
+
+
+# ──────────────────────────────────────────────
+# Utilitários compartilhados pelas implementações locais (memória e SQLite)
+# ──────────────────────────────────────────────
+
+def normalize_value(value: Any) -> Any:
+    """Normaliza valores como o Firestore faria ao gravar (datetimes em UTC, enums como valor)."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, dict):
+        return {k: normalize_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    return value
+
+
+def resolve_set_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Documento gravado por um ``set``: as sentinelas valem como num campo inexistente
+    (ArrayUnion -> os itens, ArrayRemove -> [], Increment -> o valor), como no Firestore."""
+    resolved = {}
+    for key, value in data.items():
+        if isinstance(value, ArrayUnion):
+            resolved[key] = list(dict.fromkeys(value.values))
+        elif isinstance(value, ArrayRemove):
+            resolved[key] = []
+        elif isinstance(value, Increment):
+            resolved[key] = value.value
+        elif isinstance(value, dict):
+            resolved[key] = resolve_set_data(value)
+        else:
+            resolved[key] = value
+    return resolved
+
+
+def apply_update(current: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """Aplica um update (incluindo sentinelas e caminhos com ponto) sobre um documento."""
+    updated = dict(current)
+    for key, value in data.items():
+        target = updated
+        parts = key.split(".")
+        for part in parts[:-1]:
+            nested = target.get(part)
+            target[part] = dict(nested) if isinstance(nested, dict) else {}
+            target = target[part]
+        field = parts[-1]
+        if isinstance(value, ArrayUnion):
+            existing = list(target.get(field) or [])
+            for item in normalize_value(value.values):
+                if item not in existing:
+                    existing.append(item)
+            target[field] = existing
+        elif isinstance(value, ArrayRemove):
+            removed = normalize_value(value.values)
+            target[field] = [item for item in (target.get(field) or []) if item not in removed]
+        elif isinstance(value, Increment):
+            existing = target.get(field)
+            target[field] = (existing if isinstance(existing, (int, float)) else 0) + value.value
+        else:
+            target[field] = normalize_value(value)
+    return updated
+
+
+def get_field(data: Dict[str, Any], field: str) -> Any:
+    value: Any = data
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def scoped_listener(listener: ChangeListener, filters: List[QueryFilter]) -> ChangeListener:
+    """Entrega ao listener só os documentos que atendem aos filtros (os demais como removidos)."""
+    def scoped(changes: List[DocumentChange]) -> None:
+        listener([
+            (doc_id, document if document is not None and all(matches_filter(document, f) for f in filters) else None)
+            for doc_id, document in changes
+        ])
+    return scoped
+
+
+def matches_filter(data: Dict[str, Any], query_filter: QueryFilter) -> bool:
+    field, op, expected = query_filter
+    value = get_field(data, field)
+    expected = normalize_value(expected)
+    try:
+        if op == "==":
+            return value == expected
+        if op == "!=":
+            return value is not None and value != expected
+        if op == "in":
+            return value in expected
+        if op == "array_contains":
+            return isinstance(value, list) and expected in value
+        if op == "array_contains_any":
+            return isinstance(value, list) and any(item in value for item in expected)
+        if op == "array_contains_all":
+            # Não existe no Firestore; o repositório do Firestore complementa em Python
+            return isinstance(value, list) and all(item in value for item in expected)
+        if value is None:
+            return False
+        if op == "<":
+            return value < expected
+        if op == "<=":
+            return value <= expected
+        if op == ">":
+            return value > expected
+        if op == ">=":
+            return value >= expected
+    except TypeError:
+        # Tipos diferentes não se comparam no Firestore — o documento é ignorado
+        return False
+    raise ValueError(f"Operador não suportado: {op}")
+
+
+def sort_key(value: Any) -> Tuple[int, Any]:
+    """Chave de ordenação que segue a ordem de tipos do Firestore (null < bool < número < data < texto)."""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, value)
+    if isinstance(value, str):
+        return (4, value)
+    return (5, str(value))
+
+
+def id_direction(order_by: Optional[List[QueryOrder]]) -> str:
+    """Direção do desempate pelo ID — a mesma da última ordenação, como no Firestore."""
+    return order_by[-1][1] if order_by else "asc"
+
+
+def order_documents(documents: List[Dict[str, Any]], order_by: Optional[List[QueryOrder]]) -> List[Dict[str, Any]]:
+    """Ordena documentos em Python; o ID do documento é sempre o desempate final."""
+    ordered = sorted(documents, key=lambda d: d.get("id") or "", reverse=id_direction(order_by) == "desc")
+    for field, direction in reversed(order_by or []):
+        ordered.sort(key=lambda d: sort_key(get_field(d, field)), reverse=direction == "desc")
+    return ordered
+
+
+def _is_after_cursor(document: Dict[str, Any], order_by: List[QueryOrder], start_after: List[Any]) -> bool:
+    orders = list(order_by) + [("id", id_direction(order_by))]
+    for (field, direction), cursor_value in zip(orders, start_after):
+        current = sort_key(get_field(document, field))
+        expected = sort_key(normalize_value(cursor_value))
+        if current == expected:
+            continue
+        return current > expected if direction == "asc" else current < expected
+    return False
+
+
+def paginate(
+    documents: List[Dict[str, Any]],
+    limit: Optional[int],
+    offset: Optional[int],
+    order_by: Optional[List[QueryOrder]] = None,
+    start_after: Optional[List[Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Aplica cursor, offset e limite sobre documentos já ordenados por ``order_documents``."""
+    if start_after:
+        documents = [d for d in documents if _is_after_cursor(d, order_by or [], start_after)]
+    start = offset or 0
+    end = start + limit if limit is not None else None
+    return documents[start:end]
@@ -0,0 +1,33 @@
+"""
+Seleção do backend de dados dos serviços a partir de ``settings.DATA_BACKEND``.
+"""
+
+from typing import Dict
+
+from config.settings import settings
+from repositories.base import BaseRepository
+
+_repositories: Dict[str, BaseRepository] = {}
+
+
+def _create_repository(collection: str) -> BaseRepository:
+    backend = settings.DATA_BACKEND.lower()
+    if backend == "firestore":
+        from repositories.firestore_repository import FirestoreRepository
+        return FirestoreRepository(collection)
+    if backend == "memory":
+        from repositories.memory_repository import MemoryRepository
+        return MemoryRepository(collection)
+    if backend == "sqlite":
+        from repositories.sqlite_repository import SQLiteRepository
+        return SQLiteRepository(collection)
+    raise ValueError(f"DATA_BACKEND inválido: {settings.DATA_BACKEND} (use firestore, memory ou sqlite)")
+
+
+#Retorna o repositório (único por processo) de uma coleção
+def get_repository(collection: str) -> BaseRepository:
+    repository = _repositories.get(collection)
+    if repository is None:
+        repository = _create_repository(collection)
+        _repositories[collection] = repository
+    return repository
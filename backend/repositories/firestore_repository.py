@@ -0,0 +1,312 @@
+"""
+Repositório sobre o Firestore (AsyncClient) — backend padrão em produção.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from google.api_core.exceptions import Aborted, NotFound
+from google.cloud import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from config.firebase_config import get_async_db, get_db
+from repositories.base import (
+    ArrayRemove,
+    ArrayUnion,
+    BaseRepository,
+    ChangeListener,
+    CollectionWrite,
+    DocumentNotFoundError,
+    Increment,
+    QueryFilter,
+    QueryOrder,
+    TransactionAbortedError,
+    WriteOperation,
+    id_direction,
+    matches_filter,
+    paginate,
+    scoped_listener,
+    transaction_stats,
+)
+
+# Limite de operações por commit imposto pelo Firestore
+BATCH_LIMIT = 500
+# Documentos por chamada de get_all; os lotes são buscados em paralelo
+GET_ALL_CHUNK = 100
+# Máximo de documentos lidos por consulta com filtro complementado em Python
+# (array_contains_all com 2+ valores); para esses filtros sem teto, use o catálogo
+LOCAL_FILTER_SCAN_LIMIT = 2000
+
+
+def _to_firestore_value(value: Any) -> Any:
+    if isinstance(value, ArrayUnion):
+        return firestore.ArrayUnion(value.values)
+    if isinstance(value, ArrayRemove):
+        return firestore.ArrayRemove(value.values)
+    if isinstance(value, Increment):
+        return firestore.Increment(value.value)
+    if isinstance(value, dict):
+        return _to_firestore_data(value)
+    return value
+
+
+def _direction(direction: str) -> str:
+    return firestore.Query.DESCENDING if direction == "desc" else firestore.Query.ASCENDING
+
+
+def _split_filters(filters: Optional[List[QueryFilter]]) -> Tuple[List[QueryFilter], List[QueryFilter]]:
+    """Separa os filtros executados no Firestore dos que precisam ser aplicados em Python.
+
+    ``array_contains_all`` não existe no Firestore: o primeiro valor vira um
+    ``array_contains`` no servidor e os demais são conferidos localmente.
+    """
+    server, local = [], []
+    for field, op, value in filters or []:
+        if op == "array_contains_all":
+            values = list(value)
+            if values:
+                server.append((field, "array_contains", values[0]))
+            if len(values) > 1:
+                local.append((field, op, values[1:]))
+        else:
+            server.append((field, op, value))
+    return server, local
+
+
+def _to_firestore_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: _to_firestore_value(value) for key, value in data.items()}
+
+
+def _add_to_batch(batch, ref, action: str, data: Optional[Dict[str, Any]]) -> None:
+    if action == "set":
+        batch.set(ref, _to_firestore_data(data))
+    elif action == "update":
+        batch.update(ref, _to_firestore_data(data))
+    elif action == "delete":
+        batch.delete(ref)
+    else:
+        raise ValueError(f"Operação de escrita inválida: {action}")
+
+
+class FirestoreTransaction:
+    """Mesma interface da ``Transaction`` dos backends locais sobre uma AsyncTransaction."""
+
+    def __init__(self, transaction):
+        self._transaction = transaction
+
+    async def get(self, repository: "FirestoreRepository", doc_id: str) -> Optional[Dict[str, Any]]:
+        snapshot = await repository._collection().document(doc_id).get(transaction=self._transaction)
+        return repository._snapshot_to_dict(snapshot) if snapshot.exists else None
+
+    async def get_many(self, repository: "FirestoreRepository", doc_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        # Um único get_all dentro da transação (os documentos ficam travados até o commit)
+        collection = repository._collection()
+        refs = [collection.document(doc_id) for doc_id in dict.fromkeys(doc_ids) if doc_id]
+        if not refs:
+            return {}
+        return {
+            snapshot.id: repository._snapshot_to_dict(snapshot)
+            async for snapshot in await self._transaction.get_all(refs)
+            if snapshot.exists
+        }
+
+    def set(self, repository: "FirestoreRepository", doc_id: str, data: Dict[str, Any]) -> None:
+        self._transaction.set(repository._collection().document(doc_id), _to_firestore_data(data))
+
+    def update(self, repository: "FirestoreRepository", doc_id: str, data: Dict[str, Any]) -> None:
+        self._transaction.update(repository._collection().document(doc_id), _to_firestore_data(data))
+
+    def delete(self, repository: "FirestoreRepository", doc_id: str) -> None:
+        self._transaction.delete(repository._collection().document(doc_id))
+
+
+class FirestoreRepository(BaseRepository):
+    def __init__(self, collection: str):
+        super().__init__(collection)
+        self.db = None
+
+    def _get_db(self):
+        if self.db is None:
+            self.db = get_async_db()
+        if not self.db:
+            raise Exception("Banco de dados não disponível")
+        return self.db
+
+    def _collection(self):
+        return self._get_db().collection(self.collection)
+
+    @staticmethod
+    def _snapshot_to_dict(snapshot) -> Dict[str, Any]:
+        data = snapshot.to_dict()
+        data.setdefault("id", snapshot.id)
+        return data
+
+    def watch(self, listener: ChangeListener, filters: Optional[List[QueryFilter]] = None) -> Callable[[], None]:
+        # O AsyncClient não tem on_snapshot: o listener usa o cliente síncrono e
+        # roda na thread do Watch, então o listener precisa ser thread-safe
+        db = get_db()
+        if not db:
+            raise Exception("Banco de dados não disponível")
+
+        # Documentos que saem do resultado da consulta chegam como REMOVED
+        server_filters, local_filters = _split_filters(filters)
+        if local_filters:
+            listener = scoped_listener(listener, local_filters)
+        query = db.collection(self.collection)
+        for field, op, value in server_filters:
+            query = query.where(filter=FieldFilter(field, op, value))
+
+        def on_snapshot(_collection_snapshot, changes, _read_time):
+            listener([
+                (change.document.id, None if change.type.name == "REMOVED" else self._snapshot_to_dict(change.document))
+                for change in changes
+            ])
+
+        watch = query.on_snapshot(on_snapshot)
+        return watch.unsubscribe
+
+    async def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        snapshot = await self._collection().document(doc_id).get()
+        return self._snapshot_to_dict(snapshot) if snapshot.exists else None
+
+    async def get_many(self, doc_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        unique_ids = list({doc_id for doc_id in doc_ids if doc_id})
+        if not unique_ids:
+            return {}
+        collection = self._collection()
+        refs = [collection.document(doc_id) for doc_id in unique_ids]
+        chunks = await asyncio.gather(*[
+            self._get_all(refs[i:i + GET_ALL_CHUNK]) for i in range(0, len(refs), GET_ALL_CHUNK)
+        ])
+        return {doc_id: data for chunk in chunks for doc_id, data in chunk.items()}
+
+    async def _get_all(self, refs) -> Dict[str, Dict[str, Any]]:
+        return {
+            snapshot.id: self._snapshot_to_dict(snapshot)
+            async for snapshot in self._get_db().get_all(refs)
+            if snapshot.exists
+        }
+
+    async def set(self, doc_id: str, data: Dict[str, Any]) -> None:
+        await self._collection().document(doc_id).set(_to_firestore_data(data))
+
+    async def update(self, doc_id: str, data: Dict[str, Any]) -> None:
+        try:
+            await self._collection().document(doc_id).update(_to_firestore_data(data))
+        except NotFound:
+            raise DocumentNotFoundError(f"{self.collection}/{doc_id}")
+
+    async def delete(self, doc_id: str) -> None:
+        await self._collection().document(doc_id).delete()
+
+    def _build_query(self, filters: Optional[List[QueryFilter]], order_by: Optional[List[QueryOrder]] = None):
+        query = self._collection()
+        for field, op, value in filters or []:
+            query = query.where(filter=FieldFilter(field, op, value))
+        for field, direction in order_by or []:
+            query = query.order_by(field, direction=_direction(direction))
+        return query
+
+    async def query(
+        self,
+        filters: Optional[List[QueryFilter]] = None,
+        order_by: Optional[List[QueryOrder]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        start_after: Optional[List[Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        server_filters, local_filters = _split_filters(filters)
+        query = self._build_query(server_filters, order_by)
+        if start_after:
+            # Desempate explícito pelo ID para o cursor ser estável
+            query = query.order_by("__name__", direction=_direction(id_direction(order_by)))
+            query = query.start_after(list(start_after))
+        if local_filters:
+            # Offset/limite só podem ser aplicados depois do filtro local: lê na ordem do servidor
+            # (a partir do cursor) e para assim que a página estiver completa
+            wanted = (offset or 0) + limit if limit is not None else None
+            documents, scanned = [], 0
+            async for document in self._stream(query.limit(LOCAL_FILTER_SCAN_LIMIT)):
+                scanned += 1
+                if all(matches_filter(document, f) for f in local_filters):
+                    documents.append(document)
+                    if wanted is not None and len(documents) >= wanted:
+                        break
+            else:
+                self._warn_scan_limit(scanned, local_filters)
+            return paginate(documents, limit, offset)
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return [document async for document in self._stream(query)]
+
+    def _warn_scan_limit(self, scanned: int, local_filters: List[QueryFilter]) -> None:
+        if scanned >= LOCAL_FILTER_SCAN_LIMIT:
+            print(
+                f"[WARNING] [FirestoreRepository] {self.collection}: leitura limitada a {LOCAL_FILTER_SCAN_LIMIT} "
+                f"documentos para {local_filters}; resultado parcial"
+            )
+
+    async def _stream(self, query):
+        async for snapshot in query.stream():
+            yield self._snapshot_to_dict(snapshot)
+
+    async def count(self, filters: Optional[List[QueryFilter]] = None, order_by: Optional[List[QueryOrder]] = None) -> int:
+        server_filters, local_filters = _split_filters(filters)
+        query = self._build_query(server_filters, order_by)
+        if local_filters:
+            # Só os campos conferidos localmente, com o mesmo teto de leitura da consulta
+            fields = sorted({field for field, _, _ in local_filters})
+            total, scanned = 0, 0
+            async for document in self._stream(query.select(fields).limit(LOCAL_FILTER_SCAN_LIMIT)):
+                scanned += 1
+                total += all(matches_filter(document, f) for f in local_filters)
+            self._warn_scan_limit(scanned, local_filters)
+            return total
+        # Agregação no servidor: cobra 1 leitura a cada 1000 entradas de índice
+        results = await query.count(alias="total").get()
+        return int(results[0][0].value) if results else 0
+
+    async def run_transaction(
+        self, callback: Callable[[Any], Awaitable[Any]], max_attempts: int = 5, record_stats: bool = True
+    ) -> Any:
+        # O Firestore repete a transação sozinho quando o commit é abortado por contenção
+        attempts = 0
+
+        @firestore.async_transactional
+        async def run(transaction):
+            nonlocal attempts
+            attempts += 1
+            return await callback(FirestoreTransaction(transaction))
+
+        try:
+            result = await run(self._get_db().transaction(max_attempts=max_attempts))
+        except ValueError as e:
+            if isinstance(e.__cause__, Aborted):
+                if record_stats:
+                    transaction_stats.record(attempts, committed=False)
+                raise TransactionAbortedError(f"Transação abortada após {attempts} tentativas")
+            raise
+        except NotFound as e:
+            raise DocumentNotFoundError(str(e))
+        if record_stats:
+            transaction_stats.record(attempts, committed=True)
+        return result
+
+    async def write_batch(self, writes: List[CollectionWrite]) -> None:
+        if len(writes) > BATCH_LIMIT:
+            raise ValueError(f"Um commit do Firestore aceita no máximo {BATCH_LIMIT} escritas")
+        batch = self._get_db().batch()
+        for repository, action, doc_id, data in writes:
+            _add_to_batch(batch, repository._collection().document(doc_id), action, data)
+        await batch.commit()
+
+    async def batch_write(self, operations: List[WriteOperation]) -> None:
+        db = self._get_db()
+        collection = self._collection()
+        for i in range(0, len(operations), BATCH_LIMIT):
+            batch = db.batch()
+            for action, doc_id, data in operations[i:i + BATCH_LIMIT]:
+                _add_to_batch(batch, collection.document(doc_id), action, data)
+            await batch.commit()
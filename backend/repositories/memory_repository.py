@@ -0,0 +1,124 @@
+"""
+Repositório em memória do processo — dublê local do Firestore para testes de
+carga e profiling sem projeto Firebase. Os dados vivem apenas no worker atual.
+"""
+
+import copy
+from typing import Any, Dict, List, Optional, Sequence
+
+from repositories.base import (
+    BaseRepository,
+    DocumentNotFoundError,
+    QueryFilter,
+    QueryOrder,
+    Transaction,
+    TransactionConflictError,
+    WriteOperation,
+    apply_update,
+    matches_filter,
+    normalize_value,
+    order_documents,
+    paginate,
+    resolve_set_data,
+)
+
+# Armazenamento compartilhado por todas as instâncias do processo: coleção -> id -> documento
+_STORE: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+
+class MemoryRepository(BaseRepository):
+    def __init__(self, collection: str):
+        super().__init__(collection)
+        self._documents = _STORE.setdefault(collection, {})
+
+    @staticmethod
+    def _copy(doc_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        # Cópia profunda simula a serialização do banco: quem lê não altera o armazenamento
+        result = copy.deepcopy(data)
+        result.setdefault("id", doc_id)
+        return result
+
+    async def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        data = self._documents.get(doc_id)
+        return self._copy(doc_id, data) if data is not None else None
+
+    async def get_many(self, doc_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        return {
+            doc_id: self._copy(doc_id, self._documents[doc_id])
+            for doc_id in set(doc_ids)
+            if doc_id in self._documents
+        }
+
+    async def set(self, doc_id: str, data: Dict[str, Any]) -> None:
+        self._documents[doc_id] = normalize_value(resolve_set_data(copy.deepcopy(data)))
+        self._notify_written(doc_id)
+
+    async def update(self, doc_id: str, data: Dict[str, Any]) -> None:
+        current = self._documents.get(doc_id)
+        if current is None:
+            raise DocumentNotFoundError(f"{self.collection}/{doc_id}")
+        self._documents[doc_id] = apply_update(current, copy.deepcopy(data))
+        self._notify_written(doc_id)
+
+    async def delete(self, doc_id: str) -> None:
+        if self._documents.pop(doc_id, None) is not None:
+            self._notify([(doc_id, None)])
+
+    def _notify_written(self, doc_id: str) -> None:
+        if self._listeners:
+            self._notify([(doc_id, self._copy(doc_id, self._documents[doc_id]))])
+
+    async def query(
+        self,
+        filters: Optional[List[QueryFilter]] = None,
+        order_by: Optional[List[QueryOrder]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        start_after: Optional[List[Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        matched = [
+            self._copy(doc_id, data)
+            for doc_id, data in self._documents.items()
+            if all(matches_filter(data, f) for f in filters or [])
+        ]
+        return paginate(order_documents(matched, order_by), limit, offset, order_by, start_after)
+
+    async def count(self, filters: Optional[List[QueryFilter]] = None, order_by: Optional[List[QueryOrder]] = None) -> int:
+        return sum(
+            1 for data in self._documents.values()
+            if all(matches_filter(data, f) for f in filters or [])
+        )
+
+    def _commit_transaction(self, transaction: Transaction) -> None:
+        # Sem await entre a conferência e a escrita: nenhuma outra corrotina intercala
+        for repository, doc_id, snapshot in transaction.reads:
+            current = repository._documents.get(doc_id)
+            if (repository._copy(doc_id, current) if current is not None else None) != snapshot:
+                raise TransactionConflictError(f"{repository.collection}/{doc_id}")
+        for repository, action, doc_id, _ in transaction.writes:
+            if action == "update" and doc_id not in repository._documents:
+                raise DocumentNotFoundError(f"{repository.collection}/{doc_id}")
+        for repository, action, doc_id, data in transaction.writes:
+            if action == "set":
+                repository._documents[doc_id] = normalize_value(resolve_set_data(copy.deepcopy(data)))
+            elif action == "update":
+                repository._documents[doc_id] = apply_update(repository._documents[doc_id], copy.deepcopy(data))
+            elif repository._documents.pop(doc_id, None) is not None:
+                repository._notify([(doc_id, None)])
+                continue
+            repository._notify_written(doc_id)
+
+    async def batch_write(self, operations: List[WriteOperation]) -> None:
+        # Valida antes de aplicar para manter a atomicidade do lote
+        for action, doc_id, _ in operations:
+            if action == "update" and doc_id not in self._documents:
+                raise DocumentNotFoundError(f"{self.collection}/{doc_id}")
+            if action not in ("set", "update", "delete"):
+                raise ValueError(f"Operação de escrita inválida: {action}")
+        for action, doc_id, data in operations:
+            if action == "set":
+                await self.set(doc_id, data)
+            elif action == "update":
+                await self.update(doc_id, data)
+            else:
+                await self.delete(doc_id)
@@ -0,0 +1,277 @@
+"""
+Repositório SQLite — dublê local do Firestore persistido em arquivo.
+
+Cada documento é gravado como JSON na tabela ``documents``; os filtros são
+traduzidos para ``json_extract`` e executados pelo SQLite. Diferente do backend
+em memória, o arquivo é compartilhado pelos workers do uvicorn.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+from repositories.base import (
+    BaseRepository,
+    DocumentNotFoundError,
+    QueryFilter,
+    QueryOrder,
+    Transaction,
+    TransactionConflictError,
+    WriteOperation,
+    apply_update,
+    id_direction,
+    normalize_value,
+    paginate,
+    resolve_set_data,
+)
+
+_FIELD_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+# Datetimes são gravados como ISO 8601 com microssegundos para manter a ordenação lexicográfica
+_DATETIME_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{6}\+00:00$")
+
+_connection: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+
+def _get_connection() -> sqlite3.Connection:
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(settings.SQLITE_PATH, check_same_thread=False, isolation_level=None)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " collection TEXT NOT NULL,"
+            " id TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " PRIMARY KEY (collection, id))"
+        )
+    return _connection
+
+
+def _encode_value(value: Any) -> Any:
+    value = normalize_value(value)
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="microseconds")
+    if isinstance(value, dict):
+        return {k: _encode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_encode_value(v) for v in value]
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, str) and _DATETIME_PATTERN.match(value):
+        return datetime.fromisoformat(value)
+    if isinstance(value, dict):
+        return {k: _decode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_value(v) for v in value]
+    return value
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(_encode_value(data), ensure_ascii=False)
+
+
+def _loads(doc_id: str, raw: str) -> Dict[str, Any]:
+    data = _decode_value(json.loads(raw))
+    data.setdefault("id", doc_id)
+    return data
+
+
+def _json_path(field: str) -> str:
+    if not _FIELD_PATTERN.match(field):
+        raise ValueError(f"Campo inválido para consulta: {field}")
+    return f"$.{field}"
+
+
+def _filter_sql(query_filter: QueryFilter) -> Tuple[str, List[Any]]:
+    field, op, value = query_filter
+    path = _json_path(field)
+    column = f"json_extract(data, '{path}')"
+    value = _encode_value(value)
+    if op == "==":
+        if value is None:
+            return f"{column} IS NULL", []
+        return f"{column} = ?", [value]
+    if op == "!=":
+        if value is None:
+            return f"{column} IS NOT NULL", []
+        return f"{column} != ?", [value]
+    if op in ("<", "<=", ">", ">="):
+        return f"{column} {op} ?", [value]
+    if op == "in":
+        if not value:
+            return "0", []
+        return f"{column} IN ({', '.join('?' for _ in value)})", list(value)
+    if op == "array_contains":
+        return f"EXISTS (SELECT 1 FROM json_each(data, '{path}') WHERE value = ?)", [value]
+    if op == "array_contains_any":
+        if not value:
+            return "0", []
+        placeholders = ", ".join("?" for _ in value)
+        return f"EXISTS (SELECT 1 FROM json_each(data, '{path}') WHERE value IN ({placeholders}))", list(value)
+    if op == "array_contains_all":
+        if not value:
+            return "1", []
+        clause = f"EXISTS (SELECT 1 FROM json_each(data, '{path}') WHERE value = ?)"
+        return " AND ".join(clause for _ in value), list(value)
+    raise ValueError(f"Operador não suportado: {op}")
+
+
+class SQLiteRepository(BaseRepository):
+    def __init__(self, collection: str):
+        super().__init__(collection)
+
+    def _execute(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        with _lock:
+            return _get_connection().execute(sql, params).fetchall()
+
+    def _get_sync(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._execute(
+            "SELECT data FROM documents WHERE collection = ? AND id = ?", (self.collection, doc_id)
+        )
+        return _loads(doc_id, rows[0][0]) if rows else None
+
+    async def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        return self._get_sync(doc_id)
+
+    async def get_many(self, doc_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        unique_ids = list({doc_id for doc_id in doc_ids if doc_id})
+        if not unique_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in unique_ids)
+        rows = self._execute(
+            f"SELECT id, data FROM documents WHERE collection = ? AND id IN ({placeholders})",
+            [self.collection, *unique_ids],
+        )
+        return {doc_id: _loads(doc_id, raw) for doc_id, raw in rows}
+
+    async def set(self, doc_id: str, data: Dict[str, Any]) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)",
+            (self.collection, doc_id, _dumps(resolve_set_data(data))),
+        )
+        self._notify_written([doc_id])
+
+    async def update(self, doc_id: str, data: Dict[str, Any]) -> None:
+        with _lock:
+            connection = _get_connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._apply_operation(connection, "update", doc_id, data)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        self._notify_written([doc_id])
+
+    async def delete(self, doc_id: str) -> None:
+        self._execute("DELETE FROM documents WHERE collection = ? AND id = ?", (self.collection, doc_id))
+        self._notify_written([doc_id])
+
+    def _commit_transaction(self, transaction: Transaction) -> None:
+        # BEGIN IMMEDIATE trava o arquivo: outros workers esperam até o COMMIT
+        with _lock:
+            connection = _get_connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for repository, doc_id, snapshot in transaction.reads:
+                    row = connection.execute(
+                        "SELECT data FROM documents WHERE collection = ? AND id = ?", (repository.collection, doc_id)
+                    ).fetchone()
+                    if (_loads(doc_id, row[0]) if row else None) != snapshot:
+                        raise TransactionConflictError(f"{repository.collection}/{doc_id}")
+                for repository, action, doc_id, data in transaction.writes:
+                    repository._apply_operation(connection, action, doc_id, data)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        for repository, _, doc_id, _ in transaction.writes:
+            repository._notify_written([doc_id])
+
+    def _notify_written(self, doc_ids: List[str]) -> None:
+        # Relê após o commit; escritas de outros workers no mesmo arquivo não são vistas
+        if self._listeners:
+            self._notify([(doc_id, self._get_sync(doc_id)) for doc_id in dict.fromkeys(doc_ids)])
+
+    async def query(
+        self,
+        filters: Optional[List[QueryFilter]] = None,
+        order_by: Optional[List[QueryOrder]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        start_after: Optional[List[Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        where, params = self._where(filters)
+
+        order_terms = [
+            f"json_extract(data, '{_json_path(field)}') {'DESC' if direction == 'desc' else 'ASC'}"
+            for field, direction in order_by or []
+        ]
+        order_terms.append(f"id {'DESC' if id_direction(order_by) == 'desc' else 'ASC'}")
+
+        sql = f"SELECT id, data FROM documents WHERE {where} ORDER BY {', '.join(order_terms)}"
+        if start_after:
+            # O cursor é aplicado em Python sobre o resultado já ordenado pelo SQLite
+            documents = [_loads(doc_id, raw) for doc_id, raw in self._execute(sql, params)]
+            return paginate(documents, limit, offset, order_by, start_after)
+
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit if limit is not None else -1, offset or 0])
+
+        return [_loads(doc_id, raw) for doc_id, raw in self._execute(sql, params)]
+
+    async def count(self, filters: Optional[List[QueryFilter]] = None, order_by: Optional[List[QueryOrder]] = None) -> int:
+        where, params = self._where(filters)
+        return self._execute(f"SELECT COUNT(*) FROM documents WHERE {where}", params)[0][0]
+
+    def _where(self, filters: Optional[List[QueryFilter]]) -> Tuple[str, List[Any]]:
+        clauses = ["collection = ?"]
+        params: List[Any] = [self.collection]
+        for query_filter in filters or []:
+            clause, clause_params = _filter_sql(query_filter)
+            clauses.append(clause)
+            params.extend(clause_params)
+        return " AND ".join(clauses), params
+
+    def _apply_operation(self, connection: sqlite3.Connection, action: str, doc_id: str, data: Optional[Dict[str, Any]]) -> None:
+        if action == "set":
+            connection.execute(
+                "INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)",
+                (self.collection, doc_id, _dumps(resolve_set_data(data))),
+            )
+        elif action == "update":
+            row = connection.execute(
+                "SELECT data FROM documents WHERE collection = ? AND id = ?", (self.collection, doc_id)
+            ).fetchone()
+            if row is None:
+                raise DocumentNotFoundError(f"{self.collection}/{doc_id}")
+            current = _decode_value(json.loads(row[0]))
+            connection.execute(
+                "UPDATE documents SET data = ? WHERE collection = ? AND id = ?",
+                (_dumps(apply_update(current, data)), self.collection, doc_id),
+            )
+        elif action == "delete":
+            connection.execute("DELETE FROM documents WHERE collection = ? AND id = ?", (self.collection, doc_id))
+        else:
+            raise ValueError(f"Operação de escrita inválida: {action}")
+
+    async def batch_write(self, operations: List[WriteOperation]) -> None:
+        with _lock:
+            connection = _get_connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for action, doc_id, data in operations:
+                    self._apply_operation(connection, action, doc_id, data)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        self._notify_written([doc_id for _, doc_id, _ in operations])
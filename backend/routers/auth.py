@@ -31,7 +31,7 @@ async def register(user_data: UserCreate):
             )
         
         # Verificar se email já existe
-        existing_user = profile_service.get_user_by_email(user_data.email)
+        existing_user = await profile_service.get_user_by_email(user_data.email)
         if existing_user:
             print(f"Email já existe: {user_data.email}")
             print(f"Dados do usuário existente: {existing_user}")
@@ -62,7 +62,7 @@ async def register(user_data: UserCreate):
         print("[OK] Validações passaram - Criando usuário...")
         
         # Criar usuário
-        new_user = profile_service.create_user(user_data)
+        new_user = await profile_service.create_user(user_data)
         
         print(f"[OK] Usuário criado com sucesso: {new_user.id}")
         
@@ -115,7 +115,7 @@ async def login(login_data: LoginRequest):
         print(f"🔍 Tentativa de login para: {login_data.email}")
 
         # Buscar usuário por email
-        user_data = profile_service.get_user_by_email(login_data.email)
+        user_data = await profile_service.get_user_by_email(login_data.email)
         if not user_data:
             print(f"Usuário não encontrado: {login_data.email}")
             raise HTTPException(
@@ -159,7 +159,7 @@ async def login(login_data: LoginRequest):
         print("Buscando dados completos do usuário...")
 
         # Buscar dados completos do usuário (sem senha)
-        user_profile = profile_service.get_user_by_id(user_data["id"])
+        user_profile = await profile_service.get_user_by_id(user_data["id"])
         if not user_profile:
             print(f"Falha ao buscar perfil completo: {user_data['id']}")
             raise HTTPException(
@@ -211,7 +211,7 @@ async def get_current_user_info(credentials: HTTPAuthorizationCredentials = Depe
     # Decodifica o token e retorna dados básicos do usuário
     try:
         user_id = verify_token(credentials)
-        user = profile_service.get_user_by_id(user_id)
+        user = await profile_service.get_user_by_id(user_id)
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado")
         user_payload = {
@@ -232,7 +232,7 @@ async def get_current_user_info(credentials: HTTPAuthorizationCredentials = Depe
 async def verify_token_endpoint(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         user_id = verify_token(credentials)
-        user = profile_service.get_user_by_id(user_id)
+        user = await profile_service.get_user_by_id(user_id)
         if not user:
             return ApiResponse(success=False, message="Token inválido ou usuário não encontrado")
         user_payload = {
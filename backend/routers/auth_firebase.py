@@ -43,7 +43,7 @@ async def register_firebase(user_data: UserCreate):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Campo obrigatório para anunciante: companyName")
 
         print("[REGISTRO] Verificando se email já existe...")
-        existing_user = profile_service.get_user_by_email(user_data.email)
+        existing_user = await profile_service.get_user_by_email(user_data.email)
         if existing_user:
             print(f"[REGISTRO] ERRO: Email já existe: {user_data.email}")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Email já cadastrado: {user_data.email}")
@@ -59,10 +59,6 @@ async def register_firebase(user_data: UserCreate):
         user_id = str(uuid.uuid4())
         now = datetime.now(timezone.utc)
 
-        db = profile_service._get_db()
-        if not db:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Banco de dados não disponível")
-
         # Criar perfil baseado no tipo de usuário
         if user_data.user_type == "student":
             new_user_profile = StudentProfile(
@@ -105,7 +101,7 @@ async def register_firebase(user_data: UserCreate):
             )
 
         print("[REGISTRO] Salvando no Firestore...")
-        db.collection("users").document(user_id).set(new_user_profile.model_dump())
+        await profile_service.save_user(user_id, new_user_profile.model_dump())
         print(f"[REGISTRO] Usuário {user_id} salvo com sucesso no Firestore.")
 
         user_response = {
@@ -131,7 +127,7 @@ async def register_firebase(user_data: UserCreate):
 async def verify_token_firebase(token_data: dict = Depends(verify_firebase_token)):
     try:
         firebase_uid = token_data.get("uid")
-        user = profile_service.get_user_by_firebase_uid(firebase_uid)
+        user = await profile_service.get_user_by_firebase_uid(firebase_uid)
         if not user:
             return ApiResponse(success=False, message="Usuário não encontrado no sistema")
         user_payload = { "id": user.id, "email": user.email, "name": user.name, "userType": user.user_type, "firebase_uid": firebase_uid }
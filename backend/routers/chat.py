@@ -16,14 +16,14 @@ async def create_or_get_chat(
     current_user: Union[StudentProfile, AdvertiserProfile] = Depends(get_current_user_firebase)
 ):
     try:
-        chat = chat_service.create_or_get_chat(
+        chat = await chat_service.create_or_get_chat(
             student_id=current_user.id,
             property_id=chat_data.property_id,
             initial_message=chat_data.initial_message
         )
 
         # Enriquecer dados para resposta
-        enriched_chat = chat_service._enrich_chat_data(chat, current_user.id)
+        enriched_chat = await chat_service._enrich_chat_data(chat, current_user.id)
         return ChatResponse(**enriched_chat)
     except Exception as e:
         raise HTTPException(
@@ -39,14 +39,14 @@ async def send_message(
     current_user: Union[StudentProfile, AdvertiserProfile] = Depends(get_current_user_firebase)
 ):
     try:
-        message = chat_service.send_message(
+        message = await chat_service.send_message(
             chat_id=message_data.chat_id,
             sender_id=current_user.id,
             content=message_data.content
         )
 
         # Enriquecer dados para resposta
-        enriched_message = chat_service._enrich_message_data(message)
+        enriched_message = await chat_service._enrich_message_data(message)
         return MessageResponse(**enriched_message)
     except Exception as e:
         raise HTTPException(
@@ -61,7 +61,7 @@ async def get_my_chats(
     current_user: Union[StudentProfile, AdvertiserProfile] = Depends(get_current_user_firebase)
 ):
     try:
-        chats = chat_service.get_user_chats(
+        chats = await chat_service.get_user_chats(
             user_id=current_user.id,
             user_type=current_user.user_type
         )
@@ -90,7 +90,7 @@ async def get_chat_messages(
         if limit < 1 or limit > 100:  # Máximo 100 mensagens por página
             limit = 20
 
-        messages = chat_service.get_chat_messages_paginated(
+        messages = await chat_service.get_chat_messages_paginated(
             chat_id=chat_id,
             user_id=current_user.id,
             page=page,
@@ -123,17 +123,14 @@ async def get_chat_details(
 ):
     try:
         # Verificar se o usuário tem acesso ao chat
-        db = chat_service._get_db()
-        chat_doc = db.collection(chat_service.chats_collection).document(chat_id).get()
+        chat_data = await chat_service.get_chat(chat_id)
 
-        if not chat_doc.exists:
+        if not chat_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Chat não encontrado"
             )
 
-        chat_data = chat_doc.to_dict()
-
         if current_user.id not in [chat_data["student_id"], chat_data["advertiser_id"]]:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -141,7 +138,7 @@ async def get_chat_details(
             )
 
         # Enriquecer dados para resposta
-        enriched_chat = chat_service._enrich_chat_data(chat_data, current_user.id)
+        enriched_chat = await chat_service._enrich_chat_data(chat_data, current_user.id)
         return ChatResponse(**enriched_chat)
 
     except HTTPException:
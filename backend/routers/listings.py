@@ -2,7 +2,7 @@
 Rotas para listings
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File
+from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File, Header, Response
 from typing import Optional, List
 
 from models.listing import (
@@ -10,8 +10,10 @@ from models.listing import (
     ListingsListResponse, PhotoUploadResponse
 )
 from models.profile import AdvertiserProfile
-from services.listing_service import ListingService
+from services.listing_service import UNVERSIONED_FIELDS, ListingService
 from utils.auth import get_current_advertiser
+from utils.http_cache import etag_matches
+from utils.response_cache import response_cache, set_public_cache_headers
 
 
 router = APIRouter()
@@ -24,7 +26,7 @@ async def create_listing(
     current_user: AdvertiserProfile = Depends(get_current_advertiser)
 ):
     try:
-        new_listing = listing_service.create_listing(listing_data, current_user.id)
+        new_listing = await listing_service.create_listing(listing_data, current_user.id)
         return new_listing
     except Exception as e:
         raise HTTPException(
@@ -35,6 +37,7 @@ async def create_listing(
 
 @router.get("/", response_model=ListingsListResponse)
 async def list_listings(
+    response: Response,
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=50),
     property_type: Optional[str] = Query(None),
@@ -42,7 +45,16 @@ async def list_listings(
     is_active: bool = Query(True)
 ):
     try:
-        result = listing_service.get_listings(
+        set_public_cache_headers(response)
+        cache_key = response_cache.make_key(
+            "listings",
+            page=page, per_page=per_page, type=property_type, university=university, is_active=is_active
+        )
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = await listing_service.get_listings(
             page=page,
             per_page=per_page,
             property_type=property_type,
@@ -50,7 +62,9 @@ async def list_listings(
             is_active=is_active
         )
         
-        return ListingsListResponse(**result)
+        list_response = ListingsListResponse(**result)
+        response_cache.set(cache_key, list_response)
+        return list_response
         
     except Exception as e:
         raise HTTPException(
@@ -68,7 +82,7 @@ async def list_my_listings(
 ):
     #Listar listings do usuário atual
     try:
-        result = listing_service.get_listings(
+        result = await listing_service.get_listings(
             page=page,
             per_page=per_page,
             user_id=current_user.id,
@@ -87,17 +101,28 @@ async def list_my_listings(
 @router.get("/university/{university}", response_model=ListingsListResponse)
 async def list_listings_by_university(
     university: str,
+    response: Response,
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=50)
 ):
     try:
-        result = listing_service.get_listings_by_university(
+        set_public_cache_headers(response)
+        cache_key = response_cache.make_key(
+            "listings", route="university", university=university, page=page, per_page=per_page
+        )
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = await listing_service.get_listings_by_university(
             university=university,
             page=page,
             per_page=per_page
         )
         
-        return ListingsListResponse(**result)
+        list_response = ListingsListResponse(**result)
+        response_cache.set(cache_key, list_response)
+        return list_response
         
     except Exception as e:
         raise HTTPException(
@@ -105,16 +130,31 @@ async def list_listings_by_university(
             detail=f"Erro ao buscar listings da universidade: {str(e)}"
         )
 
-    #Obter listing por ID
-@router.get("/{listing_id}", response_model=ListingResponse)
-async def get_listing(listing_id: str):
+    #Obter listing por ID (sem os campos fora da versão/ETag, como "views")
+@router.get("/{listing_id}", response_model=ListingResponse, response_model_exclude=UNVERSIONED_FIELDS)
+async def get_listing(
+    listing_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+):
     try:
-        listing = listing_service.get_listing(listing_id)
+        # Versão já conhecida pelo cliente: conta a visualização e responde 304 sem o corpo
+        cached_etag = await listing_service.get_cached_listing_etag(listing_id)
+        if etag_matches(if_none_match, cached_etag):
+            await listing_service.increment_views(listing_id)
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": cached_etag})
+
+        listing = await listing_service.get_listing(listing_id)
         if not listing:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Listing não encontrado"
             )
+        etag = await listing_service.get_listing_etag(listing)
+        if etag:
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            response.headers["ETag"] = etag
         return listing
     except HTTPException:
         raise
@@ -133,7 +173,7 @@ async def update_listing(
 ):
     #Atualizar listing
     try:
-        updated_listing = listing_service.update_listing(
+        updated_listing = await listing_service.update_listing(
             listing_id, listing_data, current_user.id
         )
         if not updated_listing:
@@ -162,7 +202,7 @@ async def delete_listing(
     current_user: AdvertiserProfile = Depends(get_current_advertiser)
 ):
     try:
-        success = listing_service.delete_listing(listing_id, current_user.id)
+        success = await listing_service.delete_listing(listing_id, current_user.id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -191,7 +231,7 @@ async def upload_photos(
     """Upload de fotos para o listing"""
     try:
         # Verificar se o listing existe e pertence ao usuário
-        listing = listing_service.get_listing(listing_id)
+        listing = await listing_service.get_listing(listing_id)
         if not listing:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -224,7 +264,7 @@ async def upload_photos(
         
         # Atualizar URLs das fotos no listing
         photo_urls = [photo.url for photo in uploaded_photos]
-        listing_service.update_photos(listing_id, photo_urls, current_user.id)
+        await listing_service.update_photos(listing_id, photo_urls, current_user.id)
         
         return uploaded_photos
         
@@ -245,7 +285,7 @@ async def search_listings(
 ):
     """Buscar listings por termo"""
     try:
-        result = listing_service.search_listings(q, page, per_page)
+        result = await listing_service.search_listings(q, page, per_page)
         return ListingsListResponse(**result)
     except Exception as e:
         raise HTTPException(
@@ -61,26 +61,13 @@ async def update_my_profile(
     # Adiciona a data de atualização
     update_dict["updated_at"] = datetime.now(timezone.utc)
 
-    db = profile_service._get_db()
-    if not db:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Banco de dados não disponível."
-        )
-
-    # Atualiza o documento no Firestore
-    user_ref = db.collection("users").document(current_user.id)
-    user_ref.update(update_dict)
-
-    # Busca o documento atualizado para retornar
-    updated_user_doc = user_ref.get()
-    if not updated_user_doc.exists:
+    # Atualiza o documento no Firestore e busca o documento atualizado para retornar
+    updated_user_data = await profile_service.update_user(current_user.id, update_dict)
+    if not updated_user_data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Falha ao recuperar perfil atualizado."
         )
-    
-    updated_user_data = updated_user_doc.to_dict()
 
     return ApiResponse(
         success=True,
@@ -101,16 +88,8 @@ async def delete_my_profile(current_user: UserProfile = Depends(get_current_user
         # Importa o Firebase Admin auth aqui para evitar dependências circulares
         from firebase_admin import auth as fb_auth
 
-        db = profile_service._get_db()
-        if not db:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Banco de dados não disponível."
-            )
-
         # Deleta o usuário do Firestore
-        user_ref = db.collection("users").document(current_user.id)
-        user_ref.delete()
+        await profile_service.delete_user(current_user.id, current_user.firebase_uid)
 
         # Deleta o usuário do Firebase Authentication
         fb_auth.delete_user(current_user.firebase_uid)
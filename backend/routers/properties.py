@@ -1,13 +1,16 @@
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query, File, UploadFile, Header
+from fastapi import APIRouter, HTTPException, status, Depends, Query, File, UploadFile, Header, Response
 from typing import Optional, Union, List
 import datetime
 import os
 
 from models.property import (Property, PropertyCreate, PropertyUpdate, PropertyResponse,PropertiesListResponse, FilterState)
 from models.profile import StudentProfile, AdvertiserProfile
-from services.property_service import PropertyService
+from services.property_service import SORT_ORDERS, PropertyService
 from utils.firebase_auth import get_current_user_firebase, get_current_advertiser_firebase
+from utils.http_cache import etag_matches
+from utils.pagination import InvalidCursorError
+from utils.response_cache import response_cache, set_private_cache_headers, set_public_cache_headers
 from config.firebase_config import get_storage_bucket
 
 
@@ -21,7 +24,7 @@ async def create_property(
     current_user: AdvertiserProfile = Depends(get_current_advertiser_firebase)
 ):
     try:
-        new_property = property_service.create_property(property_data, current_user.id)
+        new_property = await property_service.create_property(property_data, current_user.id)
         return Property(**new_property)
     except Exception as e:
         raise HTTPException(
@@ -39,7 +42,7 @@ async def upload_property_images(
 ):
 
     # Valida se a propriedade existe e pertence ao usuario
-    property_data = property_service.get_property_by_id(property_id)
+    property_data = await property_service.get_property_by_id(property_id)
     if not property_data or property_data.get("owner_id") != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -146,7 +149,7 @@ async def upload_property_images(
 
     # Salva as novas URLs no documento da propriedade no Firestore
     try:
-        updated_property = property_service.add_images_to_property(
+        updated_property = await property_service.add_images_to_property(
             property_id, image_urls, current_user.id
         )
         return {"image_urls": image_urls, "property": updated_property}
@@ -159,17 +162,55 @@ async def upload_property_images(
 
 @router.get("/", response_model=PropertiesListResponse)
 async def list_properties(
+    response: Response,
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=50),
     property_type: Optional[str] = Query(None),
     max_price: Optional[float] = Query(None, gt=0),
     location: Optional[str] = Query(None),
+    max_distance: Optional[int] = Query(None, gt=0, description="Distância máxima da universidade, em metros"),
     sort_by: Optional[str] = Query("relevancia"),
     search_term: Optional[str] = Query(None),
     amenities: Optional[str] = Query(None), 
+    cursor: Optional[str] = Query(None),
+    start_date: Optional[datetime.date] = Query(None, description="Disponível a partir de (inclusivo)"),
+    end_date: Optional[datetime.date] = Query(None, description="Disponível até (inclusivo)"),
     authorization: Optional[str] = Header(None)
 ):
+    if sort_by and sort_by not in SORT_ORDERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"sort_by inválido; use um de: {', '.join(SORT_ORDERS)}"
+        )
+    if (start_date is None) != (end_date is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe start_date e end_date juntos"
+        )
+    if start_date and end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date deve ser igual ou posterior a start_date"
+        )
+
     try:
+        # Visitante anônimo: resposta compartilhada em cache (com token, os favoritos são marcados por usuário).
+        # Com período, a disponibilidade muda a cada reserva (em qualquer worker): a resposta não é cacheada
+        cache_key = None
+        if not authorization and not start_date:
+            set_public_cache_headers(response)
+            cache_key = response_cache.make_key(
+                "properties",
+                page=page, per_page=per_page, type=property_type, max_price=max_price,
+                location=location, max_distance=max_distance, sort=sort_by,
+                search=search_term, amenities=amenities.split(",") if amenities else None, cursor=cursor
+            )
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        else:
+            set_private_cache_headers(response)
+
         # Tentar extrair usuário do token para favoritos
         current_user_id = None
         if authorization and authorization.startswith("Bearer "):
@@ -188,26 +229,40 @@ async def list_properties(
             property_type=property_type,
             max_price=max_price,
             location=location,
+            max_distance=max_distance,
             sort_by=sort_by,
             search_term=search_term,
-            amenities=amenities_list
+            amenities=amenities_list,
+            start_date=start_date,
+            end_date=end_date
         )
 
-        result = property_service.get_properties(
+        result = await property_service.get_properties(
             page=page,
             per_page=per_page,
             filters=filters,
-            current_user_id=current_user_id
+            current_user_id=current_user_id,
+            cursor=cursor
         )
 
         properties = [Property(**prop) for prop in result["properties"]]
 
-        return PropertiesListResponse(
+        list_response = PropertiesListResponse(
             properties=properties,
             total=result["total"],
             page=result["page"],
             per_page=result["per_page"],
-            total_pages=result["total_pages"]
+            total_pages=result["total_pages"],
+            next_cursor=result["next_cursor"],
+            facets=result["facets"]
+        )
+        if cache_key:
+            response_cache.set(cache_key, list_response)
+        return list_response
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     except Exception as e:
         raise HTTPException(
@@ -220,13 +275,15 @@ async def list_properties(
 async def list_my_properties(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None),
     current_user: AdvertiserProfile = Depends(get_current_advertiser_firebase)
 ):
     try:
-        result = property_service.get_properties(
+        result = await property_service.get_properties(
             page=page,
             per_page=per_page,
-            owner_id=current_user.id
+            owner_id=current_user.id,
+            cursor=cursor
         )
 
         properties = [Property(**prop) for prop in result["properties"]]
@@ -236,7 +293,14 @@ async def list_my_properties(
             total=result["total"],
             page=result["page"],
             per_page=result["per_page"],
-            total_pages=result["total_pages"]
+            total_pages=result["total_pages"],
+            next_cursor=result["next_cursor"],
+            facets=result["facets"]
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     except Exception as e:
         raise HTTPException(
@@ -244,16 +308,55 @@ async def list_my_properties(
             detail=f"Erro ao buscar suas propriedades: {str(e)}"
         )
 
+    #Listar propriedades favoritas do usuário logado (declarada antes de "/{property_id}")
+@router.get("/favorites", response_model=PropertiesListResponse)
+async def list_favorite_properties(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(10, ge=1, le=50),
+    current_user: Union[StudentProfile, AdvertiserProfile] = Depends(get_current_user_firebase)
+):
+    try:
+        result = await property_service.get_favorite_properties(current_user.id, page, per_page)
+
+        properties = [Property(**prop) for prop in result["properties"]]
+
+        return PropertiesListResponse(
+            properties=properties,
+            total=result["total"],
+            page=result["page"],
+            per_page=result["per_page"],
+            total_pages=result["total_pages"]
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar favoritos: {str(e)}"
+        )
+
     #Obter detalhes de uma propriedade específica
 @router.get("/{property_id}", response_model=Property)
-async def get_property(property_id: str):
+async def get_property(
+    property_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+):
     try:
-        property_data = property_service.get_property_by_id(property_id)
+        # Versão já conhecida pelo cliente: 304 sem ler o banco
+        cached_etag = await property_service.get_cached_property_etag(property_id)
+        if etag_matches(if_none_match, cached_etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": cached_etag})
+
+        property_data = await property_service.get_property_by_id(property_id)
         if not property_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Propriedade não encontrada"
             )
+        etag = property_service.get_property_etag(property_data)
+        if etag:
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            response.headers["ETag"] = etag
         return Property(**property_data)
     except HTTPException:
         raise
@@ -271,7 +374,7 @@ async def update_property(
     current_user: AdvertiserProfile = Depends(get_current_advertiser_firebase)
 ):
     try:
-        updated_property = property_service.update_property(
+        updated_property = await property_service.update_property(
             property_id, property_data, current_user.id
         )
         if not updated_property:
@@ -300,7 +403,7 @@ async def delete_property(
     current_user: AdvertiserProfile = Depends(get_current_advertiser_firebase)
 ):
     try:
-        success = property_service.delete_property(property_id, current_user.id)
+        success = await property_service.delete_property(property_id, current_user.id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -329,7 +432,7 @@ async def delete_property_images(
 ):
     try:
         # Validar se a propriedade existe e pertence ao usuário
-        property_data = property_service.get_property_by_id(property_id)
+        property_data = await property_service.get_property_by_id(property_id)
         if not property_data or property_data.get("owner_id") != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -343,7 +446,7 @@ async def delete_property_images(
                 detail="Nenhuma URL de imagem fornecida"
             )
 
-        success = property_service.delete_images_from_property(
+        success = await property_service.delete_images_from_property(
             property_id, image_urls, current_user.id
         )
 
@@ -373,7 +476,7 @@ async def reorder_property_images(
 ):
     try:
         # Validar se a propriedade existe e pertence ao usuário
-        property_data = property_service.get_property_by_id(property_id)
+        property_data = await property_service.get_property_by_id(property_id)
         if not property_data or property_data.get("owner_id") != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -387,7 +490,7 @@ async def reorder_property_images(
                 detail="Nenhuma URL de imagem fornecida"
             )
 
-        success = property_service.reorder_property_images(
+        success = await property_service.reorder_property_images(
             property_id, image_urls, current_user.id
         )
 
@@ -415,7 +518,7 @@ async def add_to_favorites(
     current_user: Union[StudentProfile, AdvertiserProfile] = Depends(get_current_user_firebase)
 ):
     try:
-        success = property_service.toggle_favorite(property_id, current_user.id, True)
+        success = await property_service.toggle_favorite(property_id, current_user.id, True)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -441,7 +544,7 @@ async def remove_from_favorites(
     current_user: Union[StudentProfile, AdvertiserProfile] = Depends(get_current_user_firebase)
 ):
     try:
-        success = property_service.toggle_favorite(property_id, current_user.id, False)
+        success = await property_service.toggle_favorite(property_id, current_user.id, False)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -463,20 +566,30 @@ async def remove_from_favorites(
     #Buscar propriedades por termo
 @router.get("/search/", response_model=PropertiesListResponse)
 async def search_properties(
+    response: Response,
     q: str = Query(..., min_length=1),
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=50)
 ):
     try:
-        result = property_service.search_properties(q, None, page, per_page)
+        set_public_cache_headers(response)
+        cache_key = response_cache.make_key("properties", route="search", q=q, page=page, per_page=per_page)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = await property_service.search_properties(q, None, page, per_page)
         properties = [Property(**prop) for prop in result["properties"]]
-        return PropertiesListResponse(
+        list_response = PropertiesListResponse(
             properties=properties,
             total=result["total"],
             page=result["page"],
             per_page=result["per_page"],
-            total_pages=result.get("total_pages", 1)
+            total_pages=result.get("total_pages", 1),
+            facets=result.get("facets")
         )
+        response_cache.set(cache_key, list_response)
+        return list_response
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
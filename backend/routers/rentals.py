@@ -16,7 +16,7 @@ async def express_interest(
     current_user: Union[StudentProfile, AdvertiserProfile] = Depends(get_current_user_firebase)
 ):
     try:
-        new_interest = rental_service.express_interest(
+        new_interest = await rental_service.express_interest(
             property_id=interest_data.property_id,
             student_id=current_user.id,
             message=interest_data.message
@@ -34,7 +34,7 @@ async def get_my_interests(
     current_user: Union[StudentProfile, AdvertiserProfile] = Depends(get_current_user_firebase)
 ):
     try:
-        interests = rental_service.get_student_interests(current_user.id)
+        interests = await rental_service.get_student_interests(current_user.id)
         return [RentalInterestResponse(**interest) for interest in interests]
     except Exception as e:
         raise HTTPException(
@@ -48,7 +48,7 @@ async def get_received_interests(
     current_user: AdvertiserProfile = Depends(get_current_advertiser_firebase)
 ):
     try:
-        interests = rental_service.get_advertiser_interests(current_user.id)
+        interests = await rental_service.get_advertiser_interests(current_user.id)
         return [RentalInterestResponse(**interest) for interest in interests]
     except Exception as e:
         raise HTTPException(
@@ -71,7 +71,7 @@ async def update_interest_status(
         )
 
     try:
-        updated_interest = rental_service.update_interest_status(
+        updated_interest = await rental_service.update_interest_status(
             interest_id=interest_id,
             status=status,
             advertiser_id=current_user.id
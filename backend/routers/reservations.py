@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from models.rental import ReservationCreate, ReservationUpdate, ApiResponse
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from models.rental import ReservationBulkStatusUpdate, ReservationCreate, ReservationUpdate, ApiResponse
+from repositories.base import TransactionAbortedError
 from services.reservation_service import reservation_service
 from utils.firebase_auth import get_current_user_firebase
+from utils.pagination import InvalidCursorError
 from utils.reservation_utils import ReservationStatus
 
 router = APIRouter()
@@ -15,6 +20,14 @@ def _require_advertiser(current_user=Depends(get_current_user_firebase)):
         )
     return current_user
 
+
+def _busy_error() -> HTTPException:
+    # Muitas reservas concorrentes na mesma propriedade: o cliente pode tentar de novo
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Propriedade com muitas reservas simultâneas, tente novamente"
+    )
+
     #Criar nova reserva (apenas estudantes)
 @router.post("/", response_model=ApiResponse)
 async def create_reservation(
@@ -31,7 +44,7 @@ async def create_reservation(
                 detail="Apenas estudantes podem fazer reservas"
             )
 
-        reservation = reservation_service.create_reservation(reservation_data, current_user.id)
+        reservation = await reservation_service.create_reservation(reservation_data, current_user.id)
 
         return ApiResponse(
             success=True,
@@ -39,6 +52,8 @@ async def create_reservation(
             data={"reservation": reservation}
         )
 
+    except TransactionAbortedError:
+        raise _busy_error()
     except Exception as e:
         print(f"[RESERVATIONS] Erro ao criar reserva: {str(e)}")
         raise HTTPException(
@@ -48,21 +63,43 @@ async def create_reservation(
     
     #Buscar reservas do usuário (estudante ou anunciante)
 @router.get("/my", response_model=ApiResponse)
-async def get_my_reservations(current_user = Depends(get_current_user_firebase)):
-    """Buscar reservas do usuário (estudante ou anunciante)"""
+async def get_my_reservations(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    statuses: Optional[List[ReservationStatus]] = Query(None, alias="status"),
+    start_from: Optional[date] = Query(None, description="Início da reserva a partir de (inclusivo)"),
+    start_to: Optional[date] = Query(None, description="Início da reserva até (inclusivo)"),
+    current_user = Depends(get_current_user_firebase)
+):
+    """Buscar reservas do usuário (estudante ou anunciante), mais recentes primeiro"""
     try:
         print(f"[RESERVATIONS] Buscando reservas do usuário: {current_user.id}")
 
-        reservations = reservation_service.get_user_reservations(current_user.id, current_user.user_type)
+        result = await reservation_service.get_user_reservations(
+            current_user.id,
+            current_user.user_type,
+            limit=limit,
+            cursor=cursor,
+            statuses=statuses,
+            start_from=start_from,
+            start_to=start_to,
+        )
 
         return ApiResponse(
             success=True,
             data={
-                "reservations": [res.model_dump() for res in reservations],
-                "total": len(reservations)
+                "reservations": [res.model_dump() for res in result["reservations"]],
+                "total": result["total"],
+                "next_cursor": result["next_cursor"]
             }
         )
 
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
     except Exception as e:
         print(f"[RESERVATIONS] Erro ao buscar reservas: {str(e)}")
         raise HTTPException(
@@ -79,7 +116,7 @@ async def get_reservation(
     try:
         print(f"[RESERVATIONS] Buscando reserva: {reservation_id}")
 
-        reservation = reservation_service.get_reservation_by_id(reservation_id, current_user.id)
+        reservation = await reservation_service.get_reservation_by_id(reservation_id, current_user.id)
 
         if not reservation:
             raise HTTPException(
@@ -111,7 +148,7 @@ async def update_reservation(
     try:
         print(f"[RESERVATIONS] Atualizando reserva: {reservation_id}")
 
-        updated_reservation = reservation_service.update_reservation(
+        updated_reservation = await reservation_service.update_reservation(
             reservation_id, update_data, current_user.id
         )
 
@@ -129,6 +166,8 @@ async def update_reservation(
 
     except HTTPException:
         raise
+    except TransactionAbortedError:
+        raise _busy_error()
     except Exception as e:
         print(f"[RESERVATIONS] Erro ao atualizar reserva: {str(e)}")
         raise HTTPException(
@@ -145,7 +184,7 @@ async def cancel_reservation(
     try:
         print(f"[RESERVATIONS] Cancelando reserva: {reservation_id}")
 
-        success = reservation_service.cancel_reservation(reservation_id, current_user.id)
+        success = await reservation_service.cancel_reservation(reservation_id, current_user.id)
 
         if not success:
             raise HTTPException(
@@ -160,6 +199,8 @@ async def cancel_reservation(
 
     except HTTPException:
         raise
+    except TransactionAbortedError:
+        raise _busy_error()
     except Exception as e:
         print(f"[RESERVATIONS] Erro ao cancelar reserva: {str(e)}")
         raise HTTPException(
@@ -167,6 +208,32 @@ async def cancel_reservation(
             detail=str(e)
         )
     
+    #Confirmar ou rejeitar várias reservas pendentes de uma vez (apenas anunciantes)
+@router.post("/bulk-status", response_model=ApiResponse)
+async def bulk_update_reservation_status(
+    bulk_data: ReservationBulkStatusUpdate,
+    current_user=Depends(_require_advertiser)
+):
+    try:
+        print(f"[RESERVATIONS] Atualização em lote para '{bulk_data.status}': {len(bulk_data.reservation_ids)} reservas")
+
+        results = await reservation_service.bulk_update_status(
+            bulk_data.reservation_ids, bulk_data.status, current_user.id
+        )
+        updated = sum(1 for item in results if item["result"] == "updated")
+
+        return ApiResponse(
+            success=True,
+            message=f"{updated} de {len(results)} reservas atualizadas",
+            data={"results": results, "updated": updated}
+        )
+
+    except TransactionAbortedError:
+        raise _busy_error()
+    except Exception as e:
+        print(f"[RESERVATIONS] Erro na atualização em lote: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     #Confirmar ou rejeitar reserva (apenas anunciantes)
 _STATUS_MESSAGES = {
     ReservationStatus.CONFIRMED: "Reserva confirmada com sucesso",
@@ -197,7 +264,7 @@ async def _update_reservation_status(
     try:
         print(f"[RESERVATIONS] Atualizando status para '{new_status}': {reservation_id}")
 
-        updated = reservation_service.update_reservation(
+        updated = await reservation_service.update_reservation(
             reservation_id, ReservationUpdate(status=new_status), current_user.id
         )
 
@@ -212,6 +279,8 @@ async def _update_reservation_status(
 
     except HTTPException:
         raise
+    except TransactionAbortedError:
+        raise _busy_error()
     except Exception as e:
         print(f"[RESERVATIONS] Erro ao atualizar status: {str(e)}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+Script para criar usuários de teste de carga e emitir tokens locais (AUTH_MODE=local)
+
+Uso: python seed_load_test_users.py [estudantes] [anunciantes] [horas_de_validade] [arquivo_de_saida]
+
+Os usuários têm IDs fixos (loadtest-student-00001, ...), então rodar de novo apenas
+regrava os mesmos documentos. Os tokens são gravados em JSON para o Locust
+(LOCUST_TOKENS_FILE) distribuir um usuário distinto para cada usuário virtual.
+"""
+
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+from config.settings import settings
+
+# Documentos por batch_write (limite de escritas de um batch do Firestore)
+BATCH_SIZE = 500
+
+
+def build_user(user_type: str, index: int, now: datetime) -> dict:
+    user_id = f"loadtest-{user_type}-{index:05d}"
+    user = {
+        "id": user_id,
+        "firebase_uid": user_id,
+        "name": f"Load Test {user_type.title()} {index}",
+        "email": f"{user_id}@loadtest.local",
+        "phone": "Não informado",
+        "user_type": user_type,
+        "created_at": now,
+        "updated_at": now,
+        "is_active": True,
+    }
+    if user_type == "student":
+        user.update({"university": "UFMG", "favorite_properties": []})
+    else:
+        user.update({"company_name": f"Imobiliária Teste {index}", "properties": []})
+    return user
+
+
+async def seed(students: int, advertisers: int, hours: int) -> dict:
+    from repositories.factory import get_repository
+    from utils.auth import create_local_id_token
+
+    users = get_repository("users")
+    now = datetime.now(timezone.utc)
+    expires = timedelta(hours=hours)
+    tokens = {"student": [], "advertiser": []}
+
+    for user_type, count in (("student", students), ("advertiser", advertisers)):
+        documents = [build_user(user_type, index, now) for index in range(1, count + 1)]
+        for start in range(0, len(documents), BATCH_SIZE):
+            chunk = documents[start:start + BATCH_SIZE]
+            await users.batch_write([("set", document["id"], document) for document in chunk])
+        tokens[user_type] = [
+            create_local_id_token(document["firebase_uid"], document["id"], expires) for document in documents
+        ]
+        print(f"{len(documents)} usuários '{user_type}' gravados")
+    return tokens
+
+
+if __name__ == "__main__":
+    if not settings.SECRET_KEY:
+        sys.exit("Defina SECRET_KEY (a mesma usada pela API com AUTH_MODE=local)")
+    if settings.DATA_BACKEND == "memory":
+        sys.exit("DATA_BACKEND=memory não é compartilhado com a API; use sqlite ou firestore")
+    if settings.DATA_BACKEND == "firestore":
+        from config.firebase_config import initialize_firebase
+        initialize_firebase()
+
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    advertisers = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    hours = int(sys.argv[3]) if len(sys.argv) > 3 else 24
+    output = sys.argv[4] if len(sys.argv) > 4 else "load_test_tokens.json"
+
+    tokens = asyncio.run(seed(students, advertisers, hours))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"students": tokens["student"], "advertisers": tokens["advertiser"]}, f)
+    print(f"Tokens válidos por {hours}h gravados em {output}")
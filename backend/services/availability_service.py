@@ -0,0 +1,161 @@
+"""
+Calendário de disponibilidade por propriedade.
+
+Cada propriedade tem um documento em ``property_availability`` com os intervalos
+[início, fim] (datas inclusivas, ISO 8601) das reservas ativas, ordenados pelo
+início, então a verificação de conflito custa uma leitura e uma busca binária,
+em vez de varrer as reservas da propriedade.
+
+Toda mudança no calendário passa por ``transact``: o documento do calendário é
+lido e regravado na mesma transação que grava a reserva, então duas reservas
+concorrentes para as mesmas datas nunca são aceitas ao mesmo tempo (a segunda
+é repetida, vê o intervalo da primeira e falha com conflito).
+"""
+
+from bisect import bisect_right, insort
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from repositories.base import Transaction
+from repositories.factory import get_repository
+from utils.reservation_utils import ReservationStatus, parse_iso_date, reservation_dates
+
+# (início, fim, reservation_id); datas ISO ordenam igual às datas
+Interval = Tuple[str, str, str]
+# Recebe a transação e o calendário lido nela; pode ler outros documentos, alterar o
+# calendário e enfileirar escritas (as leituras sempre antes das escritas)
+CalendarCallback = Callable[[Transaction, "AvailabilityCalendar"], Awaitable[Any]]
+
+
+def _iso(value: Any) -> str:
+    return parse_iso_date(value).isoformat()
+
+
+class AvailabilityCalendar:
+    def __init__(self, intervals: Optional[List[Interval]] = None):
+        self.intervals: List[Interval] = sorted(tuple(interval) for interval in intervals or [])
+        # Intervalos como estão gravados no documento (None: ainda não existe documento)
+        self.stored_intervals: Optional[List[Interval]] = None
+        self._reindex()
+
+    @property
+    def changed(self) -> bool:
+        return self.intervals != self.stored_intervals
+
+    def _reindex(self) -> None:
+        self._starts = [start for start, _, _ in self.intervals]
+        # Maior fim entre os intervalos [0..i]: permite descartar conflitos sem varrer a lista
+        self._max_end: List[str] = []
+        for _, end, _ in self.intervals:
+            self._max_end.append(max(end, self._max_end[-1]) if self._max_end else end)
+
+    @classmethod
+    def from_document(cls, document: Optional[Dict[str, Any]]) -> "AvailabilityCalendar":
+        if not document:
+            return cls()
+        calendar = cls([(item["start"], item["end"], item["reservation_id"]) for item in document.get("intervals", [])])
+        calendar.stored_intervals = list(calendar.intervals)
+        return calendar
+
+    def to_document(self, property_id: str) -> Dict[str, Any]:
+        return {
+            "id": property_id,
+            "intervals": [
+                {"start": start, "end": end, "reservation_id": reservation_id}
+                for start, end, reservation_id in self.intervals
+            ],
+            "updated_at": datetime.utcnow(),
+        }
+
+    def conflicts(self, start: Any, end: Any, ignore_reservation_id: Optional[str] = None) -> List[str]:
+        """IDs das reservas cujo intervalo cruza [start, end] (O(log n) quando não há conflito)."""
+        start_iso, end_iso = _iso(start), _iso(end)
+        position = bisect_right(self._starts, end_iso)
+        found = []
+        # Só os intervalos que começam até "end" podem cruzar; para quando nenhum anterior chega a "start"
+        for index in range(position - 1, -1, -1):
+            if self._max_end[index] < start_iso:
+                break
+            interval_start, interval_end, reservation_id = self.intervals[index]
+            if interval_end >= start_iso and reservation_id != ignore_reservation_id:
+                found.append(reservation_id)
+        return found
+
+    def add(self, reservation_id: str, start: Any, end: Any) -> None:
+        self.remove(reservation_id)
+        insort(self.intervals, (_iso(start), _iso(end), reservation_id))
+        self._reindex()
+
+    def remove(self, reservation_id: str) -> bool:
+        remaining = [interval for interval in self.intervals if interval[2] != reservation_id]
+        if len(remaining) == len(self.intervals):
+            return False
+        self.intervals = remaining
+        self._reindex()
+        return True
+
+
+class AvailabilityService:
+    def __init__(self):
+        self.calendars = get_repository("property_availability")
+        self.reservations = get_repository("reservations")
+
+    async def _load_from_reservations(self, property_id: str) -> AvailabilityCalendar:
+        print(f"[AvailabilityService] Montando calendário da propriedade {property_id}")
+        active_reservations = await self.reservations.query([
+            ("property_id", "==", property_id),
+            ("status", "in", ReservationStatus.active_statuses()),
+        ])
+        intervals = []
+        for reservation in active_reservations:
+            start_date, end_date = reservation_dates(reservation)
+            intervals.append((start_date.isoformat(), end_date.isoformat(), reservation["id"]))
+        return AvailabilityCalendar(intervals)
+
+        #Lê os calendários dentro da transação (um get_all); os que não existem são montados das reservas
+    async def read_calendars(self, transaction: Transaction, property_ids: List[str]) -> Dict[str, AvailabilityCalendar]:
+        documents = await transaction.get_many(self.calendars, property_ids)
+        calendars = {}
+        for property_id in dict.fromkeys(property_ids):
+            if property_id in documents:
+                calendars[property_id] = AvailabilityCalendar.from_document(documents[property_id])
+            else:
+                calendars[property_id] = await self._load_from_reservations(property_id)
+        return calendars
+
+        #Enfileira na transação os calendários alterados (ou ainda não gravados)
+    def write_calendars(self, transaction: Transaction, calendars: Dict[str, AvailabilityCalendar]) -> None:
+        for property_id, calendar in calendars.items():
+            if calendar.changed:
+                transaction.set(self.calendars, property_id, calendar.to_document(property_id))
+
+        #Executa callback(transação, calendário) e grava o calendário junto com as escritas do callback
+    async def transact(self, property_id: str, callback: CalendarCallback, record_stats: bool = True) -> Any:
+        async def attempt(transaction: Transaction) -> Any:
+            calendars = await self.read_calendars(transaction, [property_id])
+            result = await callback(transaction, calendars[property_id])
+            self.write_calendars(transaction, calendars)
+            return result
+
+        return await self.calendars.run_transaction(
+            attempt, max_attempts=settings.BOOKING_MAX_ATTEMPTS, record_stats=record_stats
+        )
+
+        #Grava os calendários que ainda não existem, cada um na sua transação curta, para que uma
+        # transação com muitas reservas não monte calendários (consultas às reservas) lá dentro
+    async def ensure_calendars(self, property_ids: List[str], record_stats: bool = True) -> None:
+        property_ids = list(dict.fromkeys(property_ids))
+        existing = await self.calendars.get_many(property_ids)
+        missing = [property_id for property_id in property_ids if property_id not in existing]
+        for property_id in missing:
+            await self.transact(property_id, _unchanged, record_stats=record_stats)
+
+
+async def _unchanged(transaction: Transaction, calendar: AvailabilityCalendar) -> None:
+    # Nada a alterar: transact grava o calendário recém-montado
+    return None
+
+
+# Instância global do serviço
+availability_service = AvailabilityService()
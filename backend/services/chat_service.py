@@ -1,59 +1,55 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime
+import asyncio
 import uuid
-from google.cloud.firestore_v1.base_query import FieldFilter
-from config.firebase_config import get_db
+from repositories.factory import get_repository
+from services.profile_service import display_name, user_name_cache
+from utils.cache_backend import cache_namespace
 from models.rental import ChatCreate, MessageCreate, ChatResponse, MessageResponse, ChatListResponse, ChatMessagesResponse
 
+# Participantes de cada chat já verificados por usuário (o par não muda depois de criado)
+_chat_permissions_cache = cache_namespace("chat_permissions", ttl=300)
+
 
 class ChatService:
     def __init__(self):
-        self.db = None
-        self.chats_collection = "chats"
-        self.messages_collection = "messages"
-        self.properties_collection = "properties"
-        self.users_collection = "users"
-
-    def _get_db(self):
-        if self.db is None:
-            self.db = get_db()
-        return self.db
-
-    def create_or_get_chat(self, student_id: str, property_id: str, initial_message: str) -> Dict[str, Any]:
+        self.chats = get_repository("chats")
+        self.messages = get_repository("messages")
+        self.properties = get_repository("properties")
+        self.users = get_repository("users")
+        self._background_tasks = set()
+
+    async def get_chat(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Buscar um chat pelo ID"""
+        return await self.chats.get(chat_id)
+
+    async def create_or_get_chat(self, student_id: str, property_id: str, initial_message: str) -> Dict[str, Any]:
         """Criar novo chat ou retornar chat existente entre estudante e proprietário da propriedade"""
         print(f"[ChatService] Criando/buscando chat para estudante {student_id} e propriedade {property_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
         # Buscar informações da propriedade para obter o advertiser_id
-        property_doc = db.collection(self.properties_collection).document(property_id).get()
-        if not property_doc.exists:
+        property_data = await self.properties.get(property_id)
+        if not property_data:
             raise Exception("Propriedade não encontrada")
 
-        property_data = property_doc.to_dict()
         advertiser_id = property_data.get("owner_id")
 
         if not advertiser_id:
             raise Exception("Anunciante da propriedade não encontrado")
 
         # Verificar se já existe um chat entre este estudante e anunciante para esta propriedade
-        existing_chat_query = db.collection(self.chats_collection)\
-            .where(filter=FieldFilter("student_id", "==", student_id))\
-            .where(filter=FieldFilter("advertiser_id", "==", advertiser_id))\
-            .where(filter=FieldFilter("property_id", "==", property_id))\
-            .stream()
+        existing_chats = await self.chats.query([
+            ("student_id", "==", student_id),
+            ("advertiser_id", "==", advertiser_id),
+            ("property_id", "==", property_id),
+        ], limit=1)
 
-        existing_chat = None
-        for doc in existing_chat_query:
-            existing_chat = doc.to_dict()
-            break
+        existing_chat = existing_chats[0] if existing_chats else None
 
         if existing_chat:
             # Chat já existe, adicionar mensagem inicial se fornecida
             if initial_message and initial_message.strip():
-                self._add_message(existing_chat["id"], student_id, initial_message, "student")
+                await self._add_message(existing_chat["id"], student_id, initial_message, "student")
 
             print(f"[OK] [ChatService] Chat existente encontrado: {existing_chat['id']}")
             return existing_chat
@@ -73,19 +69,17 @@ class ChatService:
         }
 
         # Salvar chat no Firestore
-        db.collection(self.chats_collection).document(chat_id).set(chat_data)
+        await self.chats.set(chat_id, chat_data)
 
         # Adicionar mensagem inicial
         if initial_message and initial_message.strip():
-            self._add_message(chat_id, student_id, initial_message, "student")
+            await self._add_message(chat_id, student_id, initial_message, "student")
 
         print(f"[OK] [ChatService] Novo chat criado: {chat_id}")
         return chat_data
 
-    def _add_message(self, chat_id: str, sender_id: str, content: str, sender_type: str) -> Dict[str, Any]:
+    async def _add_message(self, chat_id: str, sender_id: str, content: str, sender_type: str) -> Dict[str, Any]:
         """Adicionar mensagem ao chat"""
-        db = self._get_db()
-
         message_id = str(uuid.uuid4())
         now = datetime.utcnow()
 
@@ -99,31 +93,23 @@ class ChatService:
             "is_read": False
         }
 
-        # Salvar mensagem
-        db.collection(self.messages_collection).document(message_id).set(message_data)
-
-        # Atualizar timestamp do chat
-        db.collection(self.chats_collection).document(chat_id).update({
-            "updated_at": now
-        })
+        # Salvar mensagem e atualizar timestamp do chat em um único commit
+        await self.messages.write_batch([
+            (self.messages, "set", message_id, message_data),
+            (self.chats, "update", chat_id, {"updated_at": now}),
+        ])
 
         return message_data
 
-    def send_message(self, chat_id: str, sender_id: str, content: str) -> Dict[str, Any]:
+    async def send_message(self, chat_id: str, sender_id: str, content: str) -> Dict[str, Any]:
         """Enviar mensagem em um chat existente"""
         print(f"[ChatService] Enviando mensagem no chat {chat_id} de {sender_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
         # Verificar se o chat existe
-        chat_doc = db.collection(self.chats_collection).document(chat_id).get()
-        if not chat_doc.exists:
+        chat_data = await self.chats.get(chat_id)
+        if not chat_data:
             raise Exception("Chat não encontrado")
 
-        chat_data = chat_doc.to_dict()
-
         # Verificar se o usuário tem permissão para enviar mensagem neste chat
         if sender_id not in [chat_data["student_id"], chat_data["advertiser_id"]]:
             raise Exception("Você não tem permissão para enviar mensagens neste chat")
@@ -132,35 +118,26 @@ class ChatService:
         sender_type = "student" if sender_id == chat_data["student_id"] else "advertiser"
 
         # Adicionar mensagem
-        message_data = self._add_message(chat_id, sender_id, content, sender_type)
+        message_data = await self._add_message(chat_id, sender_id, content, sender_type)
 
         print(f"[OK] [ChatService] Mensagem enviada: {message_data['id']}")
         return message_data
 
-    def get_user_chats(self, user_id: str, user_type: str) -> List[Dict[str, Any]]:
+    async def get_user_chats(self, user_id: str, user_type: str) -> List[Dict[str, Any]]:
         """Buscar chats do usuário com otimizações de performance"""
         print(f"[ChatService] Buscando chats do usuário: {user_id}, tipo: {user_type}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
         # Definir campo baseado no tipo de usuário
         field = "student_id" if user_type == "student" else "advertiser_id"
 
         # Ordenação em Python — combinar equality + order_by em campos distintos exige índice composto
-        chats_query = db.collection(self.chats_collection)\
-            .where(filter=FieldFilter(field, "==", user_id))\
-            .stream()
+        chats = await self.chats.query([(field, "==", user_id)])
 
-        chats = []
         property_ids = set()
         user_ids = set()
 
-        # Coletar dados básicos e IDs para batch queries
-        for doc in chats_query:
-            chat_data = doc.to_dict()
-            chats.append(chat_data)
+        # Coletar IDs para batch queries
+        for chat_data in chats:
             property_ids.add(chat_data["property_id"])
             user_ids.add(chat_data["student_id"])
             user_ids.add(chat_data["advertiser_id"])
@@ -169,9 +146,11 @@ class ChatService:
         chats.sort(key=lambda c: c.get("updated_at") or datetime.min, reverse=True)
 
         # Batch fetch para propriedades, usuários e mensagens
-        properties_cache = self._batch_fetch_properties(list(property_ids))
-        users_cache = self._batch_fetch_users(list(user_ids))
-        messages_by_chat = self._batch_fetch_messages_by_chats([c["id"] for c in chats])
+        properties_cache, users_cache, messages_by_chat = await asyncio.gather(
+            self._batch_fetch_properties(list(property_ids)),
+            self._batch_fetch_users(list(user_ids)),
+            self._batch_fetch_messages_by_chats([c["id"] for c in chats]),
+        )
 
         # Enriquecer chats com dados em cache
         enriched_chats = []
@@ -185,61 +164,44 @@ class ChatService:
         print(f"[OK] [ChatService] Encontrados {len(enriched_chats)} chats")
         return enriched_chats
 
-    def get_chat_messages(self, chat_id: str, user_id: str) -> List[Dict[str, Any]]:
+    async def get_chat_messages(self, chat_id: str, user_id: str) -> List[Dict[str, Any]]:
         """Buscar mensagens de um chat - método legado, usar get_chat_messages_paginated"""
-        return self.get_chat_messages_paginated(chat_id, user_id, page=1, limit=100)
+        return await self.get_chat_messages_paginated(chat_id, user_id, page=1, limit=100)
 
-    def get_chat_messages_paginated(self, chat_id: str, user_id: str, page: int = 1, limit: int = 20) -> List[Dict[str, Any]]:
+    async def get_chat_messages_paginated(self, chat_id: str, user_id: str, page: int = 1, limit: int = 20) -> List[Dict[str, Any]]:
         """Buscar mensagens de um chat com paginação super otimizada"""
         print(f"[ChatService] Buscando mensagens do chat: {chat_id}, página: {page}, limite: {limit}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
-        if not hasattr(self, '_chat_permissions_cache'):
-            self._chat_permissions_cache = {}
-
         cache_key = f"{chat_id}_{user_id}"
-        cached = self._chat_permissions_cache.get(cache_key)
-
-        # Verificação de permissão + stream de mensagens em paralelo (threading)
-        import threading
+        cached = await _chat_permissions_cache.get(cache_key)
 
+        # Verificação de permissão + stream de mensagens em paralelo (asyncio.gather)
         all_messages: List[Dict[str, Any]] = []
         permission_error = {"msg": None}
 
-        def fetch_messages():
-            messages_query = db.collection(self.messages_collection)\
-                .where(filter=FieldFilter("chat_id", "==", chat_id))\
-                .stream()
-            for doc in messages_query:
-                m = doc.to_dict()
-                m["_doc_id"] = doc.id
+        async def fetch_messages():
+            for m in await self.messages.query([("chat_id", "==", chat_id)]):
+                m["_doc_id"] = m["id"]
                 all_messages.append(m)
 
-        def verify_permission():
+        async def verify_permission():
             if cached:
                 return
-            chat_doc = db.collection(self.chats_collection).document(chat_id).get()
-            if not chat_doc.exists:
+            chat_data = await self.chats.get(chat_id)
+            if not chat_data:
                 permission_error["msg"] = "Chat não encontrado"
                 return
-            chat_data = chat_doc.to_dict()
             if user_id not in [chat_data["student_id"], chat_data["advertiser_id"]]:
                 permission_error["msg"] = "Você não tem permissão para ver este chat"
                 return
-            self._chat_permissions_cache[cache_key] = {
+            await _chat_permissions_cache.set(cache_key, {
                 'valid': True,
                 'timestamp': datetime.utcnow(),
                 'student_id': chat_data["student_id"],
                 'advertiser_id': chat_data["advertiser_id"]
-            }
+            })
 
-        t1 = threading.Thread(target=verify_permission)
-        t2 = threading.Thread(target=fetch_messages)
-        t1.start(); t2.start()
-        t1.join(); t2.join()
+        await asyncio.gather(verify_permission(), fetch_messages())
 
         if permission_error["msg"]:
             raise Exception(permission_error["msg"])
@@ -263,7 +225,7 @@ class ChatService:
                 message_ids_to_mark_read.append(doc_id)
 
         # Buscar nomes dos remetentes em batch
-        sender_names_cache = self._batch_fetch_sender_names(list(sender_ids))
+        sender_names_cache = await self._batch_fetch_sender_names(list(sender_ids))
 
         # Segunda passada: enriquecer mensagens
         enriched_messages = []
@@ -279,83 +241,53 @@ class ChatService:
         # Marcar mensagens como lidas em background (não bloquear resposta)
         if message_ids_to_mark_read:
             # Executar em background para não atrasar resposta
-            import threading
-            threading.Thread(
-                target=self._mark_specific_messages_as_read,
-                args=(message_ids_to_mark_read,),
-                daemon=True
-            ).start()
+            task = asyncio.create_task(self._mark_specific_messages_as_read(message_ids_to_mark_read))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
 
         print(f"[OK] [ChatService] Encontradas {len(enriched_messages)} mensagens")
         return enriched_messages
 
-    def _batch_fetch_sender_names(self, sender_ids: List[str]) -> Dict[str, str]:
+    async def _batch_fetch_sender_names(self, sender_ids: List[str]) -> Dict[str, str]:
         """Buscar nomes dos remetentes em batch via get_all (1 round-trip)"""
-        db = self._get_db()
-        names_cache: Dict[str, str] = {}
+        sender_ids = [sender_id for sender_id in sender_ids if sender_id]
 
-        if not hasattr(self, '_sender_names_cache'):
-            self._sender_names_cache = {}
-
-        # Verificar cache local primeiro
-        now = datetime.utcnow()
-        missing_ids = []
-        for sender_id in sender_ids:
-            if not sender_id:
-                continue
-            entry = self._sender_names_cache.get(sender_id)
-            if entry and (now - entry['timestamp']).seconds < 300:
-                names_cache[sender_id] = entry['name']
-            else:
-                missing_ids.append(sender_id)
+        # Verificar o cache compartilhado primeiro (invalidado quando o perfil muda)
+        names_cache: Dict[str, str] = await user_name_cache.get_many(sender_ids)
+        missing_ids = [sender_id for sender_id in sender_ids if sender_id not in names_cache]
 
         if not missing_ids:
             return names_cache
 
-        unique_ids = list(set(missing_ids))
-        refs = [db.collection(self.users_collection).document(uid) for uid in unique_ids]
-        for snap in db.get_all(refs):
-            if snap.exists:
-                data = snap.to_dict()
-                name = data.get("name") or data.get("company_name") or "Usuário"
-                names_cache[snap.id] = name
-                self._sender_names_cache[snap.id] = {'name': name, 'timestamp': now}
+        fetched = {user_id: display_name(data) for user_id, data in (await self.users.get_many(missing_ids)).items()}
+        await user_name_cache.set_many(fetched)
+        names_cache.update(fetched)
 
         return names_cache
 
-    def _enrich_chat_data(self, chat_data: Dict[str, Any], current_user_id: str) -> Dict[str, Any]:
+    async def _enrich_chat_data(self, chat_data: Dict[str, Any], current_user_id: str) -> Dict[str, Any]:
         """Enriquecer dados do chat com informações adicionais"""
-        db = self._get_db()
-
-        # Batch fetch: 1 property + 2 users em 1 round-trip via get_all
-        property_ref = db.collection(self.properties_collection).document(chat_data["property_id"])
-        student_ref = db.collection(self.users_collection).document(chat_data["student_id"])
-        advertiser_ref = db.collection(self.users_collection).document(chat_data["advertiser_id"])
-
-        snapshots = {snap.reference.path: snap for snap in db.get_all([property_ref, student_ref, advertiser_ref])}
+        # Batch fetch: 1 property + 2 users + mensagens do chat em paralelo
+        property_data, users_map, all_messages = await asyncio.gather(
+            self.properties.get(chat_data["property_id"]),
+            self.users.get_many([chat_data["student_id"], chat_data["advertiser_id"]]),
+            self.messages.query([("chat_id", "==", chat_data["id"])]),
+        )
 
-        property_snap = snapshots.get(property_ref.path)
-        if property_snap and property_snap.exists:
-            property_data = property_snap.to_dict()
+        if property_data:
             chat_data["property_title"] = property_data.get("title")
             chat_data["property_images"] = property_data.get("images", [])
             chat_data["property_price"] = property_data.get("price")
 
-        student_snap = snapshots.get(student_ref.path)
-        if student_snap and student_snap.exists:
-            chat_data["student_name"] = student_snap.to_dict().get("name")
+        student_data = users_map.get(chat_data["student_id"])
+        if student_data:
+            chat_data["student_name"] = student_data.get("name")
 
-        advertiser_snap = snapshots.get(advertiser_ref.path)
-        if advertiser_snap and advertiser_snap.exists:
-            advertiser_data = advertiser_snap.to_dict()
+        advertiser_data = users_map.get(chat_data["advertiser_id"])
+        if advertiser_data:
             chat_data["advertiser_name"] = advertiser_data.get("name") or advertiser_data.get("company_name")
 
         # Stream único de mensagens — order_by + != exigem índices compostos, calcula em Python
-        messages_query = db.collection(self.messages_collection)\
-            .where(filter=FieldFilter("chat_id", "==", chat_data["id"]))\
-            .stream()
-
-        all_messages = [doc.to_dict() for doc in messages_query]
 
         # Última mensagem por created_at desc
         last_message = None
@@ -379,90 +311,54 @@ class ChatService:
 
         return chat_data
 
-    def _enrich_message_data(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _enrich_message_data(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """Enriquecer dados da mensagem com informações do remetente"""
-        db = self._get_db()
-
         # Buscar informações do remetente
-        sender_doc = db.collection(self.users_collection).document(message_data["sender_id"]).get()
-        if sender_doc.exists:
-            sender_data = sender_doc.to_dict()
+        sender_data = await self.users.get(message_data["sender_id"])
+        if sender_data:
             message_data["sender_name"] = sender_data.get("name") or sender_data.get("company_name")
 
         return message_data
 
-    def _mark_messages_as_read(self, chat_id: str, user_id: str):
+    async def _mark_messages_as_read(self, chat_id: str, user_id: str):
         """Marcar mensagens como lidas"""
-        db = self._get_db()
-
         # Buscar mensagens não lidas do chat que não foram enviadas pelo usuário atual
-        messages_query = db.collection(self.messages_collection)\
-            .where(filter=FieldFilter("chat_id", "==", chat_id))\
-            .where(filter=FieldFilter("is_read", "==", False))\
-            .stream()
-
-        batch = db.batch()
-        for doc in messages_query:
-            message_data = doc.to_dict()
-            if message_data.get("sender_id") != user_id:
-                batch.update(doc.reference, {"is_read": True})
-
-        batch.commit()
-
-    def _mark_specific_messages_as_read(self, message_ids: List[str]):
+        unread_messages = await self.messages.query([
+            ("chat_id", "==", chat_id),
+            ("is_read", "==", False),
+        ])
+
+        await self.messages.batch_write([
+            ("update", message_data["id"], {"is_read": True})
+            for message_data in unread_messages
+            if message_data.get("sender_id") != user_id
+        ])
+
+    async def _mark_specific_messages_as_read(self, message_ids: List[str]):
         """Marcar mensagens específicas como lidas em batch"""
         if not message_ids:
             return
 
-        db = self._get_db()
-        batch = db.batch()
+        await self.messages.batch_write([
+            ("update", message_id, {"is_read": True})
+            for message_id in message_ids
+        ])
 
-        for message_id in message_ids:
-            message_ref = db.collection(self.messages_collection).document(message_id)
-            batch.update(message_ref, {"is_read": True})
-
-        batch.commit()
-
-    def _batch_fetch_properties(self, property_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    async def _batch_fetch_properties(self, property_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """Buscar propriedades em 1 round-trip via get_all"""
-        db = self._get_db()
-        cache: Dict[str, Dict[str, Any]] = {}
-        unique_ids = list({pid for pid in property_ids if pid})
-        if not unique_ids:
-            return cache
-
-        refs = [db.collection(self.properties_collection).document(pid) for pid in unique_ids]
-        for snap in db.get_all(refs):
-            if snap.exists:
-                cache[snap.id] = snap.to_dict()
-        return cache
-
-    def _batch_fetch_users(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return await self.properties.get_many(property_ids)
+
+    async def _batch_fetch_users(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """Buscar usuários em 1 round-trip via get_all"""
-        db = self._get_db()
-        cache: Dict[str, Dict[str, Any]] = {}
-        unique_ids = list({uid for uid in user_ids if uid})
-        if not unique_ids:
-            return cache
-
-        refs = [db.collection(self.users_collection).document(uid) for uid in unique_ids]
-        for snap in db.get_all(refs):
-            if snap.exists:
-                cache[snap.id] = snap.to_dict()
-        return cache
-
-    def _batch_fetch_messages_by_chats(self, chat_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        return await self.users.get_many(user_ids)
+
+    async def _batch_fetch_messages_by_chats(self, chat_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
         """Buscar mensagens de múltiplos chats em batch usando `in` (até 30 por query)"""
-        db = self._get_db()
         messages_by_chat: Dict[str, List[Dict[str, Any]]] = {cid: [] for cid in chat_ids}
 
         for i in range(0, len(chat_ids), 30):
             batch_ids = chat_ids[i:i + 30]
-            docs = db.collection(self.messages_collection)\
-                .where(filter=FieldFilter("chat_id", "in", batch_ids))\
-                .stream()
-            for doc in docs:
-                m = doc.to_dict()
+            for m in await self.messages.query([("chat_id", "in", batch_ids)]):
                 cid = m.get("chat_id")
                 if cid in messages_by_chat:
                     messages_by_chat[cid].append(m)
@@ -6,17 +6,26 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 import uuid
 
-from google.cloud.firestore_v1.base_query import FieldFilter
-from config.firebase_config import get_db
+from repositories.base import DocumentNotFoundError, Increment
+from repositories.factory import get_repository
 from models.listing import Listing, ListingCreate, ListingUpdate
+from utils.cache_backend import cache_namespace
+from utils.http_cache import document_etag
+from utils.response_cache import response_cache
+
+# Versão (ETag) dos listings já servidos, para responder 304 sem ler o banco
+_listing_versions = cache_namespace("listing_versions", ttl=300)
+# Campos que mudam sem alterar updated_at (contador de visualizações): ficam fora da
+# representação com ETag, senão um 304 certificaria um corpo que já não é o atual
+UNVERSIONED_FIELDS = {"views"}
 
 
 class ListingService:
     def __init__(self):
-        self.db = get_db()
-        self.collection = "listings"
+        self.listings = get_repository("listings")
+
     #Criar um novo listing
-    def create_listing(self, listing_data: ListingCreate, user_id: str) -> Listing:
+    async def create_listing(self, listing_data: ListingCreate, user_id: str) -> Listing:
         listing_id = str(uuid.uuid4())
         now = datetime.utcnow()
         
@@ -33,23 +42,34 @@ class ListingService:
         })
         
         # Salvar no Firestore
-        self.db.collection(self.collection).document(listing_id).set(listing_dict)
+        await self.listings.set(listing_id, listing_dict)
+        await response_cache.invalidate("listings")
         
         return Listing(**listing_dict)
 
-    def get_listing(self, listing_id: str) -> Optional[Listing]:
+    async def get_listing(self, listing_id: str) -> Optional[Listing]:
         """Buscar listing por ID"""
-        doc = self.db.collection(self.collection).document(listing_id).get()
+        data = await self.listings.get(listing_id)
         
-        if doc.exists:
-            data = doc.to_dict()
+        if data:
             # Incrementar visualizações
-            self.increment_views(listing_id)
+            await self.increment_views(listing_id)
             return Listing(**data)
         
         return None
 
-    def get_listings(
+    #ETag da versão atual do listing e registro no mapa de versões
+    async def get_listing_etag(self, listing: Listing) -> Optional[str]:
+        etag = document_etag(listing.model_dump(exclude=UNVERSIONED_FIELDS))
+        if etag:
+            await _listing_versions.set(listing.id, etag)
+        return etag
+
+    #ETag conhecido sem acessar o banco; None se desconhecido
+    async def get_cached_listing_etag(self, listing_id: str) -> Optional[str]:
+        return await _listing_versions.get(listing_id)
+
+    async def get_listings(
         self,
         page: int = 1,
         per_page: int = 10,
@@ -59,20 +79,20 @@ class ListingService:
         is_active: bool = True
     ) -> Dict[str, Any]:
       #Buscar listings com filtros e paginação
-        query = self.db.collection(self.collection)
+        query_filters = []
 
         if user_id:
-            query = query.where(filter=FieldFilter("user_id", "==", user_id))
+            query_filters.append(("user_id", "==", user_id))
         if property_type and property_type != "todos":
-            query = query.where(filter=FieldFilter("type", "==", property_type))
+            query_filters.append(("type", "==", property_type))
         if university:
-            query = query.where(filter=FieldFilter("university", "==", university))
+            query_filters.append(("university", "==", university))
         if is_active is not None:
-            query = query.where(filter=FieldFilter("is_active", "==", is_active))
+            query_filters.append(("is_active", "==", is_active))
 
         # Busca única — ordena em Python (evita índice composto no Firestore)
-        all_docs = list(query.stream())
-        all_listings = [Listing(**doc.to_dict()) for doc in all_docs]
+        all_docs = await self.listings.query(query_filters)
+        all_listings = [Listing(**doc) for doc in all_docs]
         all_listings.sort(key=lambda x: x.created_at or datetime.min, reverse=True)
 
         total_docs = len(all_listings)
@@ -88,15 +108,12 @@ class ListingService:
             "total_pages": total_pages
         }
         #Atualizar listing
-    def update_listing(self, listing_id: str, listing_data: ListingUpdate, user_id: str) -> Optional[Listing]:
-        doc_ref = self.db.collection(self.collection).document(listing_id)
-        doc = doc_ref.get()
+    async def update_listing(self, listing_id: str, listing_data: ListingUpdate, user_id: str) -> Optional[Listing]:
+        current_data = await self.listings.get(listing_id)
         
-        if not doc.exists:
+        if not current_data:
             return None
         
-        current_data = doc.to_dict()
-        
         # Verificar se o usuário é o dono
         if current_data.get("user_id") != user_id:
             raise PermissionError("Usuário não tem permissão para editar este listing")
@@ -105,58 +122,53 @@ class ListingService:
         update_data = listing_data.model_dump(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow()
         
-        doc_ref.update(update_data)
+        await self.listings.update(listing_id, update_data)
+        await _listing_versions.delete(listing_id)
+        await response_cache.invalidate("listings")
         
         # Buscar dados atualizados
-        updated_doc = doc_ref.get()
-        return Listing(**updated_doc.to_dict())
+        updated_data = await self.listings.get(listing_id)
+        return Listing(**updated_data)
        #Deletar listing (soft delete)"""
-    def delete_listing(self, listing_id: str, user_id: str) -> bool:
-        doc_ref = self.db.collection(self.collection).document(listing_id)
-        doc = doc_ref.get()
+    async def delete_listing(self, listing_id: str, user_id: str) -> bool:
+        current_data = await self.listings.get(listing_id)
         
-        if not doc.exists:
+        if not current_data:
             return False
         
-        current_data = doc.to_dict()
-        
         # Verificar se o usuário é o dono
         if current_data.get("user_id") != user_id:
             raise PermissionError("Usuário não tem permissão para deletar este listing")
         
         # Soft delete
-        doc_ref.update({
+        await self.listings.update(listing_id, {
             "is_active": False,
             "updated_at": datetime.utcnow()
         })
+        await _listing_versions.delete(listing_id)
+        await response_cache.invalidate("listings")
         
         return True
-    #Incrementar número de visualizações
-    def increment_views(self, listing_id: str) -> bool:
-        doc_ref = self.db.collection(self.collection).document(listing_id)
-        doc = doc_ref.get()
-        
-        if doc.exists:
-            current_views = doc.to_dict().get("views", 0)
-            doc_ref.update({
-                "views": current_views + 1,
-                "updated_at": datetime.utcnow()
-            })
-            return True
-        
-        return False
-
-    def search_listings(self, search_term: str, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
+    #Incrementar número de visualizações (incremento atômico, sem leitura prévia)
+    # Não altera updated_at: "views" fica fora do detalhe com ETag (UNVERSIONED_FIELDS)
+    async def increment_views(self, listing_id: str) -> bool:
+        try:
+            await self.listings.update(listing_id, {"views": Increment(1)})
+        except DocumentNotFoundError:
+            return False
+        return True
+
+    async def search_listings(self, search_term: str, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
         #Buscar listings por termo
-        query = self.db.collection(self.collection)
+        query_filters = []
 
         if search_term:
-            query = query.where(filter=FieldFilter("title", ">=", search_term))
-            query = query.where(filter=FieldFilter("title", "<=", search_term + "\uf8ff"))
+            query_filters.append(("title", ">=", search_term))
+            query_filters.append(("title", "<=", search_term + "\uf8ff"))
 
         # is_active filtrado em Python — combinar equality + range em campos distintos exige índice composto
-        all_docs = list(query.stream())
-        all_listings = [Listing(**doc.to_dict()) for doc in all_docs if doc.to_dict().get("is_active", True)]
+        all_docs = await self.listings.query(query_filters)
+        all_listings = [Listing(**doc) for doc in all_docs if doc.get("is_active", True)]
         all_listings.sort(key=lambda x: x.views or 0, reverse=True)
 
         total_docs = len(all_listings)
@@ -172,36 +184,36 @@ class ListingService:
             "total_pages": total_pages
         }
 
-    def update_photos(self, listing_id: str, photo_urls: List[str], user_id: str) -> bool:
+    async def update_photos(self, listing_id: str, photo_urls: List[str], user_id: str) -> bool:
         """Atualizar URLs das fotos do listing"""
-        doc_ref = self.db.collection(self.collection).document(listing_id)
-        doc = doc_ref.get()
+        current_data = await self.listings.get(listing_id)
         
-        if not doc.exists:
+        if not current_data:
             return False
         
-        current_data = doc.to_dict()
-        
         # Verificar se o usuário é o dono
         if current_data.get("user_id") != user_id:
             raise PermissionError("Usuário não tem permissão para editar este listing")
         
-        doc_ref.update({
+        await self.listings.update(listing_id, {
             "photos": photo_urls,
             "updated_at": datetime.utcnow()
         })
+        await _listing_versions.delete(listing_id)
+        await response_cache.invalidate("listings")
         
         return True
 
-    def get_listings_by_university(self, university: str, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
+    async def get_listings_by_university(self, university: str, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
         """Buscar listings por universidade"""
-        query = self.db.collection(self.collection)
-        query = query.where(filter=FieldFilter("university", "==", university))
-        query = query.where(filter=FieldFilter("is_active", "==", True))
+        query_filters = [
+            ("university", "==", university),
+            ("is_active", "==", True),
+        ]
 
         # Busca única — ordena em Python (evita índice composto no Firestore)
-        all_docs = list(query.stream())
-        all_listings = [Listing(**doc.to_dict()) for doc in all_docs]
+        all_docs = await self.listings.query(query_filters)
+        all_listings = [Listing(**doc) for doc in all_docs]
         all_listings.sort(key=lambda x: x.created_at or datetime.min, reverse=True)
 
         total_docs = len(all_listings)
@@ -1,60 +1,125 @@
-
 import logging
-from typing import Union, Optional
-from google.cloud.firestore_v1.base_query import FieldFilter
-from config.firebase_config import get_db
+from typing import Union, Optional, Dict, Any
+from repositories.factory import get_repository
 from models.profile import (StudentProfile,AdvertiserProfile,)
+from services.reservation_snapshots import reservation_snapshots
+from utils.cache_backend import cache_namespace
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Campos do perfil copiados para as reservas
+USER_DISPLAY_FIELDS = ("name", "company_name", "email")
+
 # uniao para representar qualquer um dos perfis de usuario
 UserProfile = Union[StudentProfile, AdvertiserProfile]
 
+# Documentos de usuário por ID e nome de exibição (usado pelo chat), compartilhados
+# entre os workers e invalidados em toda escrita no perfil
+profile_cache = cache_namespace("profiles", ttl=300)
+user_name_cache = cache_namespace("user_names", ttl=300)
+# firebase_uid -> ID do documento: com ele, um miss no perfil vira leitura direta em vez de query
+uid_to_user_id_cache = cache_namespace("uid_to_user_id", ttl=3600)
+
+
+def display_name(user_data: Dict[str, Any]) -> str:
+    return user_data.get("name") or user_data.get("company_name") or "Usuário"
+
+
+#Descarta o perfil e o nome em cache do usuário (em todos os workers)
+async def invalidate_user_cache(user_id: str, firebase_uid: Optional[str] = None) -> None:
+    await profile_cache.delete(user_id)
+    await user_name_cache.delete(user_id)
+    if firebase_uid:
+        await uid_to_user_id_cache.delete(firebase_uid)
+
 class ProfileService:
     def __init__(self):
-        self.db = get_db()
-        if self.db:
-            self.collection = self.db.collection("users")
-        else:
-            logger.error("Falha ao inicializar o banco de dados Firestore.")
-            self.collection = None
-
-    def _get_db(self):
-        return self.db
+        self.users = get_repository("users")
+
+        #Converte o documento do Firestore no modelo Pydantic correspondente ao 'user_type'
+    def _to_profile(self, user_data: Dict[str, Any]) -> Optional[UserProfile]:
+        if user_data.get("user_type") == "student":
+            return StudentProfile(**user_data)
+        elif user_data.get("user_type") == "advertiser":
+            return AdvertiserProfile(**user_data)
+        return None
+
         #Busca um usuário pelo email no Firestore
-    def get_user_by_email(self, email: str) -> Optional[UserProfile]:
-        if not self.collection:
-            return None
+    async def get_user_by_email(self, email: str) -> Optional[UserProfile]:
         try:
-            query = self.collection.where(filter=FieldFilter("email", "==", email)).limit(1)
-            docs = query.stream()
-            for doc in docs:
-                user_data = doc.to_dict()
+            docs = await self.users.query([("email", "==", email)], limit=1)
+            for user_data in docs:
                 # Decide qual modelo Pydantic usar com base no campo 'user_type'
-                if user_data.get("user_type") == "student":
-                    return StudentProfile(**user_data)
-                elif user_data.get("user_type") == "advertiser":
-                    return AdvertiserProfile(**user_data)
+                return self._to_profile(user_data)
             return None
         except Exception as e:
             logger.error(f"Erro ao buscar usuário por email '{email}': {e}")
             return None
-        #Busca um usuário pelo Firebase UID
-    def get_user_by_firebase_uid(self, firebase_uid: str) -> Optional[UserProfile]:
-        if not self.collection:
-            return None
+        #Busca um usuário pelo Firebase UID (usado em toda requisição autenticada)
+    async def get_user_by_firebase_uid(self, firebase_uid: str) -> Optional[UserProfile]:
         try:
-            query = self.collection.where(filter=FieldFilter("firebase_uid", "==", firebase_uid)).limit(1)
-            docs = query.stream()
-            for doc in docs:
-                user_data = doc.to_dict()
-                if user_data.get("user_type") == "student":
-                    return StudentProfile(**user_data)
-                elif user_data.get("user_type") == "advertiser":
-                    return AdvertiserProfile(**user_data)
+            user_data = await self._get_user_data_by_firebase_uid(firebase_uid)
+            if user_data:
+                return self._to_profile(user_data)
             return None
         except Exception as e:
             logger.error(f"Erro ao buscar usuário por Firebase UID '{firebase_uid}': {e}")
-            return None
\ No newline at end of file
+            return None
+
+        #Documento do usuário pelo UID: cache -> leitura direta pelo ID mapeado -> query
+    async def _get_user_data_by_firebase_uid(self, firebase_uid: str) -> Optional[Dict[str, Any]]:
+        user_id = await uid_to_user_id_cache.get(firebase_uid)
+        if user_id:
+            user_data = await self._get_user_data(user_id)
+            if user_data and user_data.get("firebase_uid") == firebase_uid:
+                return user_data
+            # Mapeamento obsoleto (conta removida/recriada): refaz pela query
+            await uid_to_user_id_cache.delete(firebase_uid)
+
+        docs = await self.users.query([("firebase_uid", "==", firebase_uid)], limit=1)
+        if not docs:
+            return None
+        user_data = docs[0]
+        await uid_to_user_id_cache.set(firebase_uid, user_data["id"])
+        await profile_cache.set(user_data["id"], user_data)
+        return user_data
+
+        #Documento do usuário pelo ID (cache compartilhado antes do banco)
+    async def _get_user_data(self, user_id: str) -> Optional[Dict[str, Any]]:
+        user_data = await profile_cache.get(user_id)
+        if user_data is None:
+            user_data = await self.users.get(user_id)
+            if user_data:
+                await profile_cache.set(user_id, user_data)
+        return user_data
+
+        #Busca um usuário pelo ID do documento
+    async def get_user_by_id(self, user_id: str) -> Optional[UserProfile]:
+        try:
+            user_data = await self._get_user_data(user_id)
+            if user_data:
+                return self._to_profile(user_data)
+            return None
+        except Exception as e:
+            logger.error(f"Erro ao buscar usuário por ID '{user_id}': {e}")
+            return None
+        #Salva o documento completo de um usuário
+    async def save_user(self, user_id: str, user_data: Dict[str, Any]) -> None:
+        await self.users.set(user_id, user_data)
+        await invalidate_user_cache(user_id)
+        await reservation_snapshots.sync_user(user_id, user_data)
+        #Atualiza campos do usuário e retorna o documento atualizado
+    async def update_user(self, user_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        await self.users.update(user_id, update_data)
+        await invalidate_user_cache(user_id)
+        updated = await self.users.get(user_id)
+        # Nome/email aparecem nas reservas do usuário (campos denormalizados)
+        if updated and any(field in update_data for field in USER_DISPLAY_FIELDS):
+            await reservation_snapshots.sync_user(user_id, updated)
+        return updated
+        #Remove o documento do usuário
+    async def delete_user(self, user_id: str, firebase_uid: Optional[str] = None) -> None:
+        await self.users.delete(user_id)
+        await invalidate_user_cache(user_id, firebase_uid)
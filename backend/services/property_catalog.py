@@ -0,0 +1,246 @@
+"""
+Catálogo em memória das propriedades ativas (um por worker).
+
+Carregado no startup (lifespan) e mantido atualizado pelas notificações do
+repositório — ``on_snapshot`` no Firestore — para que as listagens e buscas
+anônimas filtrem, ordenem e paginem sem nenhuma leitura no banco.
+
+Cada propriedade recebe um ordinal; para os campos de ``BITMAP_FIELDS`` o
+catálogo mantém, por valor, um bitset (int do Python) dos ordinais que o têm.
+Filtros de igualdade e de comodidades ("tem todas") viram interseções de
+bitsets, e as facetas são contagens de bits contra o bitset do resultado. A busca textual usa o
+índice invertido de ``services.search_index``, atualizado junto com o catálogo.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from repositories.base import (
+    BaseRepository,
+    DocumentChange,
+    QueryFilter,
+    QueryOrder,
+    matches_filter,
+    order_documents,
+    paginate,
+)
+from services.search_index import InvertedIndex
+
+
+# Campos indexados em bitmap: valor escalar (==) ou itens de lista (array_contains*)
+BITMAP_FIELDS = ("amenities", "type", "university")
+BITMAP_OPERATORS = ("==", "array_contains", "array_contains_all")
+# Ordenação por relevância textual (campo virtual preenchido pela busca)
+RELEVANCE_ORDER: List[QueryOrder] = [("_score", "desc")]
+# Faixas de preço das facetas (mesmos ids do FilterBar): (rótulo, limite superior inclusivo)
+PRICE_BUCKETS = (("ate-500", 500), ("500-800", 800), ("800-1200", 1200), ("acima-1200", None))
+# Quantidade de comodidades devolvidas na faceta
+TOP_AMENITIES = 10
+
+
+def price_bucket(price: Any) -> Optional[str]:
+    if not isinstance(price, (int, float)):
+        return None
+    for label, upper in PRICE_BUCKETS:
+        if upper is None or price <= upper:
+            return label
+    return None
+
+
+class PropertyCatalog:
+    def __init__(self):
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._ordinals: Dict[str, int] = {}
+        self._free_ordinals: List[int] = []
+        # (campo, valor) -> bitset de ordinais
+        self._bitmaps: Dict[Tuple[str, Any], int] = {}
+        self._text_index = InvertedIndex()
+        # Índices secundários ordenados, um por ordenação pedida; refeitos sob demanda após mudanças
+        self._sorted: Dict[Tuple[QueryOrder, ...], List[Dict[str, Any]]] = {}
+        # O listener do Firestore roda em outra thread
+        self._lock = threading.RLock()
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        self.ready = False
+
+        #Carrega as propriedades ativas e passa a ouvir as mudanças da coleção
+    async def start(self, repository: BaseRepository) -> None:
+        started = time.perf_counter()
+        documents = await repository.query()
+        with self._lock:
+            self._documents = {}
+            self._ordinals = {}
+            self._free_ordinals = []
+            self._bitmaps = {}
+            self._text_index = InvertedIndex()
+            self._sorted = {}
+            for document in documents:
+                self._store(document["id"], document)
+        # O snapshot inicial do Firestore reentrega tudo, cobrindo escritas feitas durante a carga
+        self._unsubscribe = repository.watch(self.apply_changes)
+        self.ready = True
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"[PropertyCatalog] {len(self._documents)} propriedades carregadas em {elapsed:.0f}ms")
+
+    def stop(self) -> None:
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+        self.ready = False
+
+    def apply_changes(self, changes: List[DocumentChange]) -> None:
+        with self._lock:
+            for doc_id, document in changes:
+                self._store(doc_id, document)
+            self._sorted = {}
+
+    def contains(self, doc_id: str) -> bool:
+        with self._lock:
+            return doc_id in self._documents
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            document = self._documents.get(doc_id)
+        return dict(document) if document is not None else None
+
+    def _store(self, doc_id: str, document: Optional[Dict[str, Any]]) -> None:
+        previous = self._documents.pop(doc_id, None)
+        if previous is not None:
+            self._unindex(doc_id, previous)
+            self._text_index.remove(doc_id)
+        if document is not None and document.get("is_active") is not False:
+            self._documents[doc_id] = document
+            self._index(doc_id, document)
+            self._text_index.add(doc_id, document)
+
+    @staticmethod
+    def _bitmap_keys(document: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        keys = []
+        for field in BITMAP_FIELDS:
+            value = document.get(field)
+            for item in (value if isinstance(value, list) else [value]):
+                if item is not None:
+                    keys.append((field, item))
+        return list(dict.fromkeys(keys))
+
+    def _index(self, doc_id: str, document: Dict[str, Any]) -> None:
+        if self._free_ordinals:
+            ordinal = self._free_ordinals.pop()
+        else:
+            ordinal = len(self._ordinals) + len(self._free_ordinals)
+        self._ordinals[doc_id] = ordinal
+        bit = 1 << ordinal
+        for key in self._bitmap_keys(document):
+            self._bitmaps[key] = self._bitmaps.get(key, 0) | bit
+
+    def _unindex(self, doc_id: str, document: Dict[str, Any]) -> None:
+        ordinal = self._ordinals.pop(doc_id)
+        self._free_ordinals.append(ordinal)
+        bit = 1 << ordinal
+        for key in self._bitmap_keys(document):
+            remaining = self._bitmaps.get(key, 0) & ~bit
+            if remaining:
+                self._bitmaps[key] = remaining
+            else:
+                self._bitmaps.pop(key, None)
+
+    def _resolve_bitmaps(self, filters: Optional[List[QueryFilter]]) -> Tuple[Optional[int], List[QueryFilter]]:
+        """Interseção dos filtros indexáveis; devolve (bitset ou None, filtros restantes)."""
+        mask: Optional[int] = None
+        remaining = []
+        for field, op, value in filters or []:
+            if field not in BITMAP_FIELDS or op not in BITMAP_OPERATORS:
+                remaining.append((field, op, value))
+                continue
+            for item in (value if op == "array_contains_all" else [value]):
+                bitmap = self._bitmaps.get((field, item), 0)
+                mask = bitmap if mask is None else mask & bitmap
+        return mask, remaining
+
+    def _ordered(self, order_by: Optional[List[QueryOrder]]) -> List[Dict[str, Any]]:
+        key = tuple(order_by or [])
+        with self._lock:
+            ordered = self._sorted.get(key)
+            if ordered is None:
+                ordered = order_documents(list(self._documents.values()), order_by)
+                self._sorted[key] = ordered
+        return ordered
+
+    def _matching(
+        self,
+        filters: Optional[List[QueryFilter]],
+        order_by: Optional[List[QueryOrder]],
+        text: Optional[str],
+        exclude_ids: Optional[Set[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, int]]]:
+        """Documentos que atendem aos filtros (e à busca textual), ordenados, e as facetas do conjunto."""
+        with self._lock:
+            mask, remaining = self._resolve_bitmaps(filters)
+            ordinals = self._ordinals
+            if text is not None:
+                # Cópias com a pontuação em "_score", usada na ordenação e no cursor
+                candidates = [
+                    dict(self._documents[doc_id], _score=score)
+                    for doc_id, score in self._text_index.search(text).items()
+                    if mask is None or mask >> ordinals[doc_id] & 1
+                ]
+            else:
+                candidates = self._ordered(order_by)
+                if mask is not None:
+                    candidates = [d for d in candidates if mask >> ordinals[d["id"]] & 1]
+            if exclude_ids:
+                candidates = [d for d in candidates if d["id"] not in exclude_ids]
+            matched = [d for d in candidates if all(matches_filter(d, f) for f in remaining)]
+            facets = self._facets(matched)
+        if text is not None:
+            matched = order_documents(matched, order_by)
+        return matched, facets
+
+    def _facets(self, matched: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        # Bitset do resultado montado em O(n) via bytearray
+        bits = bytearray((len(self._ordinals) + len(self._free_ordinals) + 7) // 8)
+        price_ranges = {label: 0 for label, _ in PRICE_BUCKETS}
+        for document in matched:
+            ordinal = self._ordinals[document["id"]]
+            bits[ordinal >> 3] |= 1 << (ordinal & 7)
+            label = price_bucket(document.get("price"))
+            if label:
+                price_ranges[label] += 1
+        matched_mask = int.from_bytes(bits, "little")
+
+        counts: Dict[str, Dict[str, int]] = {field: {} for field in BITMAP_FIELDS}
+        for (field, value), bitmap in self._bitmaps.items():
+            total = (bitmap & matched_mask).bit_count()
+            if total:
+                counts[field][value] = total
+        top_amenities = sorted(counts["amenities"].items(), key=lambda item: (-item[1], item[0]))[:TOP_AMENITIES]
+        return {
+            "types": counts["type"],
+            "price_ranges": price_ranges,
+            "universities": counts["university"],
+            "amenities": dict(top_amenities),
+        }
+
+        #Filtra, ordena e pagina da memória; devolve (página, total exato, facetas).
+        #Com "text", só entram os documentos que casam com a busca (ordem padrão: relevância);
+        #"exclude_ids" remove propriedades específicas (ex.: ocupadas no período pedido)
+    async def find(
+        self,
+        filters: Optional[List[QueryFilter]] = None,
+        order_by: Optional[List[QueryOrder]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        start_after: Optional[List[Any]] = None,
+        text: Optional[str] = None,
+        exclude_ids: Optional[Set[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int, Dict[str, Dict[str, int]]]:
+        if text is not None and not order_by:
+            order_by = RELEVANCE_ORDER
+        matched, facets = self._matching(filters, order_by, text, exclude_ids)
+        page = paginate(matched, limit, offset, order_by, start_after)
+        # Cópia rasa: o serviço marca "is_favorited" por usuário em cada resultado
+        return [dict(document) for document in page], len(matched), facets
+
+
+# Instância única por processo (worker do uvicorn)
+property_catalog = PropertyCatalog()
@@ -1,31 +1,79 @@
 
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+import asyncio
+from typing import Optional, Dict, Any, List, Set, Tuple
+from datetime import date, datetime
 import uuid
-from google.cloud import firestore
-from google.cloud.firestore_v1.base_query import FieldFilter
-from config.firebase_config import get_db
+from repositories.base import (
+    EQUALITY_OPERATORS,
+    ArrayRemove,
+    ArrayUnion,
+    DocumentNotFoundError,
+    QueryFilter,
+    QueryOrder,
+    normalize_value,
+    paginate,
+)
+from repositories.factory import get_repository
 from models.property import Property, PropertyCreate, PropertyUpdate
+from services.profile_service import profile_cache, uid_to_user_id_cache
+from services.property_catalog import RELEVANCE_ORDER, property_catalog
+from services.reservation_index import reservation_index
+from services.reservation_snapshots import PROPERTY_FIELDS, reservation_snapshots
+from services.search_index import SEARCH_FIELDS, query_terms, search_terms
+from utils.distance_utils import parse_distance_meters
+from utils.http_cache import document_etag
+from utils.cache_backend import cache_namespace
+from utils.pagination import decode_cursor, split_page
+from utils.reservation_utils import ReservationStatus, day_filters, reservation_dates
+from utils.response_cache import response_cache
+
+
+# Ordenação de cada opção de FilterState.sort_by; o ID do documento é o desempate final.
+# "relevancia" mantém a ordem padrão (mais recentes) enquanto não há termo de busca.
+SORT_ORDERS: Dict[str, List[QueryOrder]] = {
+    "relevancia": [("created_at", "desc")],
+    "mais-recente": [("created_at", "desc")],
+    "menor-preco": [("price", "asc")],
+    "maior-preco": [("price", "desc")],
+    "melhor-avaliado": [("rating", "desc"), ("created_at", "desc")],
+    "mais-proximo": [("distance_meters", "asc")],
+    "distance": [("distance_meters", "asc")],
+}
+# Ordenações por proximidade: anúncios sem distância reconhecida ficam de fora
+# (o null ordenaria antes de qualquer número, no Firestore e nos backends locais)
+PROXIMITY_SORTS = ("mais-proximo", "distance")
+# O catálogo só guarda as propriedades ativas; nas consultas ao banco o mesmo recorte vira filtro
+# (propriedades antigas sem o campo recebem is_active=True no backfill)
+ACTIVE_FILTER: QueryFilter = ("is_active", "==", True)
+
+
+# Favoritos por usuário (id do documento), invalidados no toggle
+_favorites_cache = cache_namespace("favorites", ttl=300)
+# Documentos de propriedades lidos por ID (detalhe, ETag, favoritos), invalidados nas escritas
+_property_cache = cache_namespace("properties", ttl=300)
 
 
 class PropertyService:
     def __init__(self):
-        self.db = None
-        self.collection = "properties"
-
-    def _get_db(self):
-        if self.db is None:
-            self.db = get_db()
-        return self.db
+        self.properties = get_repository("properties")
+        self.users = get_repository("users")
+        self.reservations = get_repository("reservations")
+
+        #Reflete a escrita no catálogo/índice de busca deste worker sem esperar o listener
+        # e descarta as respostas de listagem/busca em cache; com "display_changed",
+        # propaga título/tipo/local/imagens para as reservas da propriedade
+    async def _sync_catalog(self, property_id: str, property_data: Optional[Dict[str, Any]], display_changed: bool = False) -> None:
+        await _property_cache.delete(property_id)
+        await response_cache.invalidate("properties")
+        if property_catalog.ready:
+            property_catalog.apply_changes([(property_id, normalize_value(property_data) if property_data else None)])
+        if display_changed and property_data:
+            await reservation_snapshots.sync_property(property_id, property_data)
     
         #Criar nova propriedade
-    def create_property(self, property_data: PropertyCreate, owner_id: str) -> Dict[str, Any]:
+    async def create_property(self, property_data: PropertyCreate, owner_id: str) -> Dict[str, Any]:
         print(f"[PropertyService] Criando propriedade para owner: {owner_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
         property_id = str(uuid.uuid4())
         now = datetime.utcnow()
 
@@ -38,6 +86,8 @@ class PropertyService:
             "location": property_data.location,
             "university": property_data.university,
             "distance": property_data.distance,
+            # Versão numérica de "distance" para filtrar/ordenar por proximidade
+            "distance_meters": parse_distance_meters(property_data.distance),
             "images": [],  # Inicia com a lista de imagens vazia
             "amenities": property_data.amenities,
             "capacity": property_data.capacity,
@@ -48,90 +98,134 @@ class PropertyService:
             "updated_at": now,
             "is_active": True
         }
+        # Termos sem acento para a busca quando o catálogo em memória está desligado
+        property_dict["search_terms"] = search_terms(property_dict)
 
         # Salvar no Firestore
-        db.collection(self.collection).document(property_id).set(property_dict)
+        await self.properties.set(property_id, property_dict)
+        await self._sync_catalog(property_id, property_dict)
 
         print(f"[PropertyService] Propriedade criada: {property_id}")
         return property_dict
         #Adiciona URLs de imagens a uma propriedade existente
-    def add_images_to_property(self, property_id: str, image_urls: list, user_id: str) -> Dict[str, Any]:
+    async def add_images_to_property(self, property_id: str, image_urls: list, user_id: str) -> Dict[str, Any]:
         print(f"[PropertyService] Adicionando imagens à propriedade {property_id}")
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-        
-        doc_ref = db.collection(self.collection).document(property_id)
-        doc = doc_ref.get()
+        property_data = await self.properties.get(property_id)
 
-        if not doc.exists:
+        if not property_data:
             print(f"[PropertyService] Propriedade {property_id} não encontrada ao adicionar imagens")
             return None
         
-        property_data = doc.to_dict()
         if property_data.get('owner_id') != user_id:
             raise Exception("Você não tem permissão para editar esta propriedade")
 
-        doc_ref.update({
-            'images': firestore.ArrayUnion(image_urls),
+        await self.properties.update(property_id, {
+            'images': ArrayUnion(image_urls),
             'updated_at': datetime.utcnow()
         })
 
-        updated_doc = doc_ref.get()
+        result = await self.properties.get(property_id)
+        await self._sync_catalog(property_id, result, display_changed=True)
         print(f"[OK] [PropertyService] Imagens adicionadas com sucesso à propriedade {property_id}")
-        result = updated_doc.to_dict()
-        result["id"] = updated_doc.id
         return result
     
-        #Buscar propriedade por ID
-    def get_property_by_id(self, property_id: str) -> Optional[Dict[str, Any]]:
+        #Buscar propriedade por ID (catálogo em memória ou cache compartilhado antes do banco)
+    async def get_property_by_id(self, property_id: str) -> Optional[Dict[str, Any]]:
         print(f"[PropertyService] Buscando propriedade: {property_id}")
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-        doc = db.collection(self.collection).document(property_id).get()
-        if doc.exists:
+        prop_data = property_catalog.get(property_id) if property_catalog.ready else None
+        if prop_data is None:
+            prop_data = await _property_cache.get(property_id)
+        if prop_data is None:
+            prop_data = await self.properties.get(property_id)
+            if prop_data:
+                await _property_cache.set(property_id, prop_data)
+        if prop_data:
             print("[OK] [PropertyService] Propriedade encontrada")
-            prop_data = doc.to_dict()
-            prop_data["id"] = doc.id  # Adicionar o ID do documento
             return prop_data
         print("[PropertyService] Propriedade não encontrada")
         return None
     
-        #Listar propriedades com paginação e filtros
-    def get_properties(self, owner_id: str = None, page: int = 1, per_page: int = 10, filters=None, current_user_id: str = None) -> Dict[str, Any]:
-        print(f"[PropertyService] Listando propriedades - Owner: {owner_id}, Page: {page}")
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-        query = db.collection(self.collection)
+        #Listar propriedades com paginação por cursor (keyset) e filtros
+    async def get_properties(self, owner_id: str = None, page: int = 1, per_page: int = 10, filters=None, current_user_id: str = None, cursor: str = None) -> Dict[str, Any]:
+        print(f"[PropertyService] Listando propriedades - Owner: {owner_id}, Page: {page}, Cursor: {bool(cursor)}")
+        query_filters = []
         if owner_id:
-            query = query.where(filter=FieldFilter("owner_id", "==", owner_id))
+            query_filters.append(("owner_id", "==", owner_id))
         if filters:
             if filters.property_type:
-                query = query.where(filter=FieldFilter("type", "==", filters.property_type))
+                query_filters.append(("type", "==", filters.property_type))
             if filters.max_price:
-                query = query.where(filter=FieldFilter("price", "<=", filters.max_price))
+                query_filters.append(("price", "<=", filters.max_price))
             if filters.location:
-                query = query.where(filter=FieldFilter("location", ">=", filters.location)).where(filter=FieldFilter("location", "<=", filters.location + "\uf8ff"))
-        
-        try:
-            all_docs = list(query.stream())
-            total_docs = len(all_docs)
-        except Exception:
-            total_docs = 0
-            all_docs = []
-
-        offset = (page - 1) * per_page
-        properties = []
-        for doc in all_docs[offset:offset + per_page]:
-            prop_data = doc.to_dict()
-            prop_data["id"] = doc.id  # Adicionar o ID do documento
-            properties.append(prop_data)
+                query_filters.append(("location", ">=", filters.location))
+                query_filters.append(("location", "<=", filters.location + "\uf8ff"))
+            if filters.max_distance:
+                query_filters.append(("distance_meters", "<=", filters.max_distance))
+            if filters.amenities:
+                # Todas as comodidades pedidas (não "qualquer uma")
+                query_filters.append(("amenities", "array_contains_all", list(filters.amenities)))
+
+        search_term = filters.search_term.strip() if filters and filters.search_term else ""
+        use_text_index = bool(search_term) and property_catalog.ready
+        if search_term and not use_text_index:
+            # Sem o catálogo não há índice textual: filtra pelos termos gravados no documento
+            query_filters.append(self._search_terms_filter(search_term))
+
+        sort_by = filters.sort_by if filters else None
+        if sort_by in PROXIMITY_SORTS:
+            query_filters.append(("distance_meters", "!=", None))
+        if use_text_index and (sort_by or "relevancia") == "relevancia":
+            order_by = list(RELEVANCE_ORDER)
+        else:
+            order_by = self._build_order_by(query_filters, sort_by)
+
+        # O cursor tem prioridade; sem ele, "page" vira um offset (compatibilidade)
+        start_after = decode_cursor(cursor, order_by) if cursor else None
+        offset = None if start_after else (page - 1) * per_page
+
+        busy_ids = None
+        if filters and filters.start_date and filters.end_date:
+            busy_ids = await self._busy_property_ids(filters.start_date, filters.end_date)
+
+        # Um documento a mais que a página: só existe next_cursor se houver continuação
+        if property_catalog.ready:
+            # Página, total exato e facetas na mesma passada sobre o catálogo
+            properties, total_docs, facets = await property_catalog.find(
+                query_filters,
+                order_by=order_by,
+                limit=per_page + 1,
+                offset=offset,
+                start_after=start_after,
+                text=search_term or None,
+                exclude_ids=busy_ids,
+            )
+        elif busy_ids:
+            # As ocupadas não viram filtro do Firestore (not-in aceita poucos valores):
+            # saem em Python e a paginação é feita sobre o restante
+            facets = None
+            candidates = await self.properties.query([*query_filters, ACTIVE_FILTER], order_by=order_by)
+            available = [property_data for property_data in candidates if property_data["id"] not in busy_ids]
+            total_docs = len(available)
+            properties = paginate(available, per_page + 1, offset, order_by, start_after)
+        else:
+            facets = None
+            active_filters = [*query_filters, ACTIVE_FILTER]
+            total_docs = await self.properties.count(active_filters, order_by=order_by)
+            properties = await self.properties.query(
+                active_filters,
+                order_by=order_by,
+                limit=per_page + 1,
+                offset=offset,
+                start_after=start_after,
+            )
+
+        properties, next_cursor = split_page(properties, per_page, order_by)
+        for property_data in properties:
+            property_data.pop("_score", None)
 
         # Se temos um usuário logado, verificar favoritos
         if current_user_id:
-            user_favorites = self._get_user_favorites(current_user_id)
+            user_favorites = await self._get_user_favorites(current_user_id)
             for property_data in properties:
                 property_data["is_favorited"] = property_data["id"] in user_favorites
 
@@ -139,52 +233,88 @@ class PropertyService:
 
         result = {
             "properties": properties, "total": total_docs, "page": page,
-            "per_page": per_page, "total_pages": total_pages
+            "per_page": per_page, "total_pages": total_pages, "next_cursor": next_cursor,
+            "facets": facets
         }
         print(f"[OK] [PropertyService] Encontradas {len(properties)} propriedades")
         return result
-    
+
+        #Propriedades com reserva ativa que cruza o período (índice em memória; sem ele, uma consulta)
+    async def _busy_property_ids(self, start_date: date, end_date: date) -> Set[str]:
+        if reservation_index.ready:
+            return reservation_index.busy_property_ids(start_date, end_date)
+        # Dia ordinal e, até o backfill, a data ISO em texto das reservas antigas
+        results = await asyncio.gather(*[
+            self.reservations.query([("status", "in", ReservationStatus.active_statuses()), start_filter])
+            for start_filter in day_filters("start", "<=", end_date)
+        ])
+        busy = set()
+        for reservation in {r["id"]: r for documents in results for r in documents}.values():
+            reservation_start, reservation_end = reservation_dates(reservation)
+            if reservation_start <= end_date and reservation_end >= start_date:
+                busy.add(reservation["property_id"])
+        return busy
+
+    @staticmethod
+    def _search_terms_filter(search_term: str) -> QueryFilter:
+        # Sem termos úteis (só stop words) nada casa, como no índice do catálogo
+        return ("search_terms", "array_contains_all", query_terms(search_term) or [""])
+
+        #Ordenação estável da listagem conforme o sort_by (padrão: mais recentes primeiro)
+    def _build_order_by(self, query_filters: List[QueryFilter], sort_by: Optional[str] = None) -> List[QueryOrder]:
+        order_by = list(SORT_ORDERS.get(sort_by or "relevancia", SORT_ORDERS["relevancia"]))
+        # O Firestore exige ordenar pelos campos com desigualdade (em ordem alfabética,
+        # como em firestore.indexes.json); explicitamos para o cursor conter
+        # exatamente os mesmos valores em todos os backends
+        ordered_fields = {field for field, _ in order_by}
+        inequality_fields = {field for field, op, _ in query_filters if op not in EQUALITY_OPERATORS}
+        order_by.extend((field, "asc") for field in sorted(inequality_fields - ordered_fields))
+        return order_by
+
+        #ETag da versão atual da propriedade
+    def get_property_etag(self, property_data: Dict[str, Any]) -> Optional[str]:
+        return document_etag(property_data)
+
+        #ETag conhecido sem acessar o banco (catálogo ou cache compartilhado); None se desconhecido
+    async def get_cached_property_etag(self, property_id: str) -> Optional[str]:
+        property_data = property_catalog.get(property_id) if property_catalog.ready else None
+        if property_data is None:
+            property_data = await _property_cache.get(property_id)
+        return document_etag(property_data) if property_data else None
+
         #Atualizar propriedade (apenas pelo owner)
-    def update_property(self, property_id: str, property_data: PropertyUpdate, owner_id: str) -> Optional[Dict[str, Any]]:
+    async def update_property(self, property_id: str, property_data: PropertyUpdate, owner_id: str) -> Optional[Dict[str, Any]]:
         print(f"[PropertyService] Atualizando propriedade {property_id} pelo owner {owner_id}")
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-        doc_ref = db.collection(self.collection).document(property_id)
-        doc = doc_ref.get()
-        if not doc.exists:
+        current_data = await self.properties.get(property_id)
+        if not current_data:
             print("[PropertyService] Propriedade não encontrada")
             return None
-        current_data = doc.to_dict()
         if current_data.get("owner_id") != owner_id:
             print("[PropertyService] Usuário não é o proprietário")
             raise Exception("Você não tem permissão para editar esta propriedade")
         update_data = property_data.model_dump(exclude_unset=True)
+        if "distance" in update_data:
+            update_data["distance_meters"] = parse_distance_meters(update_data["distance"])
+        if any(field in update_data for field in SEARCH_FIELDS):
+            update_data["search_terms"] = search_terms({**current_data, **update_data})
         update_data["updated_at"] = datetime.utcnow()
-        doc_ref.update(update_data)
-        updated_doc = doc_ref.get()
-        result = updated_doc.to_dict()
-        result["id"] = updated_doc.id
+        await self.properties.update(property_id, update_data)
+        result = await self.properties.get(property_id)
+        display_changed = any(field in update_data for field in PROPERTY_FIELDS.values())
+        await self._sync_catalog(property_id, result, display_changed=display_changed)
         print("[OK] [PropertyService] Propriedade atualizada")
         return result
     
         #Deletar propriedade (apenas pelo owner)
-    def delete_property(self, property_id: str, owner_id: str) -> bool:
+    async def delete_property(self, property_id: str, owner_id: str) -> bool:
         print(f"[PropertyService] Deletando propriedade {property_id} pelo owner {owner_id}")
 
-        db = self._get_db()
-        if not db:
-            print(f"[ERROR] [PropertyService] Banco de dados não disponível")
-            raise Exception("Banco de dados não disponível")
-
-        doc_ref = db.collection(self.collection).document(property_id)
-        doc = doc_ref.get()
+        current_data = await self.properties.get(property_id)
 
-        if not doc.exists:
+        if not current_data:
             print(f"[ERROR] [PropertyService] Propriedade {property_id} não encontrada")
             return False
 
-        current_data = doc.to_dict()
         current_owner = current_data.get("owner_id")
 
         print(f"[PropertyService] Owner atual da propriedade: {current_owner}")
@@ -196,141 +326,198 @@ class PropertyService:
 
         # Deletar o documento
         try:
-            doc_ref.delete()
+            await self.properties.delete(property_id)
+            await self._sync_catalog(property_id, None)
             print(f"[OK] [PropertyService] Propriedade {property_id} deletada com sucesso")
             return True
         except Exception as e:
             print(f"[ERROR] [PropertyService] Erro ao deletar documento: {str(e)}")
             raise Exception(f"Erro ao deletar propriedade: {str(e)}")
 
-       #Buscar propriedades por termo e filtros
-    def search_properties(self, search_term: str = None, filters=None, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
+       #Buscar propriedades por termo e filtros (índice textual do catálogo, ranqueado por relevância)
+    async def search_properties(self, search_term: str = None, filters=None, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
         print(f"[PropertyService] Buscando propriedades - Termo: {search_term}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
-        query = db.collection(self.collection)
-
-        # Busca por termo (implementação básica)
-        if search_term:
-            query = query.where(filter=FieldFilter("title", ">=", search_term))
-            query = query.where(filter=FieldFilter("title", "<=", search_term + "\uf8ff"))
+        query_filters = []
 
         # Aplicar outros filtros
         if filters:
             if filters.property_type:
-                query = query.where(filter=FieldFilter("type", "==", filters.property_type))
+                query_filters.append(("type", "==", filters.property_type))
             if filters.max_price:
-                query = query.where(filter=FieldFilter("price", "<=", filters.max_price))
+                query_filters.append(("price", "<=", filters.max_price))
 
         # Paginação
         offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
 
-        try:
-            docs = query.stream()
-            properties = []
-            for doc in docs:
-                prop_data = doc.to_dict()
-                prop_data["id"] = doc.id
-                properties.append(prop_data)
-        except Exception:
-            properties = []
+        if property_catalog.ready:
+            # Facetas só vêm do catálogo (mesma passada), como na listagem
+            properties, total, facets = await property_catalog.find(
+                query_filters, limit=per_page, offset=offset, text=search_term or None
+            )
+            for property_data in properties:
+                property_data.pop("_score", None)
+        else:
+            # Sem o catálogo: termos sem acento gravados no documento (palavras inteiras) e sem
+            # facetas, que custariam uma agregação por tipo e por faixa de preço
+            facets = None
+            query_filters.append(ACTIVE_FILTER)
+            if search_term:
+                query_filters.append(self._search_terms_filter(search_term))
+            properties, total = await asyncio.gather(
+                self.properties.query(query_filters, limit=per_page, offset=offset),
+                self.properties.count(query_filters),
+            )
 
         result = {
             "properties": properties,
-            "total": len(properties),
+            "total": total,
             "page": page,
-            "per_page": per_page
+            "per_page": per_page,
+            "total_pages": (total + per_page - 1) // per_page if total > 0 else 1,
+            "facets": facets
         }
 
         print(f"[OK] [PropertyService] Busca retornou {len(properties)} propriedades")
         return result
     
+        #Preenche distance_meters, search_terms e is_active nas propriedades antigas (job de backfill, em lotes)
+    async def backfill_derived_fields(self, batch_size: int = 500) -> int:
+        print("[PropertyService] Iniciando backfill de distance_meters, search_terms e is_active")
+        updated = 0
+        last_id = None
+        while True:
+            # Paginação pelo ID do documento: cada lote custa batch_size leituras
+            documents = await self.properties.query(limit=batch_size, start_after=[last_id] if last_id else None)
+            if not documents:
+                break
+            operations = []
+            for document in documents:
+                # Grava também None: o Firestore omite de order_by documentos sem o campo
+                derived = {
+                    "distance_meters": parse_distance_meters(document.get("distance")),
+                    "search_terms": search_terms(document),
+                    # Sem o campo a propriedade conta como ativa (como no catálogo)
+                    "is_active": document.get("is_active") is not False,
+                }
+                changed = {field: value for field, value in derived.items() if field not in document or document[field] != value}
+                if changed:
+                    operations.append(("update", document["id"], changed))
+            if operations:
+                await self.properties.batch_write(operations)
+                await _property_cache.delete(*[doc_id for _, doc_id, _ in operations])
+                updated += len(operations)
+            print(f"[PropertyService] Backfill: {len(documents)} lidas, {len(operations)} atualizadas")
+            last_id = documents[-1]["id"]
+            if len(documents) < batch_size:
+                break
+        print(f"[OK] [PropertyService] Backfill concluído: {updated} propriedades atualizadas")
+        return updated
+
         #Buscar todas as propriedades de um anunciante
-    def get_properties_by_owner(self, owner_id: str, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
+    async def get_properties_by_owner(self, owner_id: str, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
         print(f"[PropertyService] Buscando propriedades do owner: {owner_id}")
 
-        return self.get_properties(owner_id=owner_id, page=page, per_page=per_page)
+        return await self.get_properties(owner_id=owner_id, page=page, per_page=per_page)
 
-    def toggle_favorite(self, property_id: str, user_id: str, is_favorite: bool) -> bool:
-        """Adicionar/remover dos favoritos do usuário"""
+    async def toggle_favorite(self, property_id: str, user_id: str, is_favorite: bool) -> bool:
+        """Adicionar/remover dos favoritos do usuário com uma única escrita (ArrayUnion/ArrayRemove)"""
         print(f"[PropertyService] Toggling favorite {property_id} para user {user_id}: {is_favorite}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
-        # Verificar se a propriedade existe
-        property_doc = db.collection(self.collection).document(property_id).get()
-        if not property_doc.exists:
+        # Ao adicionar, verificar se a propriedade existe (no catálogo, sem leitura)
+        if is_favorite and not await self._property_exists(property_id):
             print("[PropertyService] Propriedade não encontrada")
             return False
 
-        # Buscar usuário
-        user_doc_ref = db.collection("users").document(user_id)
-        user_doc = user_doc_ref.get()
-
-        if not user_doc.exists:
+        try:
+            await self.users.update(user_id, {
+                "favorite_properties": ArrayUnion([property_id]) if is_favorite else ArrayRemove([property_id]),
+                "updated_at": datetime.utcnow()
+            })
+        except DocumentNotFoundError:
             print("[PropertyService] Usuário não encontrado")
             return False
 
-        user_data = user_doc.to_dict()
-        favorite_properties = user_data.get("favorite_properties", [])
-
-        # Atualizar lista de favoritos
-        if is_favorite:
-            if property_id not in favorite_properties:
-                favorite_properties.append(property_id)
-        else:
-            if property_id in favorite_properties:
-                favorite_properties.remove(property_id)
-
-        # Salvar no perfil do usuário
-        user_doc_ref.update({
-            "favorite_properties": favorite_properties,
-            "updated_at": datetime.utcnow()
-        })
-
+        await _favorites_cache.delete(user_id)
+        await profile_cache.delete(user_id)
         print(f"[OK] [PropertyService] Favorito atualizado no perfil do usuário")
         return True
+
+    async def _property_exists(self, property_id: str) -> bool:
+        if property_catalog.ready:
+            return property_catalog.contains(property_id)
+        return await self.properties.get(property_id) is not None
     
-        #Buscar lista de favoritos do usuario
-    def _get_user_favorites(self, user_id: str) -> List[str]:
+        #Buscar favoritos do usuario pelo firebase_uid (cache por usuário; miss custa uma leitura)
+    async def _get_user_favorites(self, firebase_uid: str) -> Set[str]:
         try:
-            db = self._get_db()
-            if not db:
-                return []
-
-            # Buscar favoritos do usuário no perfil
-            user_doc = db.collection("users").document(user_id).get()
-            if user_doc.exists:
-                user_data = user_doc.to_dict()
-                return user_data.get("favorite_properties", [])
-            return []
+            # O token só traz o uid; o mapa uid -> id do documento é o mesmo do ProfileService
+            user_id = await uid_to_user_id_cache.get(firebase_uid)
+            if user_id:
+                return set(await self._get_favorite_ids(user_id))
+            matches = await self.users.query([("firebase_uid", "==", firebase_uid)], limit=1)
+            if not matches:
+                return set()
+            await uid_to_user_id_cache.set(firebase_uid, matches[0]["id"])
+            return set(await self._cache_favorites(matches[0]))
         except Exception as e:
-            print(f"[ERROR] Erro ao buscar favoritos do usuário {user_id}: {e}")
-            return []
+            print(f"[ERROR] Erro ao buscar favoritos do usuário {firebase_uid}: {e}")
+            return set()
+
+        #IDs favoritados pelo usuário (id do documento), na ordem em que foram adicionados
+    async def _get_favorite_ids(self, user_id: str) -> Tuple[str, ...]:
+        cached = await _favorites_cache.get(user_id)
+        if cached is not None:
+            return cached
+        user_data = await self.users.get(user_id)
+        return await self._cache_favorites(user_data) if user_data else ()
+
+    @staticmethod
+    async def _cache_favorites(user_data: Dict[str, Any]) -> Tuple[str, ...]:
+        favorites = tuple(user_data.get("favorite_properties", []))
+        await _favorites_cache.set(user_data["id"], favorites)
+        return favorites
+
+        #Listar propriedades favoritas do usuário (mais recentes primeiro), hidratadas em lote
+    async def get_favorite_properties(self, user_id: str, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
+        print(f"[PropertyService] Listando favoritos do usuário {user_id} - Page: {page}")
+        favorite_ids = list(reversed(await self._get_favorite_ids(user_id)))
+        total = len(favorite_ids)
+        page_ids = favorite_ids[(page - 1) * per_page:page * per_page]
+
+        # Só os IDs da página são lidos: primeiro do cache, o resto em uma busca em lote
+        documents = await _property_cache.get_many(page_ids)
+        missing_ids = [property_id for property_id in page_ids if property_id not in documents]
+        if missing_ids:
+            fetched = await self.properties.get_many(missing_ids)
+            await _property_cache.set_many(fetched)
+            documents.update(fetched)
+        properties = []
+        for property_id in page_ids:
+            property_data = documents.get(property_id)
+            # Favoritos de propriedades removidas são ignorados
+            if property_data:
+                property_data["is_favorited"] = True
+                properties.append(property_data)
+
+        result = {
+            "properties": properties, "total": total, "page": page, "per_page": per_page,
+            "total_pages": (total + per_page - 1) // per_page if total > 0 else 1
+        }
+        print(f"[OK] [PropertyService] {len(properties)} favoritos encontrados")
+        return result
 
     # Deletar imagens específicas de uma propriedade
-    def delete_images_from_property(self, property_id: str, image_urls: List[str], user_id: str) -> bool:
+    async def delete_images_from_property(self, property_id: str, image_urls: List[str], user_id: str) -> bool:
         """Deleta imagens específicas de uma propriedade"""
         print(f"[PropertyService] Deletando {len(image_urls)} imagens da propriedade {property_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
+        property_data = await self.properties.get(property_id)
 
-        doc_ref = db.collection(self.collection).document(property_id)
-        doc = doc_ref.get()
-
-        if not doc.exists:
+        if not property_data:
             print(f"[PropertyService] Propriedade {property_id} não encontrada")
             return False
 
-        property_data = doc.to_dict()
         if property_data.get('owner_id') != user_id:
             raise Exception("Você não tem permissão para editar esta propriedade")
 
@@ -338,31 +525,26 @@ class PropertyService:
         current_images = property_data.get('images', [])
         updated_images = [img for img in current_images if img not in image_urls]
 
-        doc_ref.update({
+        await self.properties.update(property_id, {
             'images': updated_images,
             'updated_at': datetime.utcnow()
         })
+        await self._sync_catalog(property_id, await self.properties.get(property_id), display_changed=True)
 
         print(f"[OK] [PropertyService] {len(image_urls)} imagens deletadas da propriedade {property_id}")
         return True
 
     # Reordenar imagens de uma propriedade
-    def reorder_property_images(self, property_id: str, image_urls: List[str], user_id: str) -> bool:
+    async def reorder_property_images(self, property_id: str, image_urls: List[str], user_id: str) -> bool:
         """Reordena as imagens de uma propriedade"""
         print(f"[PropertyService] Reordenando imagens da propriedade {property_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
-        doc_ref = db.collection(self.collection).document(property_id)
-        doc = doc_ref.get()
+        property_data = await self.properties.get(property_id)
 
-        if not doc.exists:
+        if not property_data:
             print(f"[PropertyService] Propriedade {property_id} não encontrada")
             return False
 
-        property_data = doc.to_dict()
         if property_data.get('owner_id') != user_id:
             raise Exception("Você não tem permissão para editar esta propriedade")
 
@@ -371,10 +553,11 @@ class PropertyService:
         if set(image_urls) != set(current_images):
             raise Exception("As URLs fornecidas não correspondem às imagens atuais da propriedade")
 
-        doc_ref.update({
+        await self.properties.update(property_id, {
             'images': image_urls,
             'updated_at': datetime.utcnow()
         })
+        await self._sync_catalog(property_id, await self.properties.get(property_id), display_changed=True)
 
         print(f"[OK] [PropertyService] Imagens reordenadas na propriedade {property_id}")
         return True
@@ -2,47 +2,35 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import uuid
-from google.cloud import firestore
-from google.cloud.firestore_v1.base_query import FieldFilter
-from config.firebase_config import get_db
+from repositories.factory import get_repository
 from models.rental import RentalInterest, RentalRequest
 
 
 class RentalService:
     def __init__(self):
-        self.db = None
-        self.interests_collection = "rental_interests"
-        self.requests_collection = "rental_requests"
-
-    def _get_db(self):
-        if self.db is None:
-            self.db = get_db()
-        return self.db
+        self.interests = get_repository("rental_interests")
+        self.properties = get_repository("properties")
+        self.users = get_repository("users")
     
         #Demonstrar interesse em uma propriedade
-    def express_interest(self, property_id: str, student_id: str, message: str = None) -> Dict[str, Any]:
+    async def express_interest(self, property_id: str, student_id: str, message: str = None) -> Dict[str, Any]:
         print(f"[RentalService] Estudante {student_id} demonstrando interesse na propriedade {property_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
         # Verificar se o estudante já demonstrou interesse nesta propriedade
-        existing_interest = db.collection(self.interests_collection)\
-            .where(filter=FieldFilter("property_id", "==", property_id))\
-            .where(filter=FieldFilter("student_id", "==", student_id))\
-            .where(filter=FieldFilter("status", "==", "pending"))\
-            .stream()
+        existing_interest = await self.interests.query([
+            ("property_id", "==", property_id),
+            ("student_id", "==", student_id),
+            ("status", "==", "pending"),
+        ], limit=1)
 
-        if any(existing_interest):
+        if existing_interest:
             raise Exception("Você já demonstrou interesse nesta propriedade")
 
         # Buscar informaçoes da propriedade para obter o advertiser_id
-        property_doc = db.collection("properties").document(property_id).get()
-        if not property_doc.exists:
+        property_data = await self.properties.get(property_id)
+        if not property_data:
             raise Exception("Propriedade não encontrada")
 
-        property_data = property_doc.to_dict()
         advertiser_id = property_data.get("owner_id")
 
         if not advertiser_id:
@@ -64,42 +52,20 @@ class RentalService:
         }
 
         # Salvar no Firestore
-        db.collection(self.interests_collection).document(interest_id).set(interest_data)
+        await self.interests.set(interest_id, interest_data)
 
         print(f"[OK] [RentalService] Interesse registrado: {interest_id}")
         return interest_data
     
         #Buscar interesses do estudante
-    def _batch_fetch_docs(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
-        """Buscar múltiplos documentos por ID em 1 round-trip via get_all"""
-        db = self._get_db()
-        cache: Dict[str, Dict[str, Any]] = {}
-        unique_ids = list({did for did in doc_ids if did})
-        if not unique_ids:
-            return cache
-
-        refs = [db.collection(collection).document(did) for did in unique_ids]
-        for snap in db.get_all(refs):
-            if snap.exists:
-                cache[snap.id] = snap.to_dict()
-        return cache
-
-    def get_student_interests(self, student_id: str) -> List[Dict[str, Any]]:
+    async def get_student_interests(self, student_id: str) -> List[Dict[str, Any]]:
         print(f"[RentalService] Buscando interesses do estudante: {student_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
-        docs = db.collection(self.interests_collection)\
-            .where(filter=FieldFilter("student_id", "==", student_id))\
-            .stream()
-
-        interests = [doc.to_dict() for doc in docs]
+        interests = await self.interests.query([("student_id", "==", student_id)])
 
         # Batch fetch das propriedades referenciadas
         property_ids = [i["property_id"] for i in interests if i.get("property_id")]
-        properties_cache = self._batch_fetch_docs("properties", property_ids)
+        properties_cache = await self.properties.get_many(property_ids)
 
         for interest_data in interests:
             prop = properties_cache.get(interest_data.get("property_id"))
@@ -112,24 +78,16 @@ class RentalService:
         return interests
 
         #Buscar interesses recebidos pelo anunciante
-    def get_advertiser_interests(self, advertiser_id: str) -> List[Dict[str, Any]]:
+    async def get_advertiser_interests(self, advertiser_id: str) -> List[Dict[str, Any]]:
         print(f"[RentalService] Buscando interesses do anunciante: {advertiser_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
-        docs = db.collection(self.interests_collection)\
-            .where(filter=FieldFilter("advertiser_id", "==", advertiser_id))\
-            .stream()
-
-        interests = [doc.to_dict() for doc in docs]
+        interests = await self.interests.query([("advertiser_id", "==", advertiser_id)])
 
         # Batch fetch das propriedades e estudantes referenciados
         property_ids = [i["property_id"] for i in interests if i.get("property_id")]
         student_ids = [i["student_id"] for i in interests if i.get("student_id")]
-        properties_cache = self._batch_fetch_docs("properties", property_ids)
-        students_cache = self._batch_fetch_docs("users", student_ids)
+        properties_cache = await self.properties.get_many(property_ids)
+        students_cache = await self.users.get_many(student_ids)
 
         for interest_data in interests:
             prop = properties_cache.get(interest_data.get("property_id"))
@@ -145,33 +103,25 @@ class RentalService:
         return interests
 
         #Atualizar status de um interesse (apenas pelo anunciante)
-    def update_interest_status(self, interest_id: str, status: str, advertiser_id: str) -> Dict[str, Any]:
+    async def update_interest_status(self, interest_id: str, status: str, advertiser_id: str) -> Dict[str, Any]:
         print(f"[RentalService] Atualizando interesse {interest_id} para status: {status}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
-        doc_ref = db.collection(self.interests_collection).document(interest_id)
-        doc = doc_ref.get()
+        interest_data = await self.interests.get(interest_id)
 
-        if not doc.exists:
+        if not interest_data:
             raise Exception("Interesse não encontrado")
 
-        interest_data = doc.to_dict()
-
         # Verificar se o anunciante é o dono
         if interest_data.get("advertiser_id") != advertiser_id:
             raise Exception("Você não tem permissão para alterar este interesse")
 
         # Atualizar status
-        doc_ref.update({
+        await self.interests.update(interest_id, {
             "status": status,
             "updated_at": datetime.utcnow()
         })
 
-        updated_doc = doc_ref.get()
-        result = updated_doc.to_dict()
+        result = await self.interests.get(interest_id)
 
         print(f"[OK] [RentalService] Status do interesse atualizado")
         return result
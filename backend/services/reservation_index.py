@@ -0,0 +1,115 @@
+"""
+Índice em memória dos intervalos das reservas ativas de todo o catálogo (um por worker).
+
+Responde "quais propriedades estão ocupadas entre duas datas" para o filtro de
+disponibilidade da listagem. Carregado no startup e mantido pelas notificações
+da coleção ``reservations`` (``on_snapshot`` no Firestore), as duas restritas às
+reservas ativas que ainda não terminaram: o histórico nunca é lido. Até o
+backfill das datas, as reservas antigas (datas ISO em texto, sem ``end_day``)
+entram por uma segunda consulta/assinatura sobre ``end_date``. Os
+intervalos ficam num único
+``AvailabilityCalendar`` (busca binária + maior fim acumulado), refeito sob
+demanda na primeira consulta após uma mudança.
+"""
+
+import asyncio
+import threading
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from repositories.base import BaseRepository, DocumentChange
+from services.availability_service import AvailabilityCalendar
+from utils.reservation_utils import ReservationStatus, day_filters, reservation_dates, today_ordinal
+
+# (início ISO, fim ISO, property_id)
+Entry = Tuple[str, str, str]
+
+
+class ReservationIndex:
+    def __init__(self):
+        # Uma entrada por consulta (dia ordinal / data em texto): reservation_id -> Entry.
+        # Separadas porque uma reserva migrada sai de uma e entra na outra em notificações distintas
+        self._scopes: List[Dict[str, Entry]] = []
+        # União dos escopos, refeita junto com o calendário
+        self._reservations: Dict[str, Entry] = {}
+        self._calendar: Optional[AvailabilityCalendar] = None
+        # O listener do Firestore roda em outra thread
+        self._lock = threading.RLock()
+        self._unsubscribers: List[Callable[[], None]] = []
+        self.ready = False
+
+        #Carrega as reservas ativas não terminadas e passa a ouvir as mudanças delas
+    async def start(self, repository: BaseRepository) -> None:
+        started = time.perf_counter()
+        today = date.fromordinal(today_ordinal())
+        scope_filters = [
+            [("status", "in", ReservationStatus.active_statuses()), end_filter]
+            for end_filter in day_filters("end", ">=", today)
+        ]
+        results = await asyncio.gather(*[repository.query(filters) for filters in scope_filters])
+        with self._lock:
+            self._scopes = [{} for _ in scope_filters]
+            for scope, documents in enumerate(results):
+                for document in documents:
+                    self._store(scope, document["id"], document)
+            self._calendar = None
+        self._unsubscribers = [
+            repository.watch(lambda changes, scope=scope: self.apply_changes(changes, scope), filters)
+            for scope, filters in enumerate(scope_filters)
+        ]
+        self.ready = True
+        elapsed = (time.perf_counter() - started) * 1000
+        total = len({doc_id for scope in self._scopes for doc_id in scope})
+        print(f"[ReservationIndex] {total} reservas ativas carregadas em {elapsed:.0f}ms")
+
+    def stop(self) -> None:
+        for unsubscribe in self._unsubscribers:
+            unsubscribe()
+        self._unsubscribers = []
+        self.ready = False
+
+    def apply_changes(self, changes: List[DocumentChange], scope: int = 0) -> None:
+        with self._lock:
+            for doc_id, document in changes:
+                self._store(scope, doc_id, document)
+            self._calendar = None
+
+    def _store(self, scope: int, doc_id: str, document: Optional[dict]) -> None:
+        entries = self._scopes[scope]
+        entries.pop(doc_id, None)
+        if document is None or document.get("status") not in ReservationStatus.active_statuses():
+            return
+        try:
+            start_date, end_date = reservation_dates(document)
+            start, end = start_date.isoformat(), end_date.isoformat()
+        except (KeyError, TypeError, ValueError):
+            print(f"[WARNING] [ReservationIndex] Reserva {doc_id} com datas inválidas ignorada")
+            return
+        if end_date.toordinal() < today_ordinal():
+            return
+        entries[doc_id] = (start, end, document.get("property_id"))
+
+        #IDs das propriedades com alguma reserva ativa que cruza [start_date, end_date]
+    def busy_property_ids(self, start_date: date, end_date: date) -> Set[str]:
+        with self._lock:
+            if self._calendar is None:
+                # Reservas que terminaram desde o startup saem do índice na reconstrução
+                today = date.fromordinal(today_ordinal()).isoformat()
+                for entries in self._scopes:
+                    for reservation_id in [key for key, entry in entries.items() if entry[1] < today]:
+                        del entries[reservation_id]
+                self._reservations = {}
+                for entries in self._scopes:
+                    self._reservations.update(entries)
+                self._calendar = AvailabilityCalendar([
+                    (start, end, reservation_id) for reservation_id, (start, end, _) in self._reservations.items()
+                ])
+            return {
+                self._reservations[reservation_id][2]
+                for reservation_id in self._calendar.conflicts(start_date, end_date)
+            }
+
+
+# Instância única por processo (worker do uvicorn)
+reservation_index = ReservationIndex()
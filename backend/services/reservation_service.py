@@ -1,94 +1,86 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime, date
 import uuid
-from google.cloud.firestore_v1.base_query import FieldFilter
-from config.firebase_config import get_db
+from config.settings import settings
+from repositories.base import DocumentNotFoundError
+from repositories.factory import get_repository
 from models.rental import ReservationCreate, ReservationUpdate, ReservationResponse
-from utils.reservation_utils import ReservationStatus, parse_iso_date
+from services.availability_service import availability_service
+from services.reservation_snapshots import SNAPSHOT_FIELDS, has_snapshot, reservation_snapshot
+from utils.pagination import decode_cursor, split_page
+from utils.reservation_utils import (
+    ReservationStatus, needs_date_backfill, reservation_date_fields, reservation_dates,
+)
+
+# Reservas por transação na atualização em lote: cada uma grava a reserva e, na rejeição,
+# o calendário da propriedade (limite de 500 escritas por commit do Firestore)
+BULK_STATUS_CHUNK = 200
 
 
 class ReservationService:
     def __init__(self):
-        self.db = None
-        self.collection = "reservations"
-        self.properties_collection = "properties"
-        self.users_collection = "users"
-
-    def _get_db(self):
-        if self.db is None:
-            self.db = get_db()
-        return self.db
-
-    def _batch_fetch(self, collection: str, ids: List[str]) -> Dict[str, Dict]:
-        """Busca múltiplos documentos em uma única requisição ao Firestore.
-
-        Substitui N chamadas .get() individuais por um único db.get_all(),
-        reduzindo round-trips de rede de O(n) para O(1).
-        """
-        if not ids:
-            return {}
-        db = self._get_db()
-        refs = [db.collection(collection).document(doc_id) for doc_id in ids]
-        docs = db.get_all(refs)
-        return {doc.id: (doc.to_dict() if doc.exists else {}) for doc in docs}
+        self.reservations = get_repository("reservations")
+        self.properties = get_repository("properties")
+        self.users = get_repository("users")
 
-    def _assemble_response(
-        self,
-        reservation: Dict[str, Any],
-        property_data: Dict,
-        student_data: Dict,
-        advertiser_data: Dict,
-    ) -> ReservationResponse:
-        """Monta ReservationResponse a partir de dicts já carregados — sem I/O."""
+    def _assemble_response(self, reservation: Dict[str, Any]) -> ReservationResponse:
+        """Monta ReservationResponse só com o documento (campos de exibição denormalizados) — sem I/O."""
+        start_date, end_date = reservation_dates(reservation)
         return ReservationResponse(
             id=reservation["id"],
             property_id=reservation["property_id"],
             student_id=reservation["student_id"],
             advertiser_id=reservation["advertiser_id"],
-            start_date=parse_iso_date(reservation["start_date"]),
-            end_date=parse_iso_date(reservation["end_date"]),
+            start_date=start_date,
+            end_date=end_date,
             guests=reservation["guests"],
             message=reservation.get("message"),
             total_price=reservation["total_price"],
             status=reservation["status"],
             created_at=reservation["created_at"],
             updated_at=reservation["updated_at"],
-            property_title=property_data.get("title"),
-            property_type=property_data.get("type"),
-            property_location=property_data.get("location"),
-            property_images=property_data.get("images", []),
-            student_name=student_data.get("name"),
-            student_email=student_data.get("email"),
-            advertiser_name=advertiser_data.get("name") or advertiser_data.get("company_name"),
-            advertiser_email=advertiser_data.get("email"),
+            **{field: reservation.get(field) for field in SNAPSHOT_FIELDS if reservation.get(field) is not None},
         )
 
+        #Snapshots das reservas criadas antes dos campos denormalizados, buscados em lote (sem gravar)
+    async def _missing_snapshots(self, reservations: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        missing = [reservation for reservation in reservations if not has_snapshot(reservation)]
+        if not missing:
+            return {}
+        property_ids = {r.get("property_id") for r in missing} - {None}
+        user_ids = {r.get("student_id") for r in missing} | {r.get("advertiser_id") for r in missing}
+        properties_map = await self.properties.get_many(list(property_ids))
+        users_map = await self.users.get_many(list(user_ids - {None}))
+        return {
+            reservation["id"]: reservation_snapshot(
+                properties_map.get(reservation.get("property_id"), {}),
+                users_map.get(reservation.get("student_id"), {}),
+                users_map.get(reservation.get("advertiser_id"), {}),
+            )
+            for reservation in missing
+        }
+
+        #Leitura: completa em memória as reservas antigas; a gravação fica com o backfill
+    async def _fill_missing_snapshots(self, reservations: List[Dict[str, Any]]) -> None:
+        snapshots = await self._missing_snapshots(reservations)
+        for reservation in reservations:
+            reservation.update(snapshots.get(reservation["id"], {}))
+
     # Criar nova reserva
-    def create_reservation(self, reservation_data: ReservationCreate, student_id: str) -> Dict[str, Any]:
+    async def create_reservation(self, reservation_data: ReservationCreate, student_id: str) -> Dict[str, Any]:
         print(f"[ReservationService] Criando reserva para student: {student_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
-        property_doc = db.collection(self.properties_collection).document(reservation_data.property_id).get()
-        if not property_doc.exists:
+        property_data = await self.properties.get(reservation_data.property_id)
+        if not property_data:
             raise Exception("Propriedade não encontrada")
 
-        property_data = property_doc.to_dict()
         advertiser_id = property_data.get("owner_id")
 
         if student_id == advertiser_id:
             raise Exception("Você não pode fazer reserva em sua própria propriedade")
 
-        existing_reservations = self._get_property_reservations(
-            reservation_data.property_id,
-            reservation_data.start_date,
-            reservation_data.end_date,
-        )
-
-        if existing_reservations:
-            raise Exception("Propriedade não disponível para as datas selecionadas")
+        # Dados de exibição gravados na reserva (mantidos pelo reservation_snapshots)
+        users_map = await self.users.get_many([student_id, advertiser_id])
 
         reservation_id = str(uuid.uuid4())
         now = datetime.utcnow()
@@ -98,126 +90,95 @@ class ReservationService:
             "property_id": reservation_data.property_id,
             "student_id": student_id,
             "advertiser_id": advertiser_id,
-            "start_date": reservation_data.start_date.isoformat(),
-            "end_date": reservation_data.end_date.isoformat(),
+            **reservation_date_fields(reservation_data.start_date, reservation_data.end_date),
             "guests": reservation_data.guests,
             "message": reservation_data.message,
             "total_price": reservation_data.total_price,
             "status": ReservationStatus.PENDING,
             "created_at": now,
             "updated_at": now,
+            **reservation_snapshot(
+                property_data, users_map.get(student_id, {}), users_map.get(advertiser_id, {})
+            ),
         }
 
-        db.collection(self.collection).document(reservation_id).set(reservation_dict)
-        print(f"[ReservationService] Reserva criada: {reservation_id}")
-        return reservation_dict
-
-    # Verificar reservas existentes para uma propriedade em um período
-    def _get_property_reservations(self, property_id: str, start_date: date, end_date: date) -> List[Dict]:
-        db = self._get_db()
-
-        query = (
-            db.collection(self.collection)
-            .where(filter=FieldFilter("property_id", "==", property_id))
-            .where(filter=FieldFilter("status", "in", ReservationStatus.active_statuses()))
-        )
-
-        reservations = []
-        for doc in query.stream():
-            reservation = doc.to_dict()
-            reservation_start = parse_iso_date(reservation["start_date"])
-            reservation_end = parse_iso_date(reservation["end_date"])
-
-            if start_date <= reservation_end and end_date >= reservation_start:
-                reservations.append(reservation)
+        # Conferência de datas e gravação na mesma transação: reservas concorrentes não se sobrepõem
+        async def book(transaction, calendar):
+            if calendar.conflicts(reservation_data.start_date, reservation_data.end_date):
+                raise Exception("Propriedade não disponível para as datas selecionadas")
+            calendar.add(reservation_id, reservation_data.start_date, reservation_data.end_date)
+            transaction.set(self.reservations, reservation_id, reservation_dict)
 
-        return reservations
+        await availability_service.transact(reservation_data.property_id, book)
+        print(f"[ReservationService] Reserva criada: {reservation_id}")
+        # Resposta com as datas como AAAA-MM-DD (o documento guarda timestamps e dias ordinais)
+        return self._assemble_response(reservation_dict).model_dump()
 
     # Buscar reserva por ID
-    def get_reservation_by_id(self, reservation_id: str, user_id: str) -> Optional[ReservationResponse]:
+    async def get_reservation_by_id(self, reservation_id: str, user_id: str) -> Optional[ReservationResponse]:
         print(f"[ReservationService] Buscando reserva: {reservation_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
-        doc = db.collection(self.collection).document(reservation_id).get()
-        if not doc.exists:
+        reservation = await self.reservations.get(reservation_id)
+        if not reservation:
             return None
 
-        reservation = doc.to_dict()
-
         if user_id not in [reservation["student_id"], reservation["advertiser_id"]]:
             raise Exception("Você não tem permissão para ver esta reserva")
 
-        return self._build_reservation_response(reservation)
+        return await self._build_reservation_response(reservation)
 
-    # Buscar reservas do usuário — otimizado com batch fetch
-    def get_user_reservations(self, user_id: str, user_type: str = "student") -> List[ReservationResponse]:
-        print(f"[ReservationService] Buscando reservas do usuário: {user_id}, tipo: {user_type}")
-
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
+    # Buscar reservas do usuário — uma página (mais recentes primeiro) por consulta, sem joins
+    async def get_user_reservations(
+        self,
+        user_id: str,
+        user_type: str = "student",
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        start_from: Optional[date] = None,
+        start_to: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        print(f"[ReservationService] Buscando reservas do usuário: {user_id}, tipo: {user_type}, cursor: {bool(cursor)}")
 
         field = "student_id" if user_type == "student" else "advertiser_id"
-
-        # Query 1 — buscar todas as reservas do usuário
-        raw_reservations = [
-            doc.to_dict()
-            for doc in db.collection(self.collection)
-            .where(filter=FieldFilter(field, "==", user_id))
-            .stream()
-        ]
-
-        if not raw_reservations:
-            print(f"[ReservationService] Nenhuma reserva encontrada")
-            return []
-
-        # Coletar IDs únicos para eliminar fetches redundantes
-        property_ids = list({r["property_id"] for r in raw_reservations})
-        user_ids = list(
-            {r["student_id"] for r in raw_reservations}
-            | {r["advertiser_id"] for r in raw_reservations}
+        filters = [(field, "==", user_id)]
+        if statuses:
+            filters.append(("status", "in", [ReservationStatus(s).value for s in statuses]))
+        # Dia ordinal (inteiro) gravado junto dos timestamps: filtro indexado, sem conversão por documento
+        if start_from:
+            filters.append(("start_day", ">=", start_from.toordinal()))
+        if start_to:
+            filters.append(("start_day", "<=", start_to.toordinal()))
+
+        order_by = [("created_at", "desc")]
+        if start_from or start_to:
+            # O Firestore exige ordenar também pelo campo com desigualdade (ver firestore.indexes.json)
+            order_by.append(("start_day", "asc"))
+
+        start_after = decode_cursor(cursor, order_by) if cursor else None
+        total = await self.reservations.count(filters, order_by=order_by)
+        raw_reservations = await self.reservations.query(
+            filters, order_by=order_by, limit=limit + 1, start_after=start_after
         )
+        raw_reservations, next_cursor = split_page(raw_reservations, limit, order_by)
 
-        # Query 2 + Query 3 — batch fetch (O(1) independente de N reservas)
-        properties_map = self._batch_fetch(self.properties_collection, property_ids)
-        users_map = self._batch_fetch(self.users_collection, user_ids)
-
-        # Montagem em memória — zero I/O adicional
-        reservations = [
-            self._assemble_response(
-                r,
-                properties_map.get(r["property_id"], {}),
-                users_map.get(r["student_id"], {}),
-                users_map.get(r["advertiser_id"], {}),
-            )
-            for r in raw_reservations
-        ]
+        await self._fill_missing_snapshots(raw_reservations)
+        reservations = [self._assemble_response(r) for r in raw_reservations]
 
-        reservations.sort(key=lambda x: x.created_at, reverse=True)
-        print(f"[ReservationService] Encontradas {len(reservations)} reservas")
-        return reservations
+        print(f"[ReservationService] Encontradas {len(reservations)} de {total} reservas")
+        return {"reservations": reservations, "total": total, "next_cursor": next_cursor}
 
     # Atualizar reserva
-    def update_reservation(
+    async def update_reservation(
         self, reservation_id: str, update_data: ReservationUpdate, user_id: str
     ) -> Optional[ReservationResponse]:
         print(f"[ReservationService] Atualizando reserva: {reservation_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
-
-        doc_ref = db.collection(self.collection).document(reservation_id)
-        doc = doc_ref.get()
+        current_data = await self.reservations.get(reservation_id)
 
-        if not doc.exists:
+        if not current_data:
             return None
 
-        current_data = doc.to_dict()
-
         if user_id == current_data["student_id"]:
             allowed_fields = ["start_date", "end_date", "guests", "message"]
             update_dict = {
@@ -238,74 +199,195 @@ class ReservationService:
         if not update_dict:
             raise Exception("Nenhum campo válido para atualização")
 
-        if "start_date" in update_dict or "end_date" in update_dict:
-            new_start = parse_iso_date(update_dict.get("start_date", current_data["start_date"]))
-            new_end = parse_iso_date(update_dict.get("end_date", current_data["end_date"]))
-
-            if "start_date" in update_dict:
-                update_dict["start_date"] = new_start.isoformat()
-            if "end_date" in update_dict:
-                update_dict["end_date"] = new_end.isoformat()
+        dates_changed = "start_date" in update_dict or "end_date" in update_dict
+        new_dates = {
+            field: update_dict.pop(field) for field in ("start_date", "end_date") if field in update_dict
+        }
+        update_dict["updated_at"] = datetime.utcnow()
 
-            existing_reservations = self._get_property_reservations(
-                current_data["property_id"], new_start, new_end
-            )
-            for res in existing_reservations:
-                if res["id"] != reservation_id:
+        # Relê a reserva dentro da transação: status/datas podem ter mudado desde a leitura acima
+        async def apply(transaction, calendar):
+            current = await transaction.get(self.reservations, reservation_id)
+            if not current:
+                raise DocumentNotFoundError(f"reservations/{reservation_id}")
+            current_start, current_end = reservation_dates(current)
+            new_start = new_dates.get("start_date", current_start)
+            new_end = new_dates.get("end_date", current_end)
+            was_active = current["status"] in ReservationStatus.active_statuses()
+            is_active = update_dict.get("status", current["status"]) in ReservationStatus.active_statuses()
+
+            # Novas datas (ou reserva reativada) precisam estar livres no calendário da propriedade
+            if is_active and (dates_changed or not was_active):
+                if calendar.conflicts(new_start, new_end, ignore_reservation_id=reservation_id):
                     raise Exception("Conflito de datas com outra reserva")
+                calendar.add(reservation_id, new_start, new_end)
+            elif was_active and not is_active:
+                calendar.remove(reservation_id)
+            # Datas sempre gravadas juntas (timestamps + dias ordinais), mesmo quando só uma mudou
+            changes = {**update_dict, **reservation_date_fields(new_start, new_end)} if dates_changed else update_dict
+            transaction.update(self.reservations, reservation_id, changes)
+
+        # Removida por outra requisição depois da leitura acima: 404, como se não existisse
+        try:
+            await availability_service.transact(current_data["property_id"], apply)
+        except DocumentNotFoundError:
+            return None
 
-        update_dict["updated_at"] = datetime.utcnow()
-        doc_ref.update(update_dict)
-
-        updated_doc = doc_ref.get()
-        return self._build_reservation_response(updated_doc.to_dict())
+        updated_data = await self.reservations.get(reservation_id)
+        return await self._build_reservation_response(updated_data)
 
     # Cancelar reserva
-    def cancel_reservation(self, reservation_id: str, user_id: str) -> bool:
+    async def cancel_reservation(self, reservation_id: str, user_id: str) -> bool:
         print(f"[ReservationService] Cancelando reserva: {reservation_id}")
 
-        db = self._get_db()
-        if not db:
-            raise Exception("Banco de dados não disponível")
+        current_data = await self.reservations.get(reservation_id)
 
-        doc_ref = db.collection(self.collection).document(reservation_id)
-        doc = doc_ref.get()
-
-        if not doc.exists:
+        if not current_data:
             return False
 
-        current_data = doc.to_dict()
-
         if user_id not in [current_data["student_id"], current_data["advertiser_id"]]:
             raise Exception("Você não tem permissão para cancelar esta reserva")
 
         if current_data["status"] in ReservationStatus.terminal_statuses():
             raise Exception("Reserva já foi cancelada ou rejeitada")
 
-        doc_ref.update({
-            "status": ReservationStatus.CANCELLED,
-            "updated_at": datetime.utcnow(),
-        })
+        async def cancel(transaction, calendar):
+            current = await transaction.get(self.reservations, reservation_id)
+            if not current:
+                raise DocumentNotFoundError(f"reservations/{reservation_id}")
+            if current["status"] in ReservationStatus.terminal_statuses():
+                raise Exception("Reserva já foi cancelada ou rejeitada")
+            calendar.remove(reservation_id)
+            transaction.update(self.reservations, reservation_id, {
+                "status": ReservationStatus.CANCELLED,
+                "updated_at": datetime.utcnow(),
+            })
+
+        try:
+            await availability_service.transact(current_data["property_id"], cancel)
+        except DocumentNotFoundError:
+            return False
 
         print(f"[ReservationService] Reserva cancelada: {reservation_id}")
         return True
 
-    # Lookup individual (get_by_id e update) — usa batch para os 2 users em 1 call
-    def _build_reservation_response(self, reservation: Dict[str, Any]) -> ReservationResponse:
-        properties_map = self._batch_fetch(
-            self.properties_collection, [reservation["property_id"]]
-        )
-        users_map = self._batch_fetch(
-            self.users_collection,
-            list({reservation["student_id"], reservation["advertiser_id"]}),
+    # Confirmar/rejeitar várias reservas pendentes do anunciante; resultado compacto por item
+    async def bulk_update_status(self, reservation_ids: List[str], new_status: str, advertiser_id: str) -> List[Dict[str, str]]:
+        reservation_ids = list(dict.fromkeys(reservation_ids))
+        print(f"[ReservationService] Atualizando {len(reservation_ids)} reservas para '{new_status}'")
+
+        outcomes: Dict[str, str] = {}
+        for start in range(0, len(reservation_ids), BULK_STATUS_CHUNK):
+            chunk = reservation_ids[start:start + BULK_STATUS_CHUNK]
+            outcomes.update(await self._bulk_update_chunk(chunk, new_status, advertiser_id))
+
+        updated = sum(1 for outcome in outcomes.values() if outcome == "updated")
+        print(f"[ReservationService] {updated} de {len(reservation_ids)} reservas atualizadas")
+        return [{"id": reservation_id, "result": outcomes[reservation_id]} for reservation_id in reservation_ids]
+
+    # Expira reservas pendentes sem resposta (usado pelo reservation_sweeper): rejeitadas pelo sistema.
+    # Tarefa interna: fora de transaction_stats, que mede a contenção das requisições
+    async def expire_pending_reservations(self, reservations: List[Dict[str, Any]]) -> int:
+        # Calendários que faltam são montados antes, fora das transações dos blocos
+        await availability_service.ensure_calendars(
+            [reservation["property_id"] for reservation in reservations], record_stats=False
         )
-        return self._assemble_response(
-            reservation,
-            properties_map.get(reservation["property_id"], {}),
-            users_map.get(reservation["student_id"], {}),
-            users_map.get(reservation["advertiser_id"], {}),
+        reservation_ids = [reservation["id"] for reservation in reservations]
+        outcomes: Dict[str, str] = {}
+        for start in range(0, len(reservation_ids), BULK_STATUS_CHUNK):
+            chunk = reservation_ids[start:start + BULK_STATUS_CHUNK]
+            outcomes.update(await self._bulk_update_chunk(
+                chunk, ReservationStatus.REJECTED, extra_fields={"expired_at": datetime.utcnow()}, record_stats=False
+            ))
+        return sum(1 for outcome in outcomes.values() if outcome == "updated")
+
+        #Uma transação por bloco; sem advertiser_id (sistema) a posse não é conferida
+    async def _bulk_update_chunk(
+        self,
+        chunk: List[str],
+        new_status: str,
+        advertiser_id: Optional[str] = None,
+        extra_fields: Optional[Dict[str, Any]] = None,
+        record_stats: bool = True,
+    ) -> Dict[str, str]:
+        released: Dict[str, List[str]] = {}
+
+        # Leitura (um get_all), validação e escritas na mesma transação: uma reserva cancelada
+        # pelo estudante nesse meio tempo não volta a ser confirmada
+        async def apply(transaction) -> Dict[str, str]:
+            released.clear()
+            outcomes = {}
+            documents = await transaction.get_many(self.reservations, chunk)
+            to_update = []
+            for reservation_id in chunk:
+                reservation = documents.get(reservation_id)
+                if reservation is None:
+                    outcomes[reservation_id] = "not_found"
+                elif advertiser_id is not None and reservation["advertiser_id"] != advertiser_id:
+                    outcomes[reservation_id] = "forbidden"
+                elif reservation["status"] == new_status:
+                    outcomes[reservation_id] = "unchanged"
+                elif reservation["status"] != ReservationStatus.PENDING:
+                    outcomes[reservation_id] = "invalid_status"
+                else:
+                    outcomes[reservation_id] = "updated"
+                    to_update.append(reservation_id)
+                    if new_status == ReservationStatus.REJECTED:
+                        released.setdefault(reservation["property_id"], []).append(reservation_id)
+
+            # Rejeitadas liberam as datas no calendário das propriedades
+            calendars = await availability_service.read_calendars(transaction, list(released))
+            for property_id, released_ids in released.items():
+                for reservation_id in released_ids:
+                    calendars[property_id].remove(reservation_id)
+            availability_service.write_calendars(transaction, calendars)
+
+            now = datetime.utcnow()
+            for reservation_id in to_update:
+                transaction.update(self.reservations, reservation_id, {
+                    "status": new_status, "updated_at": now, **(extra_fields or {})
+                })
+            return outcomes
+
+        return await self.reservations.run_transaction(
+            apply, max_attempts=settings.BOOKING_MAX_ATTEMPTS, record_stats=record_stats
         )
 
+    # Migração das reservas antigas, em lotes: datas em texto (ISO) para timestamps nativos +
+    # dias ordinais e campos de exibição denormalizados (snapshots)
+    async def backfill_derived_fields(self, batch_size: int = 500) -> int:
+        print("[ReservationService] Iniciando backfill das datas e snapshots das reservas")
+        updated = 0
+        last_id = None
+        while True:
+            # Paginação pelo ID do documento: cada lote custa batch_size leituras
+            documents = await self.reservations.query(limit=batch_size, start_after=[last_id] if last_id else None)
+            if not documents:
+                break
+            snapshots = await self._missing_snapshots(documents)
+            operations = []
+            for document in documents:
+                changes = dict(snapshots.get(document["id"], {}))
+                if needs_date_backfill(document):
+                    start_date, end_date = reservation_dates(document)
+                    changes.update(reservation_date_fields(start_date, end_date))
+                if changes:
+                    operations.append(("update", document["id"], changes))
+            if operations:
+                await self.reservations.batch_write(operations)
+                updated += len(operations)
+            print(f"[ReservationService] Backfill: {len(documents)} lidas, {len(operations)} atualizadas")
+            last_id = documents[-1]["id"]
+            if len(documents) < batch_size:
+                break
+        print(f"[OK] [ReservationService] Backfill concluído: {updated} reservas atualizadas")
+        return updated
+
+    # Lookup individual (get_by_id e update)
+    async def _build_reservation_response(self, reservation: Dict[str, Any]) -> ReservationResponse:
+        await self._fill_missing_snapshots([reservation])
+        return self._assemble_response(reservation)
+
 
 # Instância global do serviço
 reservation_service = ReservationService()
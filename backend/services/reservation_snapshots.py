@@ -0,0 +1,109 @@
+"""
+Campos de exibição denormalizados nas reservas.
+
+Título, tipo, local e imagens da propriedade e nome/email do estudante e do
+anunciante são copiados para o documento da reserva ao criá-la, então listar
+reservas é uma única consulta, sem buscar propriedades e usuários. Quando uma
+propriedade ou um perfil muda, ``reservation_snapshots`` propaga os novos
+valores para as reservas ativas que ainda não terminaram, página a página, em
+escritas em lote (só as que mudaram); o histórico mantém os valores da época.
+Reservas anteriores aos snapshots são preenchidas por ``backfill_reservations.py``.
+"""
+
+from typing import Any, Dict, List
+
+from repositories.base import QueryFilter
+from repositories.factory import get_repository
+from utils.reservation_utils import ReservationStatus, today_ordinal
+
+# Reservas lidas (e atualizadas num batch) por página da propagação
+SYNC_PAGE_SIZE = 400
+
+# Campo na reserva -> campo no documento da propriedade
+PROPERTY_FIELDS = {
+    "property_title": "title",
+    "property_type": "type",
+    "property_location": "location",
+    "property_images": "images",
+}
+SNAPSHOT_FIELDS = (
+    *PROPERTY_FIELDS,
+    "student_name", "student_email",
+    "advertiser_name", "advertiser_email",
+)
+
+
+def property_snapshot(property_data: Dict[str, Any]) -> Dict[str, Any]:
+    snapshot = {field: property_data.get(source) for field, source in PROPERTY_FIELDS.items()}
+    snapshot["property_images"] = snapshot["property_images"] or []
+    return snapshot
+
+
+def student_snapshot(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {"student_name": user_data.get("name"), "student_email": user_data.get("email")}
+
+
+def advertiser_snapshot(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "advertiser_name": user_data.get("name") or user_data.get("company_name"),
+        "advertiser_email": user_data.get("email"),
+    }
+
+
+def reservation_snapshot(
+    property_data: Dict[str, Any], student_data: Dict[str, Any], advertiser_data: Dict[str, Any]
+) -> Dict[str, Any]:
+    return {**property_snapshot(property_data), **student_snapshot(student_data), **advertiser_snapshot(advertiser_data)}
+
+
+def has_snapshot(reservation: Dict[str, Any]) -> bool:
+    return all(field in reservation for field in SNAPSHOT_FIELDS)
+
+
+class ReservationSnapshotUpdater:
+    def __init__(self):
+        self.reservations = get_repository("reservations")
+
+        #Propaga título/tipo/local/imagens da propriedade para as suas reservas
+    async def sync_property(self, property_id: str, property_data: Dict[str, Any]) -> int:
+        return await self._sync(("property_id", "==", property_id), property_snapshot(property_data))
+
+        #Propaga nome/email do usuário para as reservas em que ele é estudante ou anunciante
+    async def sync_user(self, user_id: str, user_data: Dict[str, Any]) -> int:
+        return (
+            await self._sync(("student_id", "==", user_id), student_snapshot(user_data))
+            + await self._sync(("advertiser_id", "==", user_id), advertiser_snapshot(user_data))
+        )
+
+        #Percorre as reservas ativas não terminadas do dono (paginado por end_day + ID) aplicando o snapshot
+    async def _sync(self, owner_filter: QueryFilter, snapshot: Dict[str, Any]) -> int:
+        filters = [
+            owner_filter,
+            ("status", "in", ReservationStatus.active_statuses()),
+            ("end_day", ">=", today_ordinal()),
+        ]
+        order_by = [("end_day", "asc")]
+        updated = 0
+        start_after = None
+        while True:
+            page = await self.reservations.query(filters, order_by=order_by, limit=SYNC_PAGE_SIZE, start_after=start_after)
+            updated += await self._apply(page, snapshot)
+            if len(page) < SYNC_PAGE_SIZE:
+                return updated
+            start_after = [page[-1]["end_day"], page[-1]["id"]]
+
+    async def _apply(self, reservations: List[Dict[str, Any]], snapshot: Dict[str, Any]) -> int:
+        operations = []
+        for reservation in reservations:
+            changed = {field: value for field, value in snapshot.items() if reservation.get(field) != value}
+            # Reservas anteriores aos snapshots são preenchidas pelo backfill
+            if changed and has_snapshot(reservation):
+                operations.append(("update", reservation["id"], changed))
+        if operations:
+            await self.reservations.batch_write(operations)
+            print(f"[ReservationSnapshots] {len(operations)} reservas atualizadas")
+        return len(operations)
+
+
+# Instância global do serviço
+reservation_snapshots = ReservationSnapshotUpdater()
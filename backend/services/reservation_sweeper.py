@@ -0,0 +1,146 @@
+"""
+Job em processo que expira reservas pendentes sem resposta do anunciante.
+
+A cada ``RESERVATION_SWEEP_INTERVAL`` segundos, reservas ``pending`` criadas há
+mais de ``PENDING_RESERVATION_MAX_AGE_HOURS`` horas, ou cuja data de início já
+passou, são rejeitadas pelo sistema (com ``expired_at``) em blocos
+transacionais que também liberam as datas no calendário da propriedade.
+
+Com vários workers, só o que detém o lease em ``maintenance/reservation_sweeper``
+varre. O mesmo documento guarda o checkpoint (cursor) de cada critério, então
+uma varredura interrompida continua de onde parou.
+"""
+
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from repositories.base import QueryFilter, QueryOrder, Transaction
+from repositories.factory import get_repository
+from services.reservation_service import reservation_service
+from utils.pagination import InvalidCursorError, cursor_for_document, decode_cursor
+from utils.reservation_utils import ReservationStatus, day_filters
+
+SWEEPER_ID = "reservation_sweeper"
+# Reservas lidas por página da varredura
+SWEEP_PAGE_SIZE = 200
+
+
+class ReservationSweeper:
+    def __init__(self):
+        self.reservations = get_repository("reservations")
+        self.state = get_repository("maintenance")
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None and settings.RESERVATION_SWEEP_INTERVAL > 0:
+            self._task = asyncio.create_task(self._run())
+            print(f"[ReservationSweeper] Agendado a cada {settings.RESERVATION_SWEEP_INTERVAL}s")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"[ERROR] [ReservationSweeper] Erro na varredura: {e}")
+            await asyncio.sleep(settings.RESERVATION_SWEEP_INTERVAL)
+
+        #Critérios de expiração: (nome do checkpoint, filtro, ordenação)
+    def _rules(self, now: datetime) -> List[Tuple[str, QueryFilter, List[QueryOrder]]]:
+        age_cutoff = now - timedelta(hours=settings.PENDING_RESERVATION_MAX_AGE_HOURS)
+        rules = [("created_at", ("created_at", "<", age_cutoff), [("created_at", "asc")])]
+        # Início já passou (dia em UTC): pelo dia ordinal e, até o backfill, pela data ISO em texto
+        for field, op, value in day_filters("start", "<", now.date()):
+            rules.append((field, (field, op, value), [(field, "asc")]))
+        return rules
+
+        #Executa uma varredura completa (se este worker obtiver o lease); retorna quantas expirou
+    async def sweep(self) -> int:
+        if not await self._acquire_lease():
+            return 0
+        now = datetime.utcnow()
+        expired = 0
+        for name, rule_filter, order_by in self._rules(now):
+            expired += await self._sweep_rule(name, rule_filter, order_by)
+        await self.state.update(SWEEPER_ID, {"last_run_at": now, "lease_until": None})
+        if expired:
+            print(f"[OK] [ReservationSweeper] {expired} reservas pendentes expiradas")
+        return expired
+
+    async def _sweep_rule(self, name: str, rule_filter: QueryFilter, order_by: List[QueryOrder]) -> int:
+        checkpoint_field = f"checkpoints.{name}"
+        state = await self.state.get(SWEEPER_ID) or {}
+        cursor = (state.get("checkpoints") or {}).get(name)
+        try:
+            start_after = decode_cursor(cursor, order_by) if cursor else None
+        except InvalidCursorError:
+            start_after = None
+
+        expired = 0
+        while True:
+            page = await self.reservations.query(
+                [("status", "==", ReservationStatus.PENDING.value), rule_filter],
+                order_by=order_by,
+                limit=SWEEP_PAGE_SIZE,
+                start_after=start_after,
+            )
+            if not page:
+                break
+            expired += await reservation_service.expire_pending_reservations(page)
+            # Checkpoint após cada lote; o lease é renovado junto
+            cursor = cursor_for_document(page[-1], order_by)
+            start_after = decode_cursor(cursor, order_by)
+            await self.state.update(SWEEPER_ID, {
+                checkpoint_field: cursor,
+                "lease_until": datetime.utcnow() + self._lease_duration(),
+            })
+            if len(page) < SWEEP_PAGE_SIZE:
+                break
+
+        # Passada completa: a próxima começa do início (novas reservas vencidas entram atrás do cursor)
+        await self.state.update(SWEEPER_ID, {checkpoint_field: None})
+        return expired
+
+    @staticmethod
+    def _lease_duration() -> timedelta:
+        return timedelta(seconds=max(settings.RESERVATION_SWEEP_INTERVAL, 60) * 2)
+
+        #Lease entre workers: só um varre por vez; expira sozinho se o worker morrer
+    async def _acquire_lease(self) -> bool:
+        async def acquire(transaction: Transaction) -> bool:
+            state = await transaction.get(self.state, SWEEPER_ID)
+            now = datetime.utcnow()
+            lease_until = (state or {}).get("lease_until")
+            if state and lease_until and _naive(lease_until) > now and state.get("lease_owner") != self.owner:
+                return False
+            lease: Dict[str, Any] = {"lease_owner": self.owner, "lease_until": now + self._lease_duration()}
+            if state is None:
+                transaction.set(self.state, SWEEPER_ID, {"id": SWEEPER_ID, "checkpoints": {}, **lease})
+            else:
+                transaction.update(self.state, SWEEPER_ID, lease)
+            return True
+
+        # Fora de transaction_stats: o lease não é contenção de reservas
+        return await self.state.run_transaction(acquire, record_stats=False)
+
+
+def _naive(value: datetime) -> datetime:
+    # O Firestore devolve datetimes com fuso (UTC); as comparações aqui são em UTC sem fuso
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+# Instância global do serviço
+reservation_sweeper = ReservationSweeper()
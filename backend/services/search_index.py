@@ -0,0 +1,147 @@
+"""
+Índice invertido para busca textual de propriedades.
+
+Normaliza o texto (minúsculas + remoção de acentos, "São Paulo" == "sao paulo"),
+tokeniza e ranqueia com BM25. Os documentos são adicionados/removidos um a um,
+então o índice acompanha o catálogo em memória sem reconstruções.
+"""
+
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+# Campos indexados e o peso de cada um (o título conta em dobro)
+SEARCH_FIELDS = {"title": 2, "description": 1, "location": 1, "university": 1, "amenities": 1}
+
+STOP_WORDS = {"a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na", "nos", "nas", "com", "para", "por", "um", "uma"}
+
+# Parâmetros usuais do BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Máximo de termos do vocabulário considerados ao expandir o prefixo do último termo
+MAX_PREFIX_EXPANSIONS = 50
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def fold_text(text: str) -> str:
+    """Minúsculas sem acentos: "Ar-Condicionado Família" -> "ar-condicionado familia"."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_PATTERN.findall(fold_text(text)) if token not in STOP_WORDS]
+
+
+def document_terms(document: Dict[str, Any]) -> Counter:
+    """Frequência ponderada dos termos dos campos de busca de um documento."""
+    terms: Counter = Counter()
+    for field, weight in SEARCH_FIELDS.items():
+        value = document.get(field)
+        if not value:
+            continue
+        texts: Iterable[str] = value if isinstance(value, list) else [value]
+        for text in texts:
+            for token in tokenize(str(text)):
+                terms[token] += weight
+    return terms
+
+
+def search_terms(document: Dict[str, Any]) -> List[str]:
+    """Termos distintos do documento, gravados como ``search_terms``: sem o catálogo,
+    a busca vira um ``array_contains_all`` no banco (palavras inteiras, sem BM25)."""
+    return sorted(document_terms(document))
+
+
+def query_terms(text: str) -> List[str]:
+    return list(dict.fromkeys(tokenize(text)))
+
+
+class InvertedIndex:
+    def __init__(self):
+        # termo -> {doc_id: frequência}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._total_length = 0
+        # Vocabulário ordenado para expandir prefixos; refeito sob demanda
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: str, document: Dict[str, Any]) -> None:
+        self.remove(doc_id)
+        terms = document_terms(document)
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._vocabulary_dirty = True
+            postings[doc_id] = frequency
+        length = sum(terms.values())
+        self._doc_terms[doc_id] = list(terms)
+        self._lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: str) -> None:
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._doc_terms.pop(doc_id, []):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                self._vocabulary_dirty = True
+
+    def _expand(self, token: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [token] if token in self._postings else []
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        start = bisect_left(self._vocabulary, token)
+        expansions = []
+        for term in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            expansions.append(term)
+        return expansions
+
+    def search(self, text: str) -> Dict[str, float]:
+        """Pontuação BM25 dos documentos que contêm todos os termos da busca.
+
+        O último termo também casa por prefixo ("pamp" encontra "pampulha").
+        """
+        tokens = query_terms(text)
+        if not tokens or not self._lengths:
+            return {}
+
+        total_docs = len(self._lengths)
+        average_length = self._total_length / total_docs or 1
+        scores: Dict[str, float] = {}
+        for position, token in enumerate(tokens):
+            token_scores: Dict[str, float] = {}
+            for term in self._expand(token, prefix=position == len(tokens) - 1):
+                postings = self._postings[term]
+                idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc_id] / average_length)
+                    score = idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                    token_scores[doc_id] = max(token_scores.get(doc_id, 0.0), score)
+            # Semântica "E": o documento precisa casar com todos os termos
+            if position == 0:
+                scores = token_scores
+            else:
+                scores = {doc_id: scores[doc_id] + score for doc_id, score in token_scores.items() if doc_id in scores}
+            if not scores:
+                return {}
+        return {doc_id: round(score, 6) for doc_id, score in scores.items()}
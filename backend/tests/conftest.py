@@ -0,0 +1,25 @@
+"""
+Configuração comum dos testes: backend de dados e cache em memória do processo.
+"""
+
+import os
+
+# Antes de qualquer import de config.settings
+os.environ.setdefault("DATA_BACKEND", "memory")
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ.setdefault("PROPERTY_CATALOG_ENABLED", "false")
+os.environ.setdefault("RESERVATION_SWEEP_INTERVAL", "0")
+
+import pytest
+
+from repositories import memory_repository
+
+
+@pytest.fixture(autouse=True)
+def clean_store():
+    """Cada teste começa com as coleções vazias (os repositórios guardam referência aos dicts)."""
+    for documents in memory_repository._STORE.values():
+        documents.clear()
+    yield
+    for documents in memory_repository._STORE.values():
+        documents.clear()
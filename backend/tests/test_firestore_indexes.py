@@ -0,0 +1,26 @@
+from generate_firestore_indexes import INDEXES_PATH, build_indexes, render_indexes
+
+
+def index_fields(collection):
+    return [
+        [(field["fieldPath"], field.get("order") or field.get("arrayConfig")) for field in index["fields"]]
+        for index in build_indexes()["indexes"] if index["collectionGroup"] == collection
+    ]
+
+
+def test_indexes_file_matches_generator():
+    assert INDEXES_PATH.read_text(encoding="utf-8") == render_indexes()
+
+
+def test_listing_sort_with_filters_has_index():
+    assert [
+        ("type", "ASCENDING"), ("is_active", "ASCENDING"), ("price", "DESCENDING"), ("distance_meters", "ASCENDING")
+    ] in index_fields("properties")
+    assert [
+        ("search_terms", "CONTAINS"), ("is_active", "ASCENDING"), ("rating", "DESCENDING"), ("created_at", "DESCENDING")
+    ] in index_fields("properties")
+
+
+def test_single_field_queries_use_automatic_indexes():
+    for fields in index_fields("properties") + index_fields("reservations"):
+        assert len(fields) > 1
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException, Response
+
+from models.property import FilterState
+from repositories.factory import get_repository
+from services.property_service import PropertyService
+from utils.pagination import InvalidCursorError, cursor_for_document, decode_cursor, encode_cursor, split_page
+
+ORDER = [("created_at", "desc")]
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+async def seed_properties(count, **overrides):
+    properties = get_repository("properties")
+    for i in range(count):
+        await properties.set(f"p{i:02d}", {
+            "id": f"p{i:02d}", "owner_id": "owner", "title": f"Casa {i}", "type": "quarto",
+            "price": 500.0, "created_at": NOW - timedelta(minutes=i), "is_active": True,
+            "amenities": [], "rating": 0.0, **overrides,
+        })
+
+
+def test_cursor_round_trip_keeps_datetimes():
+    token = encode_cursor([NOW, "p01"], ORDER)
+    assert decode_cursor(token, ORDER) == [NOW, "p01"]
+
+
+def test_cursor_for_document_uses_order_values_and_id():
+    document = {"id": "p07", "price": 900.0, "created_at": NOW}
+    assert decode_cursor(cursor_for_document(document, [("price", "asc")]), [("price", "asc")]) == [900.0, "p07"]
+
+
+def test_cursor_from_other_order_is_rejected():
+    token = encode_cursor([NOW, "p01"], ORDER)
+    with pytest.raises(InvalidCursorError, match="outra ordenação"):
+        decode_cursor(token, [("price", "asc")])
+
+
+@pytest.mark.parametrize("token", ["nao-e-base64!", encode_cursor(["so-um-valor"], []) + "x", "e30"])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, ORDER)
+
+
+def test_split_page_only_returns_cursor_when_there_is_more():
+    documents = [{"id": f"d{i}", "created_at": NOW} for i in range(3)]
+    assert split_page(documents[:2], 2, ORDER) == (documents[:2], None)
+    page, cursor = split_page(documents, 2, ORDER)
+    assert page == documents[:2]
+    assert decode_cursor(cursor, ORDER) == [NOW, "d1"]
+
+
+async def test_ties_are_broken_by_id_across_pages():
+    # Mesmo preço e mesma data: só o ID ordena, e nenhuma página repete ou pula documentos
+    await seed_properties(7, created_at=NOW)
+    service = PropertyService()
+    seen, cursor = [], None
+    while True:
+        result = await service.get_properties(per_page=3, filters=FilterState(sort_by="menor-preco"), cursor=cursor)
+        seen += [p["id"] for p in result["properties"]]
+        cursor = result["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [f"p{i:02d}" for i in range(7)]
+
+
+async def test_exactly_full_last_page_has_no_next_cursor():
+    await seed_properties(4)
+    service = PropertyService()
+    first = await service.get_properties(per_page=2)
+    assert [p["id"] for p in first["properties"]] == ["p00", "p01"]
+    second = await service.get_properties(per_page=2, cursor=first["next_cursor"])
+    assert [p["id"] for p in second["properties"]] == ["p02", "p03"]
+    assert second["next_cursor"] is None
+    assert second["total"] == 4
+
+
+async def test_listing_with_cursor_from_other_sort_returns_400():
+    from routers.properties import list_properties
+
+    await seed_properties(3)
+    first = await PropertyService().get_properties(per_page=1)
+    with pytest.raises(HTTPException) as error:
+        await list_properties(
+            response=Response(), page=1, per_page=1, property_type=None, max_price=None, location=None,
+            max_distance=None, sort_by="menor-preco", search_term=None, amenities=None,
+            cursor=first["next_cursor"], start_date=None, end_date=None, authorization=None,
+        )
+    assert error.value.status_code == 400
+
+
+async def test_database_fallback_skips_inactive_properties():
+    # Sem o catálogo (conftest), listagem e busca aplicam o mesmo recorte de ativas no banco
+    await seed_properties(3)
+    await get_repository("properties").update("p01", {"is_active": False})
+    service = PropertyService()
+    listed = await service.get_properties(per_page=10)
+    assert [p["id"] for p in listed["properties"]] == ["p00", "p02"]
+    assert listed["total"] == 2
+    searched = await service.search_properties(None, per_page=10)
+    assert {p["id"] for p in searched["properties"]} == {"p00", "p02"}
+    assert searched["total"] == 2
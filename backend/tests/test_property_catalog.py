@@ -0,0 +1,92 @@
+import pytest
+
+from services.property_catalog import PropertyCatalog, price_bucket
+
+
+def make_catalog(*documents):
+    catalog = PropertyCatalog()
+    catalog.apply_changes([(document["id"], document) for document in documents])
+    return catalog
+
+
+def prop(doc_id, **fields):
+    return {"id": doc_id, "type": "quarto", "university": "UFMG", "amenities": [], "price": 500.0, **fields}
+
+
+async def ids(catalog, filters=None, **kwargs):
+    page, total, _ = await catalog.find(filters, order_by=[("price", "asc")], **kwargs)
+    return [document["id"] for document in page], total
+
+
+async def test_bitmap_intersection_requires_every_value():
+    catalog = make_catalog(
+        prop("a", amenities=["wifi", "mobiliado"], price=1),
+        prop("b", amenities=["wifi"], price=2),
+        prop("c", amenities=["wifi", "mobiliado"], type="kitnet", price=3),
+    )
+    assert await ids(catalog, [("amenities", "array_contains_all", ["wifi", "mobiliado"])]) == (["a", "c"], 2)
+    assert await ids(catalog, [
+        ("amenities", "array_contains_all", ["wifi", "mobiliado"]), ("type", "==", "kitnet"),
+    ]) == (["c"], 1)
+    assert await ids(catalog, [("amenities", "array_contains_all", ["piscina"])]) == ([], 0)
+
+
+async def test_non_bitmap_filters_are_applied_after_the_intersection():
+    catalog = make_catalog(prop("a", price=400.0), prop("b", price=900.0), prop("c", type="kitnet", price=300.0))
+    assert await ids(catalog, [("type", "==", "quarto"), ("price", "<=", 500)]) == (["a"], 1)
+
+
+async def test_ordinals_are_reused_after_removal():
+    catalog = make_catalog(prop("a", amenities=["wifi"]), prop("b", amenities=["wifi"]))
+    ordinal_a = catalog._ordinals["a"]
+    catalog.apply_changes([("a", None)])
+    assert await ids(catalog, [("amenities", "array_contains_all", ["wifi"])]) == (["b"], 1)
+
+    catalog.apply_changes([("c", prop("c", amenities=["pets"]))])
+    assert catalog._ordinals["c"] == ordinal_a
+    # O bit reaproveitado não herda as comodidades do documento removido
+    assert await ids(catalog, [("amenities", "array_contains_all", ["wifi"])]) == (["b"], 1)
+    assert await ids(catalog, [("amenities", "array_contains_all", ["pets"])]) == (["c"], 1)
+    assert len(catalog._ordinals) + len(catalog._free_ordinals) == 2
+
+
+async def test_inactive_documents_are_not_listed():
+    catalog = make_catalog(prop("a"), prop("b", is_active=False))
+    assert await ids(catalog) == (["a"], 1)
+    catalog.apply_changes([("a", prop("a", is_active=False))])
+    assert await ids(catalog) == ([], 0)
+
+
+async def test_facets_count_the_whole_result_not_the_page():
+    catalog = make_catalog(
+        prop("a", type="quarto", university="UFMG", amenities=["wifi", "pets"], price=450.0),
+        prop("b", type="kitnet", university="UFMG", amenities=["wifi"], price=700.0),
+        prop("c", type="kitnet", university="PUC", amenities=["wifi"], price=1300.0),
+        prop("d", type="apartamento", university="PUC", amenities=["garagem"], price=1000.0),
+    )
+    page, total, facets = await catalog.find([("amenities", "array_contains_all", ["wifi"])], limit=1)
+    assert len(page) == 1 and total == 3
+    assert facets == {
+        "types": {"quarto": 1, "kitnet": 2},
+        "price_ranges": {"ate-500": 1, "500-800": 1, "800-1200": 0, "acima-1200": 1},
+        "universities": {"UFMG": 2, "PUC": 1},
+        "amenities": {"wifi": 3, "pets": 1},
+    }
+
+
+async def test_text_search_ranks_by_relevance_and_excludes_ids():
+    catalog = make_catalog(
+        prop("title", title="Quarto Pampulha", description="perto da UFMG"),
+        prop("description", title="Quarto", description="Pampulha"),
+        prop("other", title="Kitnet Savassi"),
+    )
+    page, total, _ = await catalog.find(text="pampulha")
+    assert [document["id"] for document in page] == ["title", "description"]
+    assert total == 2
+    page, total, _ = await catalog.find(text="pampulha", exclude_ids={"title"})
+    assert [document["id"] for document in page] == ["description"]
+
+
+@pytest.mark.parametrize("price, label", [(500, "ate-500"), (500.01, "500-800"), (1200, "800-1200"), (5000, "acima-1200"), (None, None)])
+def test_price_bucket_bounds(price, label):
+    assert price_bucket(price) == label
@@ -0,0 +1,64 @@
+from services.search_index import InvertedIndex, fold_text, query_terms, search_terms, tokenize
+
+
+def build_index(**documents):
+    index = InvertedIndex()
+    for doc_id, document in documents.items():
+        index.add(doc_id, document)
+    return index
+
+
+def test_fold_text_removes_accents_and_case():
+    assert fold_text("São Paulo AÇAÍ") == "sao paulo acai"
+
+
+def test_tokenize_folds_and_drops_stop_words():
+    assert tokenize("Apartamento no Centro de São Paulo") == ["apartamento", "centro", "sao", "paulo"]
+
+
+def test_accent_insensitive_match():
+    index = build_index(sp={"title": "Quarto em São Paulo"}, bh={"title": "Quarto em Belo Horizonte"})
+    assert set(index.search("sao paulo")) == {"sp"}
+    assert set(index.search("SÃO PAULO")) == {"sp"}
+
+
+def test_all_terms_are_required():
+    index = build_index(
+        both={"title": "Kitnet mobiliada Pampulha"},
+        one={"title": "Kitnet Savassi"},
+    )
+    assert set(index.search("kitnet pampulha")) == {"both"}
+    assert index.search("kitnet lourdes") == {}
+
+
+def test_prefix_expansion_only_on_last_term():
+    index = build_index(pampulha={"title": "Casa Pampulha"}, pampa={"title": "Pampa casa"})
+    assert set(index.search("casa pamp")) == {"pampulha", "pampa"}
+    # Termos que não são o último exigem a palavra inteira
+    assert index.search("pamp casa") == {}
+
+
+def test_bm25_ranks_title_and_rarer_terms_higher():
+    index = build_index(
+        title={"title": "Pampulha", "description": "quarto"},
+        description={"title": "Quarto", "description": "pampulha"},
+        other={"title": "Quarto", "description": "centro"},
+    )
+    scores = index.search("pampulha")
+    assert set(scores) == {"title", "description"}
+    assert scores["title"] > scores["description"]
+
+
+def test_removed_documents_leave_the_index():
+    index = build_index(a={"title": "Pampulha"}, b={"title": "Pampulha"})
+    index.remove("a")
+    assert set(index.search("pampulha")) == {"b"}
+    assert len(index) == 1
+    index.remove("b")
+    assert index.search("pamp") == {}
+
+
+def test_stored_search_terms_match_query_terms():
+    document = {"title": "Quarto em São Paulo", "amenities": ["Wi-Fi"], "university": "USP"}
+    assert search_terms(document) == ["fi", "paulo", "quarto", "sao", "usp", "wi"]
+    assert set(query_terms("são paulo")) <= set(search_terms(document))
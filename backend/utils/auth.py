@@ -1,6 +1,6 @@
 
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Union
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
@@ -13,6 +13,9 @@ from models.profile import StudentProfile, AdvertiserProfile
 security = HTTPBearer()
 profile_service = ProfileService()
 
+# Emissor dos tokens locais (AUTH_MODE=local), para não aceitar outros JWTs com a mesma chave
+LOCAL_TOKEN_ISSUER = "unireservas-local"
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     #Criar token JWT
@@ -27,6 +30,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def create_local_id_token(firebase_uid: str, user_id: str, expires_delta: Optional[timedelta] = None) -> str:
+    #Criar token local com os claims que a API lê do ID token do Firebase (uid)
+    if not settings.SECRET_KEY:
+        raise Exception("SECRET_KEY é obrigatória para emitir tokens locais")
+    return create_access_token({"sub": user_id, "uid": firebase_uid, "iss": LOCAL_TOKEN_ISSUER}, expires_delta)
+
+
+def verify_local_id_token(token: str) -> Dict[str, Any]:
+    #Verificar token local (AUTH_MODE=local); lança JWTError se inválido ou expirado
+    if not settings.SECRET_KEY:
+        raise JWTError("SECRET_KEY não configurada")
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM], issuer=LOCAL_TOKEN_ISSUER)
+    if not payload.get("uid"):
+        raise JWTError("uid ausente no token")
+    return payload
+
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     #Verificar e decodificar token JWT
     token = credentials.credentials
@@ -49,11 +69,11 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
         )
 
 
-def get_current_user(
+async def get_current_user(
     user_id: str = Depends(verify_token)
 ) -> Union[StudentProfile, AdvertiserProfile]:
     #$Obter usuário atual do token
-    user = profile_service.get_user_by_id(user_id)
+    user = await profile_service.get_user_by_id(user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
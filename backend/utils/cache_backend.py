@@ -0,0 +1,313 @@
+"""
+Cache compartilhado pelos workers do uvicorn, selecionado por ``settings.CACHE_BACKEND``.
+
+- "memory": LRU em processo (cada worker tem o seu; invalidação só local). Como
+  os outros workers não ficam sabendo das escritas, toda entrada expira em no
+  máximo ``CACHE_MEMORY_TTL`` segundos, qualquer que seja o TTL do namespace.
+- "redis": os valores ficam no Redis, visíveis para todos os workers, com uma
+  cópia curta em memória (L1) por worker. Toda escrita/remoção é publicada no
+  canal de invalidação e cada worker descarta a sua cópia L1 da chave. Se o
+  Redis ficar indisponível, o cache degrada para miss (que lê o banco); enquanto
+  o canal estiver fora, o L1 é ignorado (perderia invalidações) e a assinatura
+  é refeita com backoff.
+
+Os serviços usam ``cache_namespace(nome, ttl)`` e trabalham só com os IDs.
+"""
+
+import asyncio
+import copy
+import json
+import os
+import socket
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config.settings import settings
+from utils.cache import TTLCache
+
+# Recebe as chaves invalidadas (por este ou por outro worker)
+InvalidationListener = Callable[[List[str]], None]
+
+INVALIDATION_CHANNEL = "unireservas:cache:invalidate"
+# Espera (segundos) entre tentativas de reassinar o canal; dobra a cada falha até o máximo
+RESUBSCRIBE_BACKOFF = 1
+RESUBSCRIBE_MAX_BACKOFF = 30
+
+
+def _encode(value: Any) -> Any:
+    # Tipos que o JSON não representa viram objetos marcados ({"$dt": ...}), como nos cursores
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, tuple):
+        return {"$tuple": [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    return value
+
+
+def _decode_object(value: Dict[str, Any]) -> Any:
+    if len(value) == 1:
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$date" in value:
+            return date.fromisoformat(value["$date"])
+        if "$tuple" in value:
+            return tuple(value["$tuple"])
+    return value
+
+
+def dumps_value(value: Any) -> str:
+    """Serializa um valor do cache para o Redis (JSON; nunca pickle, que executaria código)."""
+    return json.dumps(_encode(value), ensure_ascii=False)
+
+
+def loads_value(raw: Any) -> Any:
+    return json.loads(raw, object_hook=_decode_object)
+
+
+class CacheBackend(ABC):
+    def __init__(self):
+        self._listeners: List[InvalidationListener] = []
+
+    def on_invalidate(self, listener: InvalidationListener) -> None:
+        self._listeners.append(listener)
+
+    def _notify_invalidated(self, keys: List[str]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(keys)
+            except Exception as e:
+                print(f"[WARNING] [Cache] Erro no listener de invalidação: {e}")
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def get(self, key: str) -> Optional[Any]:
+        return (await self.get_many([key])).get(key)
+
+    @abstractmethod
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Somente as chaves encontradas (e não expiradas)."""
+
+    @abstractmethod
+    async def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        ...
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self.set_many({key: value}, ttl)
+
+    @abstractmethod
+    async def delete(self, keys: List[str]) -> None:
+        """Remove as chaves em todos os workers."""
+
+
+class LocalCacheBackend(CacheBackend):
+    def __init__(self, max_size: int = 10000, max_ttl: Optional[float] = None):
+        super().__init__()
+        self._items = TTLCache(max_size=max_size)
+        self._max_ttl = max_ttl
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        found = {}
+        for key in keys:
+            value = self._items.get(key)
+            if value is not None:
+                # Cópia: quem lê pode alterar o dicionário sem corromper o cache
+                found[key] = copy.deepcopy(value)
+        return found
+
+    async def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        if self._max_ttl is not None:
+            ttl = min(ttl, self._max_ttl)
+        if ttl <= 0:
+            return
+        for key, value in items.items():
+            self._items.set(key, copy.deepcopy(value), ttl=ttl)
+
+    async def delete(self, keys: List[str]) -> None:
+        for key in keys:
+            self._items.delete(key)
+        self._notify_invalidated(keys)
+
+
+class RedisCacheBackend(CacheBackend):
+    def __init__(self, url: str, local_ttl: float = 30, local_max_size: int = 10000):
+        super().__init__()
+        import redis.asyncio as redis
+        from redis.exceptions import RedisError
+
+        # Health check periódico: uma conexão de pub/sub morta em silêncio também vira erro (e reassinatura)
+        self._redis = redis.from_url(url, health_check_interval=10)
+        self._redis_error = RedisError
+        # Identifica as mensagens publicadas por este worker (já tratadas localmente)
+        self._origin = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = LocalCacheBackend(max_size=local_max_size)
+        self._local_ttl = local_ttl
+        self._subscriber: Optional[asyncio.Task] = None
+        # L1 só é confiável enquanto o canal de invalidação está assinado
+        self._subscribed = False
+
+    async def start(self) -> None:
+        if self._subscriber is None:
+            self._subscriber = asyncio.create_task(self._subscribe_forever())
+
+    async def stop(self) -> None:
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            self._subscriber = None
+        self._subscribed = False
+        await self._redis.aclose()
+
+        #Mantém a assinatura do canal: se cair (ou o Redis não subir), tenta de novo com backoff
+    async def _subscribe_forever(self) -> None:
+        backoff = RESUBSCRIBE_BACKOFF
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Invalidações perdidas enquanto o canal estava fora: descarta o L1 inteiro
+                self._local._items.clear()
+                self._subscribed = True
+                backoff = RESUBSCRIBE_BACKOFF
+                print("[OK] [Cache] Redis conectado, ouvindo invalidações")
+                await self._listen(pubsub)
+            except asyncio.CancelledError:
+                self._subscribed = False
+                await pubsub.aclose()
+                raise
+            except Exception as e:
+                print(f"[WARNING] [Cache] Canal de invalidação indisponível, nova tentativa em {backoff}s: {e}")
+            self._subscribed = False
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RESUBSCRIBE_MAX_BACKOFF)
+
+    async def _listen(self, pubsub) -> None:
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            payload = json.loads(message["data"])
+            if payload.get("origin") == self._origin:
+                continue
+            keys = payload["keys"]
+            for key in keys:
+                self._local._items.delete(key)
+            self._notify_invalidated(keys)
+        raise ConnectionError("assinatura encerrada")
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        # Sem o canal o L1 pode estar desatualizado: lê direto do Redis
+        found = await self._local.get_many(keys) if self._subscribed else {}
+        missing = [key for key in keys if key not in found]
+        if missing:
+            remote = await self._get_remote(missing)
+            if remote and self._subscribed:
+                await self._local.set_many(remote, self._local_ttl)
+            found.update(remote)
+        return found
+
+    async def _get_remote(self, keys: List[str]) -> Dict[str, Any]:
+        try:
+            raws = await self._redis.mget(keys)
+        except self._redis_error as e:
+            print(f"[WARNING] [Cache] Redis indisponível na leitura, usando o banco: {e}")
+            return {}
+        remote = {}
+        for key, raw in zip(keys, raws):
+            if raw is None:
+                continue
+            try:
+                remote[key] = loads_value(raw)
+            except ValueError:
+                # Valor de outra versão (ou corrompido): tratado como miss
+                print(f"[WARNING] [Cache] Valor ilegível no Redis ignorado: {key}")
+        return remote
+
+    async def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        if not items:
+            return
+        if self._subscribed:
+            await self._local.set_many(items, min(ttl, self._local_ttl))
+        try:
+            payloads = {key: dumps_value(value) for key, value in items.items()}
+        except TypeError as e:
+            print(f"[WARNING] [Cache] Valor não serializável fora do Redis: {e}")
+            return
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key, payload in payloads.items():
+                    pipe.set(key, payload, px=int(ttl * 1000))
+                await pipe.execute()
+        except self._redis_error as e:
+            print(f"[WARNING] [Cache] Redis indisponível na escrita: {e}")
+
+    async def delete(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        # Evicção local imediata (ler a própria escrita); os outros workers são avisados pelo canal
+        for key in keys:
+            self._local._items.delete(key)
+        self._notify_invalidated(keys)
+        try:
+            await self._redis.delete(*keys)
+            await self._redis.publish(INVALIDATION_CHANNEL, json.dumps({"origin": self._origin, "keys": keys}))
+        except self._redis_error as e:
+            # As cópias dos outros workers expiram pelo TTL curto do L1
+            print(f"[WARNING] [Cache] Redis indisponível na invalidação de {keys}: {e}")
+
+
+class CacheNamespace:
+    """Visão de um backend com prefixo e TTL fixos (ex.: "profiles", 300s)."""
+
+    def __init__(self, backend: CacheBackend, name: str, ttl: float):
+        self.backend = backend
+        self.name = name
+        self.ttl = ttl
+
+    def key(self, item_id: str) -> str:
+        return f"{self.name}:{item_id}"
+
+    async def get(self, item_id: str) -> Optional[Any]:
+        return await self.backend.get(self.key(item_id))
+
+    async def get_many(self, item_ids: Iterable[str]) -> Dict[str, Any]:
+        keys = {self.key(item_id): item_id for item_id in item_ids}
+        found = await self.backend.get_many(list(keys))
+        return {keys[key]: value for key, value in found.items()}
+
+    async def set(self, item_id: str, value: Any) -> None:
+        await self.backend.set(self.key(item_id), value, self.ttl)
+
+    async def set_many(self, values: Dict[str, Any]) -> None:
+        await self.backend.set_many({self.key(item_id): value for item_id, value in values.items()}, self.ttl)
+
+    async def delete(self, *item_ids: str) -> None:
+        await self.backend.delete([self.key(item_id) for item_id in item_ids])
+
+
+def _create_cache_backend() -> CacheBackend:
+    backend = settings.CACHE_BACKEND.lower()
+    if backend == "memory":
+        return LocalCacheBackend(max_ttl=settings.CACHE_MEMORY_TTL)
+    if backend == "redis":
+        return RedisCacheBackend(settings.REDIS_URL, local_ttl=settings.CACHE_LOCAL_TTL)
+    raise ValueError(f"CACHE_BACKEND inválido: {settings.CACHE_BACKEND} (use memory ou redis)")
+
+
+cache_backend = _create_cache_backend()
+
+
+#Retorna o namespace de cache de um tipo de dado (perfis, propriedades, permissões...)
+def cache_namespace(name: str, ttl: float) -> CacheNamespace:
+    return CacheNamespace(cache_backend, name, ttl)
@@ -0,0 +1,33 @@
+import re
+import unicodedata
+from typing import Optional
+
+# Número com milhar ("1.500", "12.000,5") ou decimal com ponto/vírgula ("1.5", "1,5"), e a unidade opcional
+_THOUSANDS_PATTERN = r"[1-9]\d{0,2}(?:\.\d{3})+(?:,\d+)?"
+_DISTANCE_PATTERN = re.compile(
+    rf"^\s*({_THOUSANDS_PATTERN}|\d+(?:[.,]\d+)?)\s*(km|quilometros?|kilometros?|m|metros?)?\s*$"
+)
+
+
+def parse_distance_meters(value: Optional[str]) -> Optional[int]:
+    """Converte a distância livre do anúncio ("500m", "1,5 km", "800") em metros.
+
+    Número sem unidade é tratado como metros, como no frontend. Retorna None
+    quando o texto não é reconhecido (ex.: "10 min a pé").
+    """
+    if value is None:
+        return None
+    text = unicodedata.normalize("NFKD", str(value).lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    match = _DISTANCE_PATTERN.match(text)
+    if not match:
+        return None
+    digits = match.group(1)
+    if re.fullmatch(_THOUSANDS_PATTERN, digits):
+        # Ponto antes de um grupo de 3 dígitos é separador de milhar
+        digits = digits.replace(".", "")
+    number = float(digits.replace(",", "."))
+    unit = match.group(2) or "m"
+    if unit.startswith("k") or unit.startswith("q"):
+        number *= 1000
+    return int(round(number))
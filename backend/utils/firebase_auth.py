@@ -2,12 +2,24 @@
 
 from fastapi import Depends, HTTPException, Header, status
 from typing import Optional, Dict, Any, Union
+import hashlib
+import time
 import firebase_admin
 from firebase_admin import auth as fb_auth
+from jose import JWTError
+from config.settings import settings
 from services.profile_service import ProfileService
 from models.profile import StudentProfile, AdvertiserProfile
+from utils.auth import verify_local_id_token
+from utils.cache import TTLCache
 
 
+# Claims de tokens já verificados, por hash do token, válidos até o "exp" do token.
+# Fica em memória de cada worker: só evita repetir a verificação RSA do mesmo token.
+_verified_tokens = TTLCache(max_size=10000, ttl=3600)
+
+profile_service = ProfileService()
+
 
 # Criação de usuario no Firebase Authentication
 def create_firebase_user(email: str, password: str, display_name: str) -> str:
@@ -46,13 +58,36 @@ def _extract_bearer_token(authorization: Optional[str]) -> str:
     return parts[1]
 
 
+def _verify_id_token_cached(token: str) -> Dict[str, Any]:
+    # Com checagem de revogação, cada requisição consulta o Firebase (o cache não se aplica)
+    if settings.FIREBASE_CHECK_REVOKED:
+        return fb_auth.verify_id_token(token, check_revoked=True, clock_skew_seconds=10)
+
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = _verified_tokens.get(token_hash)
+    if cached is not None:
+        return dict(cached)
+
+    # Adicionar tolerância para clock skew (10 segundos)
+    decoded = fb_auth.verify_id_token(token, clock_skew_seconds=10)
+    remaining = decoded.get("exp", 0) - time.time()
+    if remaining > 0:
+        _verified_tokens.set(token_hash, dict(decoded), ttl=remaining)
+    return decoded
+
+
 def verify_firebase_token(authorization: Optional[str] = Header(None)) -> Dict[str, Any]:
     
     try:
         token = _extract_bearer_token(authorization)
-        # Adicionar tolerância para clock skew (10 segundos)
-        decoded = fb_auth.verify_id_token(token, clock_skew_seconds=10)
+        if settings.AUTH_MODE == "local":
+            # Testes de carga: token HS256 emitido localmente, sem Firebase
+            return verify_local_id_token(token)
+        decoded = _verify_id_token_cached(token)
         return decoded
+    except JWTError as e:
+        print(f"[ERRO] Token local inválido: {e}")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
     except firebase_admin._auth_utils.InvalidIdTokenError:
         print("[ERRO] ID token invalido")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="ID token inválido")
@@ -72,7 +107,7 @@ def verify_firebase_token(authorization: Optional[str] = Header(None)) -> Dict[s
         )
 
 
-def get_current_user_firebase(
+async def get_current_user_firebase(
     token_data: Dict[str, Any] = Depends(verify_firebase_token),
 ):
     uid = token_data.get("uid")
@@ -82,8 +117,8 @@ def get_current_user_firebase(
             detail="UID ausente no token"
         )
 
-    profile_service = ProfileService()
-    user = profile_service.get_user_by_firebase_uid(uid)
+    # Perfil pelo UID com cache (invalidado em PUT/DELETE /api/profiles/me)
+    user = await profile_service.get_user_by_firebase_uid(uid)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
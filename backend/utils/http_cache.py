@@ -0,0 +1,23 @@
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+def document_etag(document: Dict[str, Any]) -> Optional[str]:
+    """ETag forte derivado do ID e do updated_at (ou created_at) do documento."""
+    version = document.get("updated_at") or document.get("created_at")
+    if version is None:
+        return None
+    if isinstance(version, datetime):
+        version = version.isoformat()
+    digest = hashlib.sha1(f"{document.get('id')}:{version}".encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Compara o cabeçalho If-None-Match com o ETag atual (comparação fraca, como pede o RFC 9110)."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
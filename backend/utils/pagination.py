@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from repositories.base import QueryOrder, get_field
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginação malformado ou adulterado."""
+
+
+def _order_signature(order_by: List[QueryOrder]) -> List[str]:
+    return [f"{field}:{direction}" for field, direction in order_by]
+
+
+def encode_cursor(values: List[Any], order_by: List[QueryOrder]) -> str:
+    """Gera um token opaco (base64 url-safe) com os valores do cursor e a ordenação a que pertencem."""
+    payload = {
+        "o": _order_signature(order_by),
+        "v": [{"$dt": v.isoformat()} if isinstance(v, datetime) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, order_by: List[QueryOrder]) -> List[Any]:
+    """Reverte ``encode_cursor``; lança InvalidCursorError se o token for inválido
+    ou tiver sido gerado para outra ordenação (ex.: o cliente trocou o sort_by)."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+        if not isinstance(values, list) or len(values) != len(order_by) + 1:
+            raise ValueError("quantidade de valores incompatível")
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError(f"Cursor inválido: {e}")
+    if payload.get("o") != _order_signature(order_by):
+        raise InvalidCursorError("Cursor inválido: gerado para outra ordenação")
+    return [
+        datetime.fromisoformat(v["$dt"]) if isinstance(v, dict) and "$dt" in v else v
+        for v in values
+    ]
+
+
+def cursor_for_document(document: Dict[str, Any], order_by: List[QueryOrder]) -> str:
+    """Cursor que retoma a consulta logo após ``document`` (valores de ordenação + ID)."""
+    return encode_cursor([get_field(document, field) for field, _ in order_by] + [document["id"]], order_by)
+
+
+def split_page(
+    documents: List[Dict[str, Any]], limit: int, order_by: List[QueryOrder]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Recebe o resultado de uma consulta com ``limit + 1``: o documento excedente só indica
+    que existe uma próxima página (a última página cheia não gera cursor)."""
+    if len(documents) <= limit:
+        return documents, None
+    page = documents[:limit]
+    return page, cursor_for_document(page[-1], order_by)
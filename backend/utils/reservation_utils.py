@@ -1,5 +1,6 @@
 from enum import Enum
-from datetime import date, datetime
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Tuple
 
 
 class ReservationStatus(str, Enum):
@@ -18,7 +19,53 @@ class ReservationStatus(str, Enum):
 
 
 def parse_iso_date(value: str | date) -> date:
-    """Converte string ISO 8601 ou objeto date para date."""
+    """Converte string ISO 8601, timestamp (datetime) ou objeto date para date."""
+    if isinstance(value, datetime):
+        return value.date()
     if isinstance(value, date):
         return value
     return datetime.fromisoformat(value).date()
+
+
+def date_to_timestamp(value: date) -> datetime:
+    """Meia-noite UTC do dia: o timestamp nativo gravado em start_date/end_date."""
+    return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+
+
+def today_ordinal() -> int:
+    """Dia atual em UTC como ordinal, na mesma base de start_day/end_day."""
+    return datetime.now(timezone.utc).date().toordinal()
+
+
+def day_filters(prefix: str, op: str, day: date) -> List[Tuple[str, str, Any]]:
+    """Filtro por dia nas duas formas: o ordinal (``<prefix>_day``) e, para reservas ainda
+    não migradas pelo backfill, a data ISO em texto (``<prefix>_date``). Cada forma é uma
+    consulta própria: no Firestore um filtro com valor em texto só alcança campos em texto."""
+    return [(f"{prefix}_day", op, day.toordinal()), (f"{prefix}_date", op, day.isoformat())]
+
+
+def reservation_date_fields(start_date: date, end_date: date) -> Dict[str, Any]:
+    """Campos de data gravados na reserva: timestamps nativos e o dia ordinal (inteiro) usado nos filtros."""
+    return {
+        "start_date": date_to_timestamp(start_date),
+        "end_date": date_to_timestamp(end_date),
+        "start_day": start_date.toordinal(),
+        "end_day": end_date.toordinal(),
+    }
+
+
+def reservation_dates(reservation: Dict[str, Any]) -> Tuple[date, date]:
+    """Início e fim da reserva; aceita documentos antigos (datas ISO em texto) até o backfill."""
+    if "start_day" in reservation and "end_day" in reservation:
+        return date.fromordinal(reservation["start_day"]), date.fromordinal(reservation["end_day"])
+    return parse_iso_date(reservation["start_date"]), parse_iso_date(reservation["end_date"])
+
+
+def needs_date_backfill(reservation: Dict[str, Any]) -> bool:
+    """Reserva ainda com datas em texto ou sem o dia ordinal."""
+    return (
+        "start_day" not in reservation
+        or "end_day" not in reservation
+        or isinstance(reservation.get("start_date"), str)
+        or isinstance(reservation.get("end_date"), str)
+    )
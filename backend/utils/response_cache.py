@@ -0,0 +1,86 @@
+"""
+Cache de respostas das listagens/buscas anônimas.
+
+As respostas são iguais para todos os visitantes com a mesma query string, então
+ficam guardadas por alguns segundos, chaveadas pelos parâmetros normalizados.
+Cada namespace ("properties", "listings") tem uma geração: uma escrita no
+serviço correspondente incrementa a geração em todos os workers (pelo canal de
+invalidação do cache_backend) e as entradas antigas deixam de ser encontradas
+(e saem pelo LRU/TTL), sem varrer o cache.
+"""
+
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import Response
+
+from config.settings import settings
+from utils.cache import TTLCache
+from utils.cache_backend import cache_backend
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted({_normalize(item) for item in value if item not in (None, "")}))
+    return value
+
+
+class ResponseCache:
+    def __init__(self, max_size: int = 2048, ttl: float = 30):
+        self.ttl = ttl
+        self._entries = TTLCache(max_size=max_size, ttl=ttl or 1)
+        self._generations: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def make_key(self, namespace: str, **params: Any) -> Tuple[Hashable, ...]:
+        """Chave estável: parâmetros vazios são descartados e a ordem (inclusive a das
+        listas, como amenities) não importa, então "?page=1&type=quarto" e
+        "?type=quarto&location=&page=1" geram a mesma chave."""
+        normalized = {name: _normalize(value) for name, value in params.items()}
+        items = tuple(sorted((name, value) for name, value in normalized.items() if value not in (None, "", ())))
+        return (namespace, self._generations.get(namespace, 0), items)
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        return self._entries.get(key)
+
+    def set(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        if self.enabled:
+            self._entries.set(key, value)
+
+    async def invalidate(self, namespace: str) -> None:
+        """Invalida o namespace em todos os workers (via backend de cache compartilhado)."""
+        await cache_backend.delete([f"responses:{namespace}"])
+
+    def _on_invalidated(self, keys: List[str]) -> None:
+        for key in keys:
+            if key.startswith("responses:"):
+                namespace = key.split(":", 1)[1]
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def set_public_cache_headers(response: Response) -> None:
+    """Permite que proxies (nginx) e o navegador reaproveitem a resposta anônima pelo mesmo TTL."""
+    if response_cache.enabled:
+        response.headers["Cache-Control"] = f"public, max-age={int(response_cache.ttl)}"
+    else:
+        response.headers["Cache-Control"] = "no-cache"
+    response.headers["Vary"] = "Authorization"
+
+
+def set_private_cache_headers(response: Response) -> None:
+    """Resposta personalizada (ex.: favoritos marcados): nunca em cache compartilhado."""
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["Vary"] = "Authorization"
+
+
+response_cache = ResponseCache(max_size=2048, ttl=settings.RESPONSE_CACHE_TTL)
+cache_backend.on_invalidate(response_cache._on_invalidated)
@@ -19,6 +19,7 @@
 import os
 import json
 import random
+import itertools
 import logging
 import datetime
 from locust import HttpUser, task, between, tag, events
@@ -37,6 +38,17 @@ BASE_URL = os.environ.get("LOCUST_BASE_URL", "http://localhost:8000")
 STUDENT_TOKEN = os.environ.get("STUDENT_TOKEN", " ")
 ADVERTISER_TOKEN = os.environ.get("ADVERTISER_TOKEN", " ")
 
+# Tokens locais (API com AUTH_MODE=local), gerados por backend/seed_load_test_users.py:
+# cada usuário virtual recebe um usuário distinto, em rodízio
+LOCUST_TOKENS_FILE = os.environ.get("LOCUST_TOKENS_FILE")
+STUDENT_TOKEN_POOL = None
+ADVERTISER_TOKEN_POOL = None
+if LOCUST_TOKENS_FILE:
+    with open(LOCUST_TOKENS_FILE, encoding="utf-8") as tokens_file:
+        _local_tokens = json.load(tokens_file)
+    STUDENT_TOKEN_POOL = itertools.cycle(_local_tokens["students"]) if _local_tokens.get("students") else None
+    ADVERTISER_TOKEN_POOL = itertools.cycle(_local_tokens["advertisers"]) if _local_tokens.get("advertisers") else None
+
 # Termos de busca para simular buscas reais
 SEARCH_TERMS = ["UFMG", "USP", "UNICAMP", "PUC", "apartamento", "quarto", "kitnet", "Pampulha", "centro", "mobiliado"]
 PROPERTY_TYPES = ["apartamento", "kitnet", "quarto"]
@@ -91,6 +103,12 @@ class BaseUser(HttpUser):
     _rental_interest_ids_cache = []
 
     token = None
+    token_pool = None
+
+    def on_start(self):
+        """Com LOCUST_TOKENS_FILE, cada usuário virtual autentica como um usuário diferente."""
+        if self.token_pool is not None:
+            self.token = next(self.token_pool)
 
     def get_default_headers(self):
         """Headers padrão sem autenticação."""
@@ -328,6 +346,7 @@ class StudentUser(BaseUser):
     """
     weight = 5
     token = STUDENT_TOKEN
+    token_pool = STUDENT_TOKEN_POOL
     wait_time = between(2, 7)  # Think time mais longo (usuário lendo)
 
     @task(5)
@@ -883,6 +902,7 @@ class AdvertiserUser(BaseUser):
     """
     weight = 2
     token = ADVERTISER_TOKEN
+    token_pool = ADVERTISER_TOKEN_POOL
     wait_time = between(3, 8)  # Think time mais longo (gerenciamento)
 
     # Caches de IDs próprios do anunciante